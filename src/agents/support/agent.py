@@ -1,23 +1,92 @@
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, START, END
 
 from agents.support.state import State
-from agents.support.nodes.conversation.node import conversation
-from agents.support.nodes.extractor.node import extractor
-from agents.support.nodes.booking.node import booking_node
-from agents.support.nodes.research.node import research_node
-from agents.support.routes.intent.route import intent_route
-
-builder = StateGraph(State)
-
-builder.add_node("conversation", conversation)
-builder.add_node("extractor", extractor)
-builder.add_node("booking", booking_node)
-builder.add_node("research", research_node)
-
-builder.add_edge(START, 'extractor')
-builder.add_conditional_edges('extractor', intent_route)
-builder.add_edge('conversation', END)
-builder.add_edge('booking', END)
-builder.add_edge('research', END)
-
-agent = builder.compile()
\ No newline at end of file
+from agents.support.checkpointer import get_checkpointer
+from agents.support.history import asummarize_history, summarize_history
+from agents.support.telemetry import instrument
+from agents.support.nodes.conversation.node import aconversation, conversation
+from agents.support.nodes.extractor.node import aextractor, extractor
+from agents.support.nodes.extractor.combined import aextract_and_route, extract_and_route
+from agents.support.nodes.booking.node import abooking_node, booking_node
+from agents.support.nodes.research.node import aresearch_node, research_node
+from agents.support.routes.intent.route import (
+    aintent_node,
+    aintent_route,
+    anext_step_route,
+    intent_node,
+    intent_route,
+    next_step_route,
+)
+from agents.support.warmup import get_routing_mode, start_warmup
+
+STEPS = ["conversation", "booking", "research"]
+
+
+def dispatch(state: State) -> State:
+    """Punto de unión de las ramas extractor/router (no modifica el estado)."""
+    return {}
+
+
+async def adispatch(state: State) -> State:
+    return {}
+
+
+def _dual(func, afunc) -> RunnableLambda:
+    """
+    Nodo o ruta con las dos implementaciones: `invoke` usa la síncrona y
+    `ainvoke`/`astream` (servidor de LangGraph) la asíncrona, que no ocupa
+    un hilo del pool mientras espera al modelo.
+    """
+    return RunnableLambda(func, afunc=afunc, name=func.__name__)
+
+
+def build_graph(routing_mode: str) -> StateGraph:
+    """
+    Construye el grafo de soporte.
+
+    Args:
+        routing_mode: "parallel", "sequential" o "combined" (ver `get_routing_mode`)
+    """
+    builder = StateGraph(State)
+
+    builder.add_node("conversation", _dual(conversation, aconversation))
+    builder.add_node("booking", _dual(booking_node, abooking_node))
+    builder.add_node("research", _dual(research_node, aresearch_node))
+
+    if routing_mode == "combined":
+        # Una sola llamada al modelo: el nodo devuelve Command(goto=..., update=...)
+        builder.add_node("extractor", _dual(extract_and_route, aextract_and_route), destinations=tuple(STEPS))
+        builder.add_edge(START, 'extractor')
+    elif routing_mode == "sequential":
+        builder.add_node("extractor", _dual(extractor, aextractor))
+        builder.add_edge(START, 'extractor')
+        builder.add_conditional_edges('extractor', _dual(intent_route, aintent_route), STEPS)
+    else:
+        # El router no lee lo que escribe el extractor: ambos corren a la vez
+        # y el despacho espera a los dos (latencia = max, no la suma)
+        builder.add_node("extractor", _dual(extractor, aextractor))
+        builder.add_node("intent", _dual(intent_node, aintent_node))
+        builder.add_node("dispatch", _dual(dispatch, adispatch))
+        builder.add_edge(START, 'extractor')
+        builder.add_edge(START, 'intent')
+        builder.add_edge(['extractor', 'intent'], 'dispatch')
+        builder.add_conditional_edges('dispatch', _dual(next_step_route, anext_step_route), STEPS)
+
+    # Al final del turno se pliega el historial antiguo en el resumen (si toca)
+    builder.add_node("history", _dual(summarize_history, asummarize_history))
+    builder.add_edge('conversation', 'history')
+    builder.add_edge('booking', 'history')
+    builder.add_edge('research', 'history')
+    builder.add_edge('history', END)
+    return builder
+
+
+builder = build_graph(get_routing_mode())
+
+# Con SUPPORT_TELEMETRY=1 se registran spans de nodos, herramientas y modelos.
+# Con SUPPORT_CHECKPOINTER=sqlite el estado de cada thread_id se guarda en datos/
+agent = instrument(builder.compile(checkpointer=get_checkpointer()))
+
+# Los recursos pesados (modelos, vector store) no se crean al importar
+start_warmup()
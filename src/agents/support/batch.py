@@ -0,0 +1,338 @@
+"""
+Ejecución por lotes del grafo de soporte sobre conversaciones en JSONL.
+
+Para pruebas de regresión y reprocesados: reproduce miles de conversaciones
+contra `agents.support.agent` con concurrencia acotada, en el event loop
+(`ainvoke`, sin un hilo por conversación).
+
+Entrada, una conversación por línea (sin "id" se usa el número de línea):
+
+    {"id": "c-001", "messages": ["Hola, soy Ana", "Quiero una cita el lunes"]}
+
+Los mensajes son los turnos del usuario (texto o {"role": "user",
+"content": ...}). Cada conversación se reproduce turno a turno, con el
+estado de un turno como entrada del siguiente (como un cliente); con
+`SUPPORT_CHECKPOINTER=sqlite` el estado lo guarda el checkpointer.
+
+Salida, una línea por conversación, escrita en cuanto termina:
+
+    {"id": "c-001", "turns": [{"input": ..., "step": "booking", "reply": ..., "latency_ms": ...}],
+     "state": {"customer_name": ...}, "latency_ms": ..., "error": null}
+
+- Reanudación: las conversaciones que ya están en la salida se saltan, así
+  que tras una caída basta con relanzar el mismo comando.
+  `--retry-errors` vuelve a ejecutar las que fallaron (la última línea de
+  cada id es la vigente).
+- Límite de peticiones: `--rps`/`--burst` (o `LLM_RATE_LIMIT_RPS`)
+  configuran el limitador compartido por todos los modelos (ver `llm.py`):
+  la concurrencia se puede subir sin provocar errores 429.
+- Al final (y cada `--progress` segundos) se reporta el ritmo en
+  conversaciones/s y turnos/s, los percentiles de latencia por turno y por
+  conversación y la espera en el limitador.
+
+Uso:
+    uv run python -m agents.support.batch conversaciones.jsonl --output resultados.jsonl [--concurrency 32] [--rps 20]
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, TextIO
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+# Campos del estado final que se guardan con cada conversación
+STATE_FIELDS = ("customer_name", "phone", "email", "my_age", "saved_notes", "history_summary")
+STEPS = ("conversation", "booking", "research")
+
+
+# ====================================
+# Entrada y salida
+# ====================================
+def read_conversations(path: Path, skip: Set[str]) -> Iterator[Dict[str, Any]]:
+    """
+    Lee las conversaciones del JSONL (en streaming), saltando los ids de `skip`.
+
+    Las líneas que no son JSON válido se devuelven con "error" para que
+    queden registradas en la salida.
+    """
+    with open(path, encoding="utf-8") as fh:
+        for number, line in enumerate(fh, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                conversation_id = str(record.get("id") or f"linea-{number}")
+            except (json.JSONDecodeError, AttributeError) as error:
+                record, conversation_id = {"error": f"Línea {number} inválida: {error}"}, f"linea-{number}"
+            if conversation_id not in skip:
+                yield {**record, "id": conversation_id}
+
+
+def completed_ids(path: Path, retry_errors: bool) -> Set[str]:
+    """Ids ya presentes en la salida (sin los fallidos si `retry_errors`)."""
+    done: Set[str] = set()
+    if not path.exists():
+        return done
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # Última línea a medio escribir cuando el proceso cayó
+                continue
+            if record.get("error") and retry_errors:
+                done.discard(record["id"])
+            else:
+                done.add(record["id"])
+    return done
+
+
+def open_output(path: Path) -> TextIO:
+    """Abre la salida para añadir; si quedó una línea a medias, la cierra."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists() and path.stat().st_size:
+        with open(path, "rb") as fh:
+            fh.seek(-1, 2)
+            truncated = fh.read(1) != b"\n"
+        if truncated:
+            with open(path, "a", encoding="utf-8") as fh:
+                fh.write("\n")
+    return open(path, "a", encoding="utf-8")
+
+
+def _user_message(turn: Any) -> HumanMessage:
+    if isinstance(turn, dict):
+        return HumanMessage(turn.get("content", ""))
+    return HumanMessage(str(turn))
+
+
+def _reply(messages: List[Any]) -> Optional[str]:
+    """Texto de la última respuesta del asistente entre los mensajes nuevos del turno."""
+    for message in reversed(messages):
+        if isinstance(message, AIMessage) and message.content:
+            return message.text
+    return None
+
+
+# ====================================
+# Ejecución
+# ====================================
+async def run_conversation(graph, record: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+    """Reproduce una conversación turno a turno y devuelve su línea de resultado."""
+    if record.get("error"):
+        return {"id": record["id"], "turns": [], "state": {}, "latency_ms": 0.0, "error": record["error"]}
+
+    config: Dict[str, Any] = {"metadata": {"batch_id": record["id"]}}
+    if graph.checkpointer:
+        thread_id = f"batch:{record['id']}"
+        # Una ejecución anterior que cayó a mitad pudo dejar turnos guardados
+        await graph.checkpointer.adelete_thread(thread_id)
+        config["configurable"] = {"thread_id": thread_id}
+
+    state: Dict[str, Any] = {"messages": []}
+    turns: List[Dict[str, Any]] = []
+    error = None
+    start = time.perf_counter()
+    try:
+        for turn in record.get("messages") or []:
+            message = _user_message(turn)
+            if graph.checkpointer:
+                payload = {"messages": [message]}
+            else:
+                payload = {**state, "messages": state["messages"] + [message]}
+            known = len(state["messages"]) + 1
+            turn_start = time.perf_counter()
+            step = None
+
+            async def consume():
+                nonlocal state, step
+                async for mode, chunk in graph.astream(payload, config, stream_mode=["updates", "values"]):
+                    if mode == "values":
+                        state = chunk
+                    else:
+                        step = next((node for node in chunk if node in STEPS), step)
+
+            await asyncio.wait_for(consume(), timeout)
+            turns.append({
+                "input": message.content,
+                "step": step,
+                "reply": _reply(state["messages"][known:]),
+                "latency_ms": (time.perf_counter() - turn_start) * 1000,
+            })
+    except Exception as exc:
+        error = f"{type(exc).__name__}: {exc}" if str(exc) else type(exc).__name__
+
+    return {
+        "id": record["id"],
+        "turns": turns,
+        "state": {field: state.get(field) for field in STATE_FIELDS if state.get(field) is not None},
+        "latency_ms": (time.perf_counter() - start) * 1000,
+        "error": error,
+    }
+
+
+def _percentiles(samples: List[float]) -> Dict[str, Optional[float]]:
+    if not samples:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None}
+    ordered = sorted(samples)
+    return {
+        "p50_ms": statistics.median(ordered),
+        "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "p99_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))],
+    }
+
+
+class BatchReport:
+    """Conversaciones completadas, errores y latencias de la ejecución."""
+
+    def __init__(self, skipped: int):
+        self.skipped = skipped
+        self.started = time.perf_counter()
+        self.conversations = 0
+        self.errors = 0
+        self.turn_latencies: List[float] = []
+        self.conversation_latencies: List[float] = []
+
+    def add(self, result: Dict[str, Any]) -> None:
+        self.conversations += 1
+        self.errors += bool(result["error"])
+        self.turn_latencies.extend(turn["latency_ms"] for turn in result["turns"])
+        if not result["error"]:
+            self.conversation_latencies.append(result["latency_ms"])
+
+    def summary(self) -> Dict[str, Any]:
+        from agents.support.llm import get_rate_limit_stats
+
+        elapsed = time.perf_counter() - self.started
+        return {
+            "conversations": self.conversations,
+            "errors": self.errors,
+            "skipped": self.skipped,
+            "turns": len(self.turn_latencies),
+            "seconds": elapsed,
+            "conversations_per_second": self.conversations / elapsed if elapsed else 0.0,
+            "turns_per_second": len(self.turn_latencies) / elapsed if elapsed else 0.0,
+            "turn": _percentiles(self.turn_latencies),
+            "conversation": _percentiles(self.conversation_latencies),
+            "rate_limit": get_rate_limit_stats(),
+        }
+
+
+async def run_batch(
+    input_path: Path,
+    output_path: Path,
+    concurrency: int = 16,
+    timeout: float = 300.0,
+    retry_errors: bool = False,
+    progress_seconds: float = 10.0,
+    graph=None,
+) -> Dict[str, Any]:
+    """
+    Ejecuta las conversaciones pendientes del JSONL y añade los resultados a la salida.
+
+    Args:
+        input_path: Conversaciones (JSONL)
+        output_path: Resultados (JSONL); si existe, se reanuda
+        concurrency: Conversaciones en curso a la vez
+        timeout: Segundos máximos por turno
+        retry_errors: Volver a ejecutar las conversaciones que fallaron
+        progress_seconds: Cada cuánto imprimir el progreso (0 = nunca)
+        graph: Grafo compilado (por defecto `agents.support.agent.agent`)
+
+    Returns:
+        Resumen de la ejecución (ver `BatchReport.summary`)
+    """
+    if graph is None:
+        from agents.support.agent import agent as graph
+
+    skip = completed_ids(output_path, retry_errors)
+    report = BatchReport(len(skip))
+    # Cola acotada: la entrada se lee a medida que hay sitio, no entera en memoria
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+
+    async def produce():
+        for record in read_conversations(input_path, skip):
+            await queue.put(record)
+        for _ in range(concurrency):
+            await queue.put(None)
+
+    async def work(output: TextIO):
+        while (record := await queue.get()) is not None:
+            result = await run_conversation(graph, record, timeout)
+            # Un write + flush por conversación: lo escrito sobrevive a una caída del proceso
+            output.write(json.dumps(result, ensure_ascii=False, default=str) + "\n")
+            output.flush()
+            report.add(result)
+
+    async def show_progress():
+        while progress_seconds:
+            await asyncio.sleep(progress_seconds)
+            row = report.summary()
+            print(
+                f"[batch] {row['conversations']} conversaciones ({row['errors']} con error) "
+                f"{row['conversations_per_second']:.1f}/s, {row['turns_per_second']:.1f} turnos/s",
+                file=sys.stderr,
+            )
+
+    with open_output(output_path) as output:
+        progress = asyncio.create_task(show_progress())
+        try:
+            await asyncio.gather(produce(), *(work(output) for _ in range(concurrency)))
+        finally:
+            progress.cancel()
+    return report.summary()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", type=Path, help="Conversaciones (JSONL)")
+    parser.add_argument("--output", type=Path, required=True, help="Resultados (JSONL); si existe, se reanuda")
+    parser.add_argument("--concurrency", type=int, default=16, help="Conversaciones en curso a la vez")
+    parser.add_argument("--rps", type=float, help="Peticiones/s a los modelos (por defecto LLM_RATE_LIMIT_RPS)")
+    parser.add_argument("--burst", type=float, default=0, help="Ráfaga máxima de peticiones (0 = las de un segundo)")
+    parser.add_argument("--timeout", type=float, default=300, help="Segundos máximos por turno")
+    parser.add_argument("--retry-errors", action="store_true", help="Volver a ejecutar las conversaciones fallidas")
+    parser.add_argument("--progress", type=float, default=10, help="Segundos entre líneas de progreso (0 = ninguna)")
+    parser.add_argument("--summary", type=Path, help="Archivo JSON donde guardar el resumen")
+    args = parser.parse_args()
+
+    if args.rps is not None:
+        from agents.support.llm import set_rate_limit
+
+        set_rate_limit(args.rps, args.burst)
+
+    summary = asyncio.run(run_batch(
+        args.input, args.output, args.concurrency, args.timeout, args.retry_errors, args.progress,
+    ))
+    turn, conversation = summary["turn"], summary["conversation"]
+    print(
+        f"{summary['conversations']} conversaciones ({summary['errors']} con error, {summary['skipped']} ya hechas) "
+        f"y {summary['turns']} turnos en {summary['seconds']:.1f} s: "
+        f"{summary['conversations_per_second']:.2f} conversaciones/s, {summary['turns_per_second']:.2f} turnos/s"
+    )
+    if turn["p50_ms"] is not None:
+        print(f"turno         p50 {turn['p50_ms']:8.1f} ms   p95 {turn['p95_ms']:8.1f} ms   p99 {turn['p99_ms']:8.1f} ms")
+    if conversation["p50_ms"] is not None:
+        print(
+            f"conversación  p50 {conversation['p50_ms']:8.1f} ms   p95 {conversation['p95_ms']:8.1f} ms   "
+            f"p99 {conversation['p99_ms']:8.1f} ms"
+        )
+    if summary["rate_limit"]:
+        limit = summary["rate_limit"]
+        print(
+            f"limitador {limit['requests_per_second']:g} peticiones/s: {limit['acquired']} peticiones, "
+            f"{limit['wait_seconds']:.1f} s de espera acumulada"
+        )
+
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as fh:
+            json.dump({"args": {k: str(v) for k, v in vars(args).items()}, "summary": summary}, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
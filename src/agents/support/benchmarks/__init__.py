@@ -0,0 +1,14 @@
+"""
+Benchmarks del grafo de soporte.
+
+Se ejecutan como módulos, p. ej.:
+
+    uv run python -m agents.support.benchmarks.cold_start
+    uv run python -m agents.support.benchmarks.vector_backends
+    uv run python -m agents.support.benchmarks.routing
+    uv run python -m agents.support.benchmarks.load
+    uv run python -m agents.support.benchmarks.suite
+    uv run python -m agents.support.benchmarks.web_cache
+    uv run python -m agents.support.benchmarks.booking
+    uv run python -m agents.support.benchmarks.checkpointer
+"""
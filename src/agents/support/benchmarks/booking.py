@@ -0,0 +1,161 @@
+"""
+Reservas concurrentes sobre el motor de huecos (`nodes/booking/slots.py`).
+
+`--processes` procesos con `--threads` hilos cada uno intentan reservar
+huecos al azar de unos pocos doctores en los próximos días (mucha
+contención: varias sesiones piden el mismo hueco a la vez) y, entre
+reserva y reserva, consultan la disponibilidad. Al final se comprueba que
+no hay dobles reservas: cada hueco tiene como mucho una cita y el bitmap de
+cada día coincide con sus citas.
+
+Uso:
+    uv run python -m agents.support.benchmarks.booking [--processes 4] [--threads 8] [--attempts 100]
+"""
+
+import argparse
+import json
+import multiprocessing
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+from agents.support.benchmarks.vector_backends import percentiles
+from agents.support.nodes.booking.slots import SlotStore, iter_slots, working_mask
+
+
+def _open_days(days: int) -> List[date]:
+    # Desde mañana, para que la hora actual no cierre huecos durante la prueba
+    tomorrow = date.today() + timedelta(days=1)
+    return [day for day in (tomorrow + timedelta(days=n) for n in range(days)) if working_mask(day)]
+
+
+def _worker(path: str, worker: int, threads: int, attempts: int, doctors: int, days: int) -> Dict:
+    store = SlotStore(Path(path))
+    open_days = _open_days(days)
+    lock = threading.Lock()
+    booked, conflicts, retries = 0, 0, 0
+    book_latencies: List[float] = []
+    lookup_latencies: List[float] = []
+
+    def session(seed: int):
+        nonlocal booked, conflicts, retries
+        rng = random.Random(seed)
+        books, lookups = [], []
+        ok = failed = retried = 0
+        for _ in range(attempts):
+            doctor = f"Dr. {rng.randrange(doctors)}"
+            day = rng.choice(open_days)
+
+            start = time.perf_counter()
+            free = store.free_slots(doctor, day)
+            lookups.append(time.perf_counter() - start)
+            # Como un paciente que elige entre lo que vio libre (a veces ya ocupado por otro)
+            slot = rng.choice(free or list(iter_slots(working_mask(day))))
+
+            start = time.perf_counter()
+            result = store.book(doctor, day, slot, f"paciente {seed}")
+            books.append(time.perf_counter() - start)
+            ok += result.ok
+            failed += not result.ok
+            retried += result.retries
+        with lock:
+            booked, conflicts, retries = booked + ok, conflicts + failed, retries + retried
+            book_latencies.extend(books)
+            lookup_latencies.extend(lookups)
+
+    pool = [threading.Thread(target=session, args=(worker * threads + n,)) for n in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return {
+        "booked": booked,
+        "conflicts": conflicts,
+        "retries": retries,
+        "book": book_latencies,
+        "lookup": lookup_latencies,
+    }
+
+
+def _check(path: Path) -> Dict:
+    """Citas duplicadas y días cuyo bitmap no coincide con sus citas."""
+    conn = sqlite3.connect(str(path))
+    appointments = conn.execute("SELECT COUNT(*) FROM appointments").fetchone()[0]
+    duplicates = conn.execute(
+        "SELECT COUNT(*) FROM (SELECT 1 FROM appointments GROUP BY doctor, day, slot HAVING COUNT(*) > 1)"
+    ).fetchone()[0]
+    slots: Dict = {}
+    for doctor, day, slot in conn.execute("SELECT doctor, day, slot FROM appointments"):
+        slots[doctor, day] = slots.get((doctor, day), 0) | 1 << slot
+    mismatched = sum(
+        1 for doctor, day, mask in conn.execute("SELECT doctor, day, booked FROM days")
+        if mask != slots.get((doctor, day), 0)
+    )
+    conn.close()
+    return {"appointments": appointments, "duplicates": duplicates, "mismatched_days": mismatched}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=4, help="Procesos (workers del servidor)")
+    parser.add_argument("--threads", type=int, default=8, help="Sesiones concurrentes por proceso")
+    parser.add_argument("--attempts", type=int, default=100, help="Reservas que intenta cada sesión")
+    parser.add_argument("--doctors", type=int, default=3, help="Doctores")
+    parser.add_argument("--days", type=int, default=30, help="Días (desde mañana) en los que se reserva")
+    parser.add_argument("--output", help="Archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "booking.sqlite3"
+        SlotStore(path)  # Crea el esquema antes de arrancar los procesos
+        capacity = sum(bin(working_mask(day)).count("1") for day in _open_days(args.days)) * args.doctors
+
+        start = time.perf_counter()
+        with multiprocessing.Pool(args.processes) as pool:
+            runs = pool.starmap(
+                _worker,
+                [(str(path), n, args.threads, args.attempts, args.doctors, args.days) for n in range(args.processes)],
+            )
+        elapsed = time.perf_counter() - start
+        check = _check(path)
+
+    booked = sum(run["booked"] for run in runs)
+    attempts = booked + sum(run["conflicts"] for run in runs)
+    results = {
+        "seconds": elapsed,
+        "attempts": attempts,
+        "booked": booked,
+        "capacity": capacity,
+        "retries": sum(run["retries"] for run in runs),
+        "bookings_per_second": attempts / elapsed,
+        **check,
+        "book": percentiles([value for run in runs for value in run["book"]]),
+        "lookup": percentiles([value for run in runs for value in run["lookup"]]),
+    }
+
+    print(
+        f"{attempts} intentos en {elapsed:.2f} s ({results['bookings_per_second']:.0f}/s): "
+        f"{booked} reservas de {capacity} huecos, {results['retries']} reintentos optimistas"
+    )
+    for name in ("book", "lookup"):
+        row = results[name]
+        label = "reserva" if name == "book" else "disponibilidad"
+        print(f"{label:15s} p50 {row['p50_ms']:7.3f} ms   p95 {row['p95_ms']:7.3f} ms   p99 {row['p99_ms']:7.3f} ms")
+    ok = not check["duplicates"] and not check["mismatched_days"] and check["appointments"] == booked
+    print(
+        f"dobles reservas: {check['duplicates']}, días inconsistentes: {check['mismatched_days']}, "
+        f"citas en la base: {check['appointments']} -> {'OK' if ok else 'ERROR'}"
+    )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump({"args": vars(args), "results": results}, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Coste por turno del checkpointer SQLite según crece la conversación.
+
+Una conversación (`thread_id`) de `--turns` turnos contra el grafo de
+soporte con modelos stub (sin API) y `SQLiteCheckpointer` en un directorio
+temporal; cada turno envía solo el mensaje nuevo. Se compara el historial
+como deltas sobre el log de mensajes (`delta`) con guardar el canal
+`messages` completo en cada paso (`completo`). En los turnos indicados por
+`--report` se mide:
+- bytes escritos en ese turno (checkpoints, blobs, escrituras y mensajes)
+  y en toda la conversación
+- lectura del último checkpoint en el proceso (`get_tuple`, como al
+  empezar el turno siguiente) y en frío (checkpointer nuevo, sin memoria)
+
+Uso:
+    uv run python -m agents.support.benchmarks.checkpointer [--turns 250] [--report 10 50 100 250]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from agents.support.benchmarks.stubs import install_stub_models
+
+MESSAGES = [
+    "Hola, buenas tardes",
+    "¿Qué servicios ofrecen para la revisión anual?",
+    "Me llamo Ana, ¿cuál es su horario de atención?",
+    "Perfecto, muchas gracias por la información",
+]
+
+# Lecturas por medición (se reporta la mediana)
+_READS = 20
+
+
+def _read_ms(saver, config) -> float:
+    samples = []
+    for _ in range(_READS):
+        start = time.perf_counter()
+        saver.get_tuple(config)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def _cold_read_ms(path: Path, channels, config) -> float:
+    """Primera lectura de un checkpointer nuevo (p. ej. tras reiniciar el proceso)."""
+    from agents.support.checkpointer import SQLiteCheckpointer
+
+    samples = []
+    for _ in range(_READS):
+        saver = SQLiteCheckpointer(path, keep=0, delta_channels=channels)
+        start = time.perf_counter()
+        saver.get_tuple(config)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def run(graph_builder, path: Path, delta: bool, turns: int, report: List[int]) -> List[Dict]:
+    from agents.support.checkpointer import DELTA_CHANNELS, SQLiteCheckpointer
+
+    channels = DELTA_CHANNELS if delta else ()
+    # Sin poda: se mide el crecimiento con todo el historial guardado
+    saver = SQLiteCheckpointer(path, keep=0, delta_channels=channels)
+    graph = graph_builder.compile(checkpointer=saver)
+    config = {"configurable": {"thread_id": "benchmark"}}
+
+    rows = []
+    for turn in range(1, turns + 1):
+        written = saver.stats()["bytes_written"]
+        state = graph.invoke({"messages": [("user", MESSAGES[turn % len(MESSAGES)])]}, config)
+        if turn not in report:
+            continue
+        rows.append({
+            "turn": turn,
+            "messages": len(state["messages"]),
+            "bytes_written": saver.stats()["bytes_written"] - written,
+            "read_ms": _read_ms(saver, config),
+            "cold_read_ms": _cold_read_ms(path, channels, config),
+            "total_bytes_written": saver.stats()["bytes_written"],
+        })
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=250, help="Turnos de la conversación")
+    parser.add_argument("--report", type=int, nargs="+", default=[10, 50, 100, 250], help="Turnos en los que medir")
+    parser.add_argument("--reply-tokens", type=int, default=40, help="Tokens de cada respuesta del modelo")
+    parser.add_argument("--output", help="Archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    os.environ["INTENT_FAST_PATH"] = "0"
+    os.environ.setdefault("SUPPORT_INIT_MODE", "lazy")
+    os.environ.setdefault("LLM_CACHE", "0")
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    install_stub_models(0, reply_tokens=args.reply_tokens)
+
+    from agents.support.agent import build_graph
+
+    report = sorted(turn for turn in args.report if turn <= args.turns)
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="support-checkpoints-") as tmp:
+        for name, delta in (("delta", True), ("completo", False)):
+            results[name] = run(build_graph("parallel"), Path(tmp) / f"{name}.sqlite3", delta, args.turns, report)
+
+    for name, rows in results.items():
+        print(name)
+        for row in rows:
+            print(
+                f"  turno {row['turn']:4d} ({row['messages']:4d} mensajes): "
+                f"{row['bytes_written'] / 1024:7.1f} KB escritos   "
+                f"lectura {row['read_ms']:6.3f} ms (en frío {row['cold_read_ms']:6.3f} ms)   "
+                f"total {row['total_bytes_written'] / 1024 / 1024:6.2f} MB"
+            )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump({"args": vars(args), "results": results}, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Mide el tiempo de arranque en frío del grafo de soporte.
+
+Cada medición se hace en un proceso nuevo:
+- "cold": intérprete recién iniciado importando `agents.support.agent`
+  (lo que paga `langgraph dev` al cargar el grafo por primera vez)
+- "worker": igual, pero con langgraph/langchain ya importados, como en un
+  worker del servidor que carga el grafo (solo cuenta el coste propio)
+
+Para cada modo de inicialización (`SUPPORT_INIT_MODE`) se reporta el tiempo
+de importación y, en modo "background", cuándo termina el warm-up.
+
+Uso:
+    uv run python -m agents.support.benchmarks.cold_start [--runs 3] [--docs DIR]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+_PROBE = r"""
+import json, sys, time
+preload = sys.argv[1] == "worker"
+if preload:
+    import langgraph.graph, langchain_core.messages, langchain.agents, langchain.chat_models
+start = time.perf_counter()
+import agents.support.agent
+import_seconds = time.perf_counter() - start
+from agents.support.warmup import get_warmup_status, _warmup_thread
+if _warmup_thread is not None:
+    _warmup_thread.join()
+ready_seconds = time.perf_counter() - start
+print(json.dumps({
+    "import_seconds": import_seconds,
+    "ready_seconds": ready_seconds,
+    "status": get_warmup_status(),
+}))
+"""
+
+
+def measure(mode: str, scenario: str, env: dict) -> dict:
+    """Ejecuta una medición en un proceso nuevo y retorna sus tiempos."""
+    env = {**env, "SUPPORT_INIT_MODE": mode}
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE, scenario],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3, help="Repeticiones por combinación")
+    parser.add_argument("--docs", help="Directorio de documentos (por defecto uno vacío)")
+    parser.add_argument("--output", help="Archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ)
+        env.setdefault("OPENAI_API_KEY", "sk-benchmark")
+        env.setdefault("TAVILY_API_KEY", "tvly-benchmark")
+        env["RESEARCH_DOCUMENTOS_DIR"] = args.docs or os.path.join(tmp, "documentos")
+        env["RESEARCH_DATOS_DIR"] = os.path.join(tmp, "datos")
+
+        results = []
+        for scenario in ("cold", "worker"):
+            for mode in ("eager", "background", "lazy"):
+                runs = [measure(mode, scenario, env) for _ in range(args.runs)]
+                row = {
+                    "scenario": scenario,
+                    "mode": mode,
+                    "import_ms": statistics.median(r["import_seconds"] for r in runs) * 1000,
+                    "ready_ms": statistics.median(r["ready_seconds"] for r in runs) * 1000,
+                }
+                results.append(row)
+                print(
+                    f"{scenario:7s} {mode:11s} import {row['import_ms']:8.1f} ms"
+                    f"   listo {row['ready_ms']:8.1f} ms"
+                )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
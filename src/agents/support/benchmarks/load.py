@@ -0,0 +1,127 @@
+"""
+Prueba de carga del grafo de soporte: turnos/s con N sesiones concurrentes,
+ejecución síncrona frente a asíncrona.
+
+Los modelos se sustituyen por stubs con latencia fija (`--llm-ms`), así que
+se mide la capacidad del proceso para solapar esperas, no la de la API:
+- sync: `graph.invoke` en un pool de `--threads` hilos (como los workers
+  síncronos del servidor); cada turno ocupa un hilo mientras espera
+- async: `graph.ainvoke` de todas las sesiones en el event loop
+
+Uso:
+    uv run python -m agents.support.benchmarks.load [--sessions 10 100 1000] [--turns 3] [--llm-ms 100]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from langchain_core.messages import HumanMessage
+
+from agents.support.benchmarks.stubs import install_stub_models
+
+MESSAGES = [
+    "Hola, buenas tardes",
+    "¿Qué servicios ofrecen?",
+    "Me llamo Ana, ¿cuál es su horario?",
+    "Perfecto, muchas gracias",
+]
+
+
+def _message(turn: int) -> HumanMessage:
+    return HumanMessage(MESSAGES[turn % len(MESSAGES)])
+
+
+def _summary(mode: str, sessions: int, turns: int, elapsed: float, latencies: List[float]) -> Dict:
+    latencies = sorted(latencies)
+    return {
+        "mode": mode,
+        "sessions": sessions,
+        "turns": len(latencies),
+        "seconds": elapsed,
+        "turns_per_second": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+def run_sync(graph, sessions: int, turns: int, threads: int) -> Dict:
+    latencies: List[float] = []
+
+    def session(_):
+        state = {"messages": []}
+        for turn in range(turns):
+            start = time.perf_counter()
+            state = graph.invoke({**state, "messages": state["messages"] + [_message(turn)]})
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(session, range(sessions)))
+    return _summary("sync", sessions, turns, time.perf_counter() - start, latencies)
+
+
+async def run_async(graph, sessions: int, turns: int) -> Dict:
+    latencies: List[float] = []
+
+    async def session():
+        state = {"messages": []}
+        for turn in range(turns):
+            start = time.perf_counter()
+            state = await graph.ainvoke({**state, "messages": state["messages"] + [_message(turn)]})
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(session() for _ in range(sessions)))
+    return _summary("async", sessions, turns, time.perf_counter() - start, latencies)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[10, 100, 1000], help="Sesiones concurrentes")
+    parser.add_argument("--turns", type=int, default=3, help="Turnos por sesión")
+    parser.add_argument("--llm-ms", type=float, default=100, help="Latencia de cada llamada al modelo")
+    parser.add_argument("--threads", type=int, default=min(32, (os.cpu_count() or 1) + 4),
+                        help="Hilos del modo síncrono (por defecto, los de ThreadPoolExecutor)")
+    parser.add_argument("--routing-mode", default="parallel", help="parallel, sequential o combined")
+    parser.add_argument("--output", help="Archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    # Sin ruta rápida (necesita embeddings) ni warm-up: solo modelos falsos
+    os.environ["INTENT_FAST_PATH"] = "0"
+    os.environ.setdefault("SUPPORT_INIT_MODE", "lazy")
+    # Sin caché de respuestas: cada llamada paga la latencia del stub
+    os.environ.setdefault("LLM_CACHE", "0")
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    install_stub_models(args.llm_ms / 1000)
+
+    from agents.support.agent import build_graph
+    from agents.support.telemetry import instrument
+
+    # Igual que `agent`: con SUPPORT_TELEMETRY=1 se mide también su coste
+    graph = instrument(build_graph(args.routing_mode).compile())
+
+    results = []
+    for sessions in args.sessions:
+        for row in (
+            run_sync(graph, sessions, args.turns, args.threads),
+            asyncio.run(run_async(graph, sessions, args.turns)),
+        ):
+            results.append(row)
+            print(
+                f"{row['mode']:5s} {sessions:5d} sesiones: {row['turns_per_second']:8.1f} turnos/s"
+                f"   p50 {row['p50_ms']:8.1f} ms   p95 {row['p95_ms']:8.1f} ms"
+            )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump({"args": vars(args), "results": results}, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Mide la latencia previa al despacho según `SUPPORT_ROUTING_MODE`.
+
+Los modelos de chat se sustituyen por stubs con latencia inyectada (no se
+llama a ninguna API): la extracción tarda `--extract-ms`, el enrutado
+`--route-ms` y la respuesta de `conversation` `--reply-ms`. Se reporta el
+tiempo desde que empieza el turno hasta que arranca el nodo de destino
+("despacho") y el del turno completo.
+
+Se espera: sequential ≈ extract + route, parallel ≈ max(extract, route),
+combined ≈ una sola llamada.
+
+Uso:
+    uv run python -m agents.support.benchmarks.routing [--turns 20] [--extract-ms 800] [--route-ms 600]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import time
+
+from agents.support.benchmarks.stubs import install_stub_models, text_calls
+
+ROUTING_MODES = ("sequential", "parallel", "combined")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=20, help="Turnos por modo")
+    parser.add_argument("--extract-ms", type=float, default=800, help="Latencia de la extracción (ContactInfo)")
+    parser.add_argument("--route-ms", type=float, default=600, help="Latencia del enrutado (RouteIntent)")
+    parser.add_argument("--combined-ms", type=float, help="Latencia de la llamada combinada (por defecto la de extracción)")
+    parser.add_argument("--reply-ms", type=float, default=0, help="Latencia de la respuesta de conversation")
+    parser.add_argument("--output", help="Archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    # Sin ruta rápida local ni warm-up: se mide el coste de las llamadas al modelo
+    os.environ["INTENT_FAST_PATH"] = "0"
+    os.environ.setdefault("SUPPORT_INIT_MODE", "lazy")
+    # Sin caché de respuestas: cada llamada paga la latencia del stub
+    os.environ.setdefault("LLM_CACHE", "0")
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+    structured = {
+        "ContactInfo": args.extract_ms / 1000,
+        "RouteIntent": args.route_ms / 1000,
+        "TurnAnalysis": (args.combined_ms if args.combined_ms is not None else args.extract_ms) / 1000,
+    }
+    install_stub_models(args.reply_ms / 1000, structured)
+
+    from agents.support.agent import build_graph
+
+    results = []
+    for mode in ROUTING_MODES:
+        graph = build_graph(mode).compile()
+
+        pre_dispatch, total = [], []
+        for _ in range(args.turns):
+            start = time.perf_counter()
+            # Con pista de nombre: el extractor incremental sí llama al modelo
+            graph.invoke({"messages": [("user", "Hola, me llamo Ana, ¿qué servicios ofrecen?")]})
+            total.append(time.perf_counter() - start)
+            pre_dispatch.append(text_calls[-1] - start)
+
+        row = {
+            "mode": mode,
+            "pre_dispatch_p50_ms": statistics.median(pre_dispatch) * 1000,
+            "turn_p50_ms": statistics.median(total) * 1000,
+        }
+        results.append(row)
+        print(
+            f"{mode:10s} despacho p50 {row['pre_dispatch_p50_ms']:8.1f} ms"
+            f"   turno p50 {row['turn_p50_ms']:8.1f} ms"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump({"args": vars(args), "results": results}, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+"""
+Modelos falsos para los benchmarks: latencia inyectada y sin llamadas a APIs.
+
+`install_stub_models` sustituye `init_chat_model` en `agents.support.llm` e
+`install_stub_embeddings` el modelo de embeddings de OpenAI, así que deben
+llamarse antes de que los nodos creen sus modelos.
+
+`write_corpus` genera documentos sintéticos (deterministas) para el índice
+de research e `install_stub_web_search` un backend local para `buscar_web`.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage, ToolMessage
+from langchain_core.messages.utils import count_tokens_approximately
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+
+# Instante de cada respuesta de texto (las pide el nodo de destino: sirve
+# para medir cuándo se despachó el turno)
+text_calls: List[float] = []
+
+# Salida estructurada por esquema (p. ej. {"RouteIntent": {"step": "booking"}});
+# los campos que no aparecen toman su valor por defecto
+structured_values: Dict[str, Dict[str, Any]] = {}
+
+# Herramientas que los agentes llaman una vez por turno antes de responder
+# (nombre → argumentos), si el modelo las tiene enlazadas
+tool_plan: Dict[str, Dict[str, Any]] = {}
+
+# Vocabulario de las respuestas y del corpus sintético
+WORDS = (
+    "cita consulta horario doctor paciente clínica tratamiento revisión análisis "
+    "resultado seguro factura receta vacuna urgencia especialista pediatría "
+    "cardiología dermatología fisioterapia nutrición laboratorio radiografía "
+    "precio descuento reserva cancelación documento informe protocolo higiene"
+).split()
+
+
+class StubChatModel(BaseChatModel):
+    """
+    Modelo de chat falso que tarda `latency` segundos en responder.
+
+    `with_structured_output(schema)` retorna los valores por defecto del
+    esquema tras `structured_latency[schema.__name__]` segundos.
+
+    En streaming, el primer token llega tras `latency` segundos y el resto
+    cada `token_latency` segundos (una palabra por token). Con
+    `reply_tokens` la respuesta tiene ese número de palabras.
+
+    Con herramientas enlazadas (`bind_tools`), si alguna está en `tool_plan`
+    y aún no hay resultado de herramienta en el turno, responde con esa
+    llamada en lugar de texto. Las respuestas llevan `usage_metadata`
+    (tokens aproximados de entrada y de salida).
+    """
+
+    latency: float = 0.0
+    structured_latency: Dict[str, float] = {}
+    reply: str = "respuesta"
+    reply_tokens: int = 0
+    token_latency: float = 0.0
+    bound_tools: List[str] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _text(self) -> str:
+        if self.reply_tokens:
+            return " ".join(WORDS[i % len(WORDS)] for i in range(self.reply_tokens))
+        return self.reply
+
+    def _planned_call(self, messages) -> Optional[Dict[str, Any]]:
+        """Llamada a herramienta que toca en este paso, o None."""
+        for message in reversed(messages):
+            if isinstance(message, ToolMessage):
+                return None
+            if isinstance(message, HumanMessage):
+                break
+        for name in self.bound_tools:
+            if name in tool_plan:
+                return {"name": name, "args": tool_plan[name], "id": f"call_{name}_{len(messages)}"}
+        return None
+
+    def _usage(self, messages, text: str) -> Dict[str, int]:
+        input_tokens = count_tokens_approximately(messages)
+        output_tokens = max(1, len(text) // 4)
+        return {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+
+    def _result(self, messages) -> ChatResult:
+        call = self._planned_call(messages)
+        if call is not None:
+            message = AIMessage(content="", tool_calls=[call], usage_metadata=self._usage(messages, json.dumps(call["args"])))
+        else:
+            text = self._text()
+            message = AIMessage(content=text, usage_metadata=self._usage(messages, text))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        text_calls.append(time.perf_counter())
+        time.sleep(self.latency)
+        return self._result(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        text_calls.append(time.perf_counter())
+        await asyncio.sleep(self.latency)
+        return self._result(messages)
+
+    def _chunks(self, messages):
+        call = self._planned_call(messages)
+        if call is not None:
+            args = json.dumps(call["args"])
+            yield ChatGenerationChunk(message=AIMessageChunk(
+                content="",
+                tool_call_chunks=[{"name": call["name"], "args": args, "id": call["id"], "index": 0}],
+                usage_metadata=self._usage(messages, args),
+            ))
+            return
+        text = self._text()
+        words = text.split(" ")
+        for i, word in enumerate(words):
+            last = i == len(words) - 1
+            yield ChatGenerationChunk(message=AIMessageChunk(
+                content=word if i == 0 else " " + word,
+                usage_metadata=self._usage(messages, text) if last else None,
+            ))
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        text_calls.append(time.perf_counter())
+        time.sleep(self.latency)
+        for i, chunk in enumerate(self._chunks(messages)):
+            if i:
+                time.sleep(self.token_latency)
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        text_calls.append(time.perf_counter())
+        await asyncio.sleep(self.latency)
+        for i, chunk in enumerate(self._chunks(messages)):
+            if i:
+                await asyncio.sleep(self.token_latency)
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    def bind_tools(self, tools, **kwargs: Any):
+        names = [getattr(tool, "name", None) or getattr(tool, "__name__", str(tool)) for tool in tools]
+        return self.model_copy(update={"bound_tools": names})
+
+    def with_structured_output(self, schema, **kwargs: Any):
+        latency = self.structured_latency.get(schema.__name__, self.latency)
+
+        # Por defecto: step="conversation", sin datos de contacto.
+        # Como las llamadas reales, pasa por el limitador de peticiones compartido
+        def respond(messages):
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            time.sleep(latency)
+            return schema(**structured_values.get(schema.__name__, {}))
+
+        async def arespond(messages):
+            if self.rate_limiter is not None:
+                await self.rate_limiter.aacquire()
+            await asyncio.sleep(latency)
+            return schema(**structured_values.get(schema.__name__, {}))
+
+        return RunnableLambda(respond, afunc=arespond)
+
+
+def install_stub_models(
+    latency: float = 0.0,
+    structured_latency: Dict[str, float] = None,
+    **fields: Any,
+) -> None:
+    """
+    Hace que `get_chat_model` cree modelos falsos en lugar de clientes reales.
+
+    `fields` se pasan a `StubChatModel` (p. ej. `reply`, `token_latency`).
+    """
+    import agents.support.llm as llm
+
+    llm._models.clear()
+    llm.init_chat_model = lambda model, **kwargs: StubChatModel(
+        latency=latency, structured_latency=structured_latency or {}, **fields
+    )
+
+
+class StubEmbeddings(Embeddings):
+    """
+    Embeddings falsos y deterministas: bolsa de palabras con hashing,
+    normalizada (textos con palabras comunes quedan cerca, así que las
+    búsquedas devuelven resultados con sentido).
+
+    Cada llamada tarda `latency` segundos más `latency_per_text` por texto.
+    """
+
+    def __init__(self, size: int = 256, latency: float = 0.0, latency_per_text: float = 0.0):
+        self.size = size
+        self.latency = latency
+        self.latency_per_text = latency_per_text
+        self.calls = 0
+        self.texts = 0
+
+    def _vector(self, text: str) -> List[float]:
+        vector = [0.0] * self.size
+        for word in re.findall(r"\w+", text.lower()):
+            digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+            index = int.from_bytes(digest[:4], "little") % self.size
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+        return [value / norm for value in vector]
+
+    def _delay(self, texts: int) -> float:
+        self.calls += 1
+        self.texts += texts
+        return self.latency + self.latency_per_text * texts
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self._delay(len(texts)))
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        time.sleep(self._delay(1))
+        return self._vector(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        await asyncio.sleep(self._delay(len(texts)))
+        return [self._vector(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        await asyncio.sleep(self._delay(1))
+        return self._vector(text)
+
+
+def install_stub_embeddings(**kwargs: Any) -> None:
+    """
+    Hace que `get_embeddings` envuelva `StubEmbeddings` (con la caché en
+    disco de siempre) en lugar de `OpenAIEmbeddings`.
+
+    `kwargs` se pasan a `StubEmbeddings` (`size`, `latency`, `latency_per_text`).
+    """
+    import langchain_openai
+    import agents.support.nodes.research.vectorstore as vectorstore
+
+    vectorstore._embeddings = None
+    langchain_openai.OpenAIEmbeddings = lambda model=None, **_: StubEmbeddings(**kwargs)
+
+
+def corpus_text(words: int, rng: random.Random) -> str:
+    """Texto sintético: párrafos de frases con palabras del vocabulario."""
+    paragraphs, sentence, paragraph = [], [], []
+    for i in range(words):
+        sentence.append(rng.choice(WORDS))
+        if len(sentence) >= rng.randint(8, 16) or i == words - 1:
+            paragraph.append(" ".join(sentence).capitalize() + ".")
+            sentence = []
+        if len(paragraph) >= 5 or (i == words - 1 and paragraph):
+            paragraphs.append(" ".join(paragraph))
+            paragraph = []
+    return "\n\n".join(paragraphs)
+
+
+def write_corpus(directory: Path, documents: int, words: int = 600, seed: int = 0) -> List[Path]:
+    """
+    Escribe `documents` archivos .txt de `words` palabras en `directory`.
+
+    El contenido depende solo de `seed` y del número de documento, así que
+    un corpus más grande contiene a uno más pequeño con la misma semilla.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for i in range(documents):
+        rng = random.Random(f"{seed}-{i}")
+        path = directory / f"doc-{i:05d}.txt"
+        path.write_text(f"Documento {i}\n\n{corpus_text(words, rng)}\n", encoding="utf-8")
+        paths.append(path)
+    return paths
+
+
+def corpus_queries(count: int, seed: int = 0, words: Sequence[int] = (2, 4)) -> List[str]:
+    """Consultas distintas con palabras del vocabulario (sin repetir: no acierta la caché)."""
+    rng = random.Random(f"queries-{seed}")
+    queries = []
+    seen = set()
+    while len(queries) < count:
+        query = " ".join(rng.choice(WORDS) for _ in range(rng.randint(*words)))
+        if query not in seen:
+            seen.add(query)
+            queries.append(query)
+    return queries
+
+
+class StubWebSearch:
+    """
+    Backend de búsqueda web falso para `use_web_backend`: tarda `latency`
+    segundos y retorna resultados con la forma de los de Tavily.
+    """
+
+    args_schema = None
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _result(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            self.calls += 1
+        query = args["query"]
+        return {
+            "query": query,
+            "answer": f"respuesta sobre {query}",
+            "results": [{"url": f"https://example.com/{i}", "title": query, "content": query} for i in range(5)],
+        }
+
+    def invoke(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        time.sleep(self.latency)
+        return self._result(args)
+
+    async def ainvoke(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        await asyncio.sleep(self.latency)
+        return self._result(args)
+
+
+def install_stub_web_search(latency: float = 0.0) -> StubWebSearch:
+    """Pone `StubWebSearch` detrás de la caché de `buscar_web`."""
+    from agents.support.nodes.research.tools import use_web_backend
+
+    backend = StubWebSearch(latency)
+    use_web_backend(backend)
+    return backend
@@ -0,0 +1,275 @@
+"""
+Suite de benchmarks offline del grafo de soporte (sin llamadas a APIs).
+
+Los modelos de chat y de embeddings se sustituyen por stubs deterministas
+(`stubs.py`) con latencia configurable, y los documentos son un corpus
+sintético generado en un directorio temporal. Se mide:
+- ingesta: `initialize_vectorstore(force_reload=True)` para cada tamaño de
+  corpus (documentos/s y chunks/s)
+- búsqueda: latencia p50/p95/p99 de `search_documents` con consultas
+  distintas (sin aciertos de caché) a medida que crece el corpus
+- turnos: latencia p50/p95/p99 de un turno completo por ruta
+  (conversation, booking, research), con el corpus más grande indexado;
+  booking y research llaman a una herramienta antes de responder
+- carga: turnos/s con N sesiones concurrentes (como `load.py`)
+
+Los resultados se guardan en JSON (`--output`) junto con los parámetros y
+el entorno; con `--baseline` se compara contra una ejecución anterior.
+
+Uso:
+    uv run python -m agents.support.benchmarks.suite [--corpus-docs 50 200 800] [--output suite.json]
+    uv run python -m agents.support.benchmarks.suite --quick --baseline suite.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List
+
+from langchain_core.messages import HumanMessage
+
+from agents.support.benchmarks import stubs
+from agents.support.benchmarks.load import run_async, run_sync
+from agents.support.benchmarks.vector_backends import percentiles, timed
+
+ROUTES = ("conversation", "booking", "research")
+
+ROUTE_MESSAGES = {
+    "conversation": "Hola, ¿qué tal?",
+    "booking": "Quiero pedir una cita con el doctor para el lunes",
+    "research": "¿Qué dicen los documentos sobre el protocolo de higiene?",
+}
+
+# Dentro de la ventana reservable, para que la consulta llegue al motor de huecos
+BOOKING_ARGS = {"date": (date.today() + timedelta(days=7)).isoformat(), "time": "10:00", "doctor": "Dr. García"}
+
+# Percentiles que compara `--baseline`
+_COMPARED = ("p50_ms", "p95_ms", "p99_ms")
+
+
+def _environment() -> Dict:
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        revision = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_revision": revision,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+# ====================================
+# Corpus: ingesta y búsqueda
+# ====================================
+def _use_research_dirs(root: Path) -> None:
+    """Apunta research a `root/documentos` y `root/datos` con singletons nuevos."""
+    import agents.support.nodes.research.config as config
+    import agents.support.nodes.research.vectorstore as vectorstore
+
+    os.environ["RESEARCH_DOCUMENTOS_DIR"] = str(root / "documentos")
+    os.environ["RESEARCH_DATOS_DIR"] = str(root / "datos")
+    config._config = None
+    vectorstore._embeddings = None
+    vectorstore._lexical_index = None
+    vectorstore._pdf_text_cache = None
+    vectorstore._query_cache = None
+    vectorstore.reset_vectorstore()
+
+
+def bench_corpus(workdir: Path, documents: int, words: int, queries: List[str]) -> Dict:
+    """Indexa un corpus sintético de `documents` documentos y mide búsquedas."""
+    from agents.support.nodes.research.vectorstore import get_embeddings, initialize_vectorstore, search_documents
+
+    root = workdir / f"corpus-{documents}"
+    _use_research_dirs(root)
+    stubs.write_corpus(root / "documentos", documents, words)
+
+    vectorstore, ingest_seconds = timed(initialize_vectorstore, force_reload=True)
+    chunks = vectorstore._collection.count()
+    embedding_calls = get_embeddings().underlying.calls
+
+    search_times = [timed(search_documents, query, k=4)[1] for query in queries]
+    return {
+        "documents": documents,
+        "words_per_document": words,
+        "chunks": chunks,
+        "ingest": {
+            "seconds": ingest_seconds,
+            "documents_per_second": documents / ingest_seconds,
+            "chunks_per_second": chunks / ingest_seconds,
+            "embedding_calls": embedding_calls,
+        },
+        "search": {"queries": len(queries), **percentiles(search_times)},
+    }
+
+
+# ====================================
+# Grafo: turnos por ruta y carga
+# ====================================
+def _force_route(route: str) -> None:
+    """El router (y el análisis combinado) eligen siempre `route`."""
+    stubs.structured_values["RouteIntent"] = {"step": route}
+    stubs.structured_values["TurnAnalysis"] = {"step": route}
+
+
+def bench_route(graph, route: str, samples: int, queries: List[str]) -> Dict:
+    """Latencia de turnos de una sola pregunta que van por `route`."""
+    _force_route(route)
+    latencies = []
+    calls_before = len(stubs.text_calls)
+    # El primer turno crea los agentes y modelos: no cuenta
+    for i in range(samples + 1):
+        # Cada búsqueda con una consulta distinta, para no medir la caché
+        stubs.tool_plan["buscar_documentos"] = {"consulta": queries[i % len(queries)]}
+        start = time.perf_counter()
+        graph.invoke({"messages": [HumanMessage(ROUTE_MESSAGES[route])]})
+        if i:
+            latencies.append(time.perf_counter() - start)
+    return {
+        "samples": samples,
+        "llm_calls_per_turn": (len(stubs.text_calls) - calls_before) / (samples + 1),
+        **percentiles(latencies),
+    }
+
+
+# ====================================
+# Comparación con una ejecución anterior
+# ====================================
+def _flatten(results: Dict) -> Dict[str, float]:
+    """Métricas comparables: "seccion/clave/pXX_ms" → valor."""
+    flat = {}
+    for route, row in results["routes"].items():
+        flat.update({f"routes/{route}/{key}": row[key] for key in _COMPARED})
+    for row in results["corpus"]:
+        flat.update({f"search/{row['documents']}/{key}": row["search"][key] for key in _COMPARED})
+        flat[f"ingest/{row['documents']}/documents_per_second"] = row["ingest"]["documents_per_second"]
+    for row in results["throughput"]:
+        flat[f"throughput/{row['mode']}/{row['sessions']}/turns_per_second"] = row["turns_per_second"]
+    return flat
+
+
+def compare(results: Dict, baseline: Dict) -> List[Dict]:
+    """Cambio relativo de cada métrica presente en ambas ejecuciones."""
+    current, previous = _flatten(results), _flatten(baseline)
+    return [
+        {"metric": name, "baseline": previous[name], "current": value,
+         "change": (value - previous[name]) / previous[name] if previous[name] else None}
+        for name, value in current.items()
+        if name in previous
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus-docs", type=int, nargs="+", default=[50, 200, 800],
+                        help="Tamaños del corpus sintético (documentos)")
+    parser.add_argument("--doc-words", type=int, default=600, help="Palabras por documento")
+    parser.add_argument("--queries", type=int, default=100, help="Consultas de búsqueda por tamaño de corpus")
+    parser.add_argument("--samples", type=int, default=50, help="Turnos medidos por ruta")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[10, 100], help="Sesiones concurrentes")
+    parser.add_argument("--turns", type=int, default=3, help="Turnos por sesión en la prueba de carga")
+    parser.add_argument("--llm-ms", type=float, default=50, help="Latencia hasta el primer token del modelo")
+    parser.add_argument("--token-ms", type=float, default=0, help="Latencia entre tokens en streaming")
+    parser.add_argument("--reply-tokens", type=int, default=40, help="Tokens de cada respuesta de texto")
+    parser.add_argument("--embed-ms", type=float, default=20, help="Latencia de cada llamada de embeddings")
+    parser.add_argument("--embed-dim", type=int, default=256, help="Dimensión de los embeddings falsos")
+    parser.add_argument("--threads", type=int, default=min(32, (os.cpu_count() or 1) + 4),
+                        help="Hilos del modo síncrono en la prueba de carga")
+    parser.add_argument("--routing-mode", default="parallel", help="parallel, sequential o combined")
+    parser.add_argument("--quick", action="store_true", help="Tamaños pequeños (comprobación rápida)")
+    parser.add_argument("--workdir", help="Directorio para los corpus (por defecto, uno temporal)")
+    parser.add_argument("--output", default="benchmark-suite.json", help="Archivo JSON de resultados")
+    parser.add_argument("--baseline", help="JSON de una ejecución anterior con el que comparar")
+    args = parser.parse_args()
+    if args.quick:
+        args.corpus_docs, args.queries, args.samples, args.sessions = [20, 80], 20, 10, [10]
+
+    # Sin ruta rápida del router (usaría embeddings), warm-up ni vigilancia
+    os.environ["INTENT_FAST_PATH"] = "0"
+    os.environ["RESEARCH_WATCH"] = "0"
+    os.environ.setdefault("SUPPORT_INIT_MODE", "lazy")
+    # Sin caché de respuestas: cada llamada paga la latencia del stub
+    os.environ.setdefault("LLM_CACHE", "0")
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    os.environ.setdefault("TAVILY_API_KEY", "tvly-benchmark")
+    stubs.install_stub_models(
+        args.llm_ms / 1000, reply_tokens=args.reply_tokens, token_latency=args.token_ms / 1000,
+    )
+    stubs.install_stub_embeddings(size=args.embed_dim, latency=args.embed_ms / 1000)
+    stubs.tool_plan["get_appointment_availability"] = BOOKING_ARGS
+
+    from agents.support.agent import build_graph
+    from agents.support.streaming import get_streaming_metrics
+    from agents.support.telemetry import instrument
+
+    queries = stubs.corpus_queries(args.queries + args.samples + 1)
+    search_queries, turn_queries = queries[:args.queries], queries[args.queries:]
+
+    with tempfile.TemporaryDirectory(prefix="support-bench-") as tmp:
+        workdir = Path(args.workdir or tmp)
+
+        corpus = []
+        for documents in sorted(args.corpus_docs):
+            row = bench_corpus(workdir, documents, args.doc_words, search_queries)
+            corpus.append(row)
+            print(
+                f"corpus {documents:6d} docs ({row['chunks']:6d} chunks): "
+                f"ingesta {row['ingest']['documents_per_second']:8.1f} docs/s   "
+                f"búsqueda p50 {row['search']['p50_ms']:7.2f} ms p99 {row['search']['p99_ms']:7.2f} ms"
+            )
+
+        # Igual que `agent`: con SUPPORT_TELEMETRY=1 se mide también su coste
+        graph = instrument(build_graph(args.routing_mode).compile())
+        routes = {}
+        for route in ROUTES:
+            routes[route] = row = bench_route(graph, route, args.samples, turn_queries)
+            print(
+                f"turno {route:12s}: p50 {row['p50_ms']:8.1f} ms   p95 {row['p95_ms']:8.1f} ms"
+                f"   p99 {row['p99_ms']:8.1f} ms"
+            )
+
+        _force_route("conversation")
+        throughput = []
+        for sessions in args.sessions:
+            for row in (
+                run_sync(graph, sessions, args.turns, args.threads),
+                asyncio.run(run_async(graph, sessions, args.turns)),
+            ):
+                throughput.append(row)
+                print(f"carga {row['mode']:5s} {sessions:5d} sesiones: {row['turns_per_second']:8.1f} turnos/s")
+
+    results = {
+        "environment": _environment(),
+        "args": vars(args),
+        "corpus": corpus,
+        "routes": routes,
+        "throughput": throughput,
+        "streaming": get_streaming_metrics(),
+    }
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            results["comparison"] = compare(results, json.load(fh))
+        for row in results["comparison"]:
+            if row["change"] is not None:
+                print(f"{row['metric']:50s} {row['baseline']:10.2f} → {row['current']:10.2f} ({row['change']:+.1%})")
+
+    with open(args.output, "w", encoding="utf-8") as fh:
+        json.dump(results, fh, indent=2, ensure_ascii=False)
+    print(f"Resultados en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Compara los backends vectoriales (Chroma y matriz NumPy mmap) en un corpus sintético.
+
+Se generan vectores unitarios agrupados en clusters (parecidos a embeddings
+reales) y consultas cercanas a ellos. La referencia es la búsqueda exacta
+en float32; para cada backend se reporta:
+- recall@k del top-k frente a la referencia
+- latencia p50/p95 de top-k y de MMR por consulta
+- throughput de top-k en lote (todas las consultas a la vez)
+- tiempo de construcción del índice
+- arranque en frío: proceso nuevo que importa el backend, abre el índice
+  persistido y responde una consulta (lo que paga cada worker)
+
+No llama a ningún modelo de embeddings.
+
+Uso:
+    uv run python -m agents.support.benchmarks.vector_backends [--chunks 20000] [--dim 256]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from agents.support.nodes.research.numpy_store import NumpyVectorStore
+
+# Chroma no admite lotes muy grandes en un solo upsert
+_WRITE_BATCH = 4096
+
+
+def synthetic_corpus(chunks: int, dim: int, queries: int, seed: int = 0):
+    """Genera (ids, vectores, consultas) normalizados y agrupados en clusters."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(chunks // 50, 1), dim)).astype(np.float32)
+    labels = rng.integers(0, len(centers), size=chunks)
+    vectors = centers[labels] + 0.6 * rng.normal(size=(chunks, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    picks = rng.integers(0, chunks, size=queries)
+    query_vectors = vectors[picks] + 0.3 * rng.normal(size=(queries, dim)).astype(np.float32)
+    query_vectors /= np.linalg.norm(query_vectors, axis=1, keepdims=True)
+    return [f"chunk-{i}" for i in range(chunks)], vectors, query_vectors
+
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int) -> List[set]:
+    """Referencia: top-k exacto por similitud coseno."""
+    scores = queries @ vectors.T
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return [{f"chunk-{i}" for i in row} for row in top]
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "p50_ms": statistics.median(ordered) * 1000,
+        "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+        "p99_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000,
+    }
+
+
+def timed(fn: Callable, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+_COLD_PROBE = r"""
+import json, sys, time
+start = time.perf_counter()
+from langchain_core.embeddings import DeterministicFakeEmbedding
+backend, directory, dim = sys.argv[1], sys.argv[2], int(sys.argv[3])
+embeddings = DeterministicFakeEmbedding(size=dim)
+if backend == "chroma":
+    from agents.support.benchmarks.vector_backends import open_chroma
+    store = open_chroma(directory, embeddings)
+else:
+    from agents.support.nodes.research.numpy_store import NumpyVectorStore
+    store = NumpyVectorStore(embeddings, directory, backend.split("-", 1)[1])
+opened = time.perf_counter()
+store.similarity_search_by_vector([1.0] * dim, k=4)
+print(json.dumps({"open_seconds": opened - start, "first_query_seconds": time.perf_counter() - start}))
+"""
+
+
+def cold_start(name: str, directory: Path, dim: int) -> Dict:
+    """Mide en un proceso nuevo la importación, apertura y primera consulta."""
+    output = subprocess.run(
+        [sys.executable, "-c", _COLD_PROBE, name, str(directory), str(dim)],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def open_chroma(directory: Path, embeddings):
+    from langchain_chroma import Chroma
+
+    return Chroma(
+        embedding_function=embeddings,
+        persist_directory=str(directory),
+        collection_name="benchmark",
+        collection_metadata={"hnsw:space": "cosine"},
+    )
+
+
+def run_backend(
+    name: str,
+    directory: Path,
+    open_store: Callable,
+    ids,
+    vectors,
+    queries,
+    truth,
+    k: int,
+    fetch_k: int,
+) -> Dict:
+    """Construye, reabre y mide un backend."""
+    store = open_store()
+    texts = [f"texto del {chunk_id}" for chunk_id in ids]
+    metadatas = [{"source": "sintetico"} for _ in ids]
+
+    def build():
+        for start in range(0, len(ids), _WRITE_BATCH):
+            end = start + _WRITE_BATCH
+            store._collection.upsert(
+                ids=ids[start:end],
+                embeddings=vectors[start:end].tolist(),
+                documents=texts[start:end],
+                metadatas=metadatas[start:end],
+            )
+
+    _, build_seconds = timed(build)
+    cold = cold_start(name, directory, vectors.shape[1])
+
+    query_lists = queries.tolist()
+    hits, top_k_times = [], []
+    for query, expected in zip(query_lists, truth):
+        docs, seconds = timed(store.similarity_search_by_vector, query, k=k)
+        top_k_times.append(seconds)
+        hits.append(len({doc.id for doc in docs} & expected) / k)
+
+    mmr_times = [
+        timed(store.max_marginal_relevance_search_by_vector, query, k=k, fetch_k=fetch_k)[1]
+        for query in query_lists
+    ]
+
+    if isinstance(store, NumpyVectorStore):
+        _, batch_seconds = timed(store.search_by_vectors, queries, k)
+    else:
+        _, batch_seconds = timed(store._collection.query, query_embeddings=query_lists, n_results=k)
+
+    return {
+        "backend": name,
+        "recall_at_k": statistics.fmean(hits),
+        "build_s": build_seconds,
+        "cold_open_ms": cold["open_seconds"] * 1000,
+        "cold_first_query_ms": cold["first_query_seconds"] * 1000,
+        "top_k": percentiles(top_k_times),
+        "mmr": percentiles(mmr_times),
+        "batch_qps": len(query_lists) / batch_seconds,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=20000, help="Tamaño del corpus sintético")
+    parser.add_argument("--dim", type=int, default=256, help="Dimensión de los vectores")
+    parser.add_argument("--queries", type=int, default=200, help="Número de consultas")
+    parser.add_argument("--k", type=int, default=4, help="Documentos por consulta")
+    parser.add_argument("--fetch-k", type=int, default=10, help="Candidatos de MMR")
+    parser.add_argument("--skip-chroma", action="store_true", help="Medir solo el backend numpy")
+    parser.add_argument("--output", help="Archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    ids, vectors, queries = synthetic_corpus(args.chunks, args.dim, args.queries)
+    truth = exact_top_k(vectors, queries, args.k)
+    # Solo se usa para búsquedas por texto, que el benchmark no hace
+    embeddings = DeterministicFakeEmbedding(size=args.dim)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = []
+        if not args.skip_chroma:
+            directory = Path(tmp) / "chroma"
+            backends.append(("chroma", directory, lambda directory=directory: open_chroma(directory, embeddings)))
+        for dtype in ("float32", "float16", "int8"):
+            directory = Path(tmp) / dtype
+            backends.append((
+                f"numpy-{dtype}",
+                directory,
+                lambda directory=directory, dtype=dtype: NumpyVectorStore(embeddings, directory, dtype),
+            ))
+
+        for name, directory, open_store in backends:
+            row = run_backend(name, directory, open_store, ids, vectors, queries, truth, args.k, args.fetch_k)
+            results.append(row)
+            print(
+                f"{name:14s} recall@{args.k} {row['recall_at_k']:.3f}"
+                f"   top-k p50 {row['top_k']['p50_ms']:7.2f} ms p95 {row['top_k']['p95_ms']:7.2f} ms"
+                f"   mmr p50 {row['mmr']['p50_ms']:7.2f} ms"
+                f"   lote {row['batch_qps']:9.0f} q/s"
+                f"   construir {row['build_s']:6.2f} s"
+                f"   en frío {row['cold_first_query_ms']:7.1f} ms"
+            )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(
+                {"chunks": args.chunks, "dim": args.dim, "queries": args.queries, "k": args.k, "results": results},
+                fh,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Caché de `buscar_web` frente a llamar siempre al backend, con un backend
+local (stub) de latencia fija.
+
+Cada sesión hace búsquedas de un conjunto de consultas con distribución
+Zipf (unas pocas muy repetidas, como los saludos o "horario"), escritas con
+variaciones de mayúsculas y signos. Todas las sesiones arrancan a la vez,
+así que las primeras consultas coinciden en vuelo y se coalescen.
+
+Uso:
+    uv run python -m agents.support.benchmarks.web_cache [--sessions 50] [--searches 10] [--upstream-ms 800]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Dict, List
+
+from agents.support.benchmarks.stubs import StubWebSearch
+from agents.support.benchmarks.vector_backends import percentiles
+from agents.support.nodes.research.web_cache import WebSearchCache
+
+
+def _queries(count: int, sessions: int, searches: int, seed: int = 0) -> List[List[str]]:
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(count)]
+    variants = (str, lambda q: q + "?", lambda q: f"¿{q}?", str.upper, lambda q: f"  {q} ")
+    plan = []
+    for _ in range(sessions):
+        picks = rng.choices(range(count), weights=weights, k=searches)
+        plan.append([rng.choice(variants)(f"consulta número {pick}") for pick in picks])
+    return plan
+
+
+async def _run(search, plan: List[List[str]]) -> List[float]:
+    latencies: List[float] = []
+
+    async def session(queries: List[str]):
+        for query in queries:
+            start = time.perf_counter()
+            await search(query)
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(session(queries) for queries in plan))
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=50, help="Sesiones concurrentes")
+    parser.add_argument("--searches", type=int, default=10, help="Búsquedas por sesión")
+    parser.add_argument("--queries", type=int, default=40, help="Consultas distintas")
+    parser.add_argument("--upstream-ms", type=float, default=800, help="Latencia del backend")
+    parser.add_argument("--output", help="Archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    plan = _queries(args.queries, args.sessions, args.searches)
+    results: Dict[str, Dict] = {}
+
+    backend = StubWebSearch(args.upstream_ms / 1000)
+    start = time.perf_counter()
+    latencies = asyncio.run(_run(lambda query: backend.ainvoke({"query": query}), plan))
+    results["sin_cache"] = {
+        "seconds": time.perf_counter() - start,
+        "upstream_calls": backend.calls,
+        **percentiles(latencies),
+    }
+
+    backend = StubWebSearch(args.upstream_ms / 1000)
+    cache = WebSearchCache(backend)
+    start = time.perf_counter()
+    latencies = asyncio.run(_run(cache.aget, plan))
+    results["cache"] = {
+        "seconds": time.perf_counter() - start,
+        **percentiles(latencies),
+        **cache.stats(),
+    }
+
+    for name, row in results.items():
+        print(
+            f"{name:10s} llamadas al backend {row['upstream_calls']:5d}   "
+            f"p50 {row['p50_ms']:8.1f} ms   p95 {row['p95_ms']:8.1f} ms   total {row['seconds']:6.2f} s"
+        )
+    stats = results["cache"]
+    print(
+        f"tasa de aciertos {stats['hit_rate']:.1%} ({stats['hits']} aciertos, {stats['coalesced']} coalescidas); "
+        f"latencia del backend ahorrada {stats['saved_seconds']:.1f} s"
+    )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump({"args": vars(args), "results": results}, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
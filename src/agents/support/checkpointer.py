@@ -0,0 +1,678 @@
+"""
+Checkpointer persistente del grafo de soporte (SQLite en modo WAL).
+
+Opcional (`SUPPORT_CHECKPOINTER=sqlite`): el grafo guarda el estado de cada
+conversación (`thread_id`) en `datos/checkpoints.sqlite3` y el cliente solo
+envía el mensaje nuevo de cada turno, no el historial completo.
+
+- Como el checkpointer en memoria de LangGraph, cada checkpoint escribe
+  solo los canales que cambiaron en ese paso (un blob por versión).
+- El historial (`messages`) no se reescribe en cada paso: los mensajes se
+  añaden a un log por conversación (solo se añade) y el valor del canal es
+  una vista sobre ese log como rangos de posiciones ("0–41"). Un paso que
+  añade dos mensajes escribe esos dos mensajes y una vista de pocos bytes,
+  tenga la conversación diez mensajes o quinientos.
+  Los mensajes que ya estaban se reconocen por identidad con la última
+  lista leída o escrita en el proceso (LangGraph conserva los objetos entre
+  pasos); un mensaje reemplazado (mismo id, otro contenido) o un historial
+  bifurcado desde un checkpoint antiguo se vuelve a añadir al log.
+- Leer el último checkpoint reutiliza esos mismos objetos: no se vuelven a
+  deserializar los mensajes de la conversación en cada turno.
+- Los valores de más de `SUPPORT_CHECKPOINT_COMPRESS_MIN` bytes se
+  comprimen con zlib.
+- Poda: se conservan los `SUPPORT_CHECKPOINT_KEEP` checkpoints más
+  recientes de cada conversación (0 = todos); los blobs y la parte del log
+  que ya no usa ninguno se borran con ellos. `prune` y `delete_thread`
+  siguen la interfaz de LangGraph.
+
+Se usa con `graph.invoke(..., {"configurable": {"thread_id": ...}})`. El
+servidor de LangGraph trae su propio checkpointer, así que esto es para
+ejecutar el grafo fuera de él (scripts, API propia, benchmarks).
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from random import random
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+    writes_sort_key,
+)
+
+from agents.support import telemetry
+
+ENABLED = os.getenv("SUPPORT_CHECKPOINTER", "").lower() in ("sqlite", "1", "true", "yes")
+CHECKPOINT_PATH = os.getenv("SUPPORT_CHECKPOINT_PATH", "")
+# Checkpoints que se conservan por conversación (0 = todos)
+KEEP_CHECKPOINTS = int(os.getenv("SUPPORT_CHECKPOINT_KEEP", "50"))
+COMPRESS_MIN_BYTES = int(os.getenv("SUPPORT_CHECKPOINT_COMPRESS_MIN", "1024"))
+# Conversaciones cuya última lista de mensajes se conserva en memoria
+CACHED_THREADS = 256
+
+# Canales que se guardan como vista sobre el log de mensajes
+DELTA_CHANNELS = ("messages",)
+
+_VIEW_TYPE = "msgview"
+_ZLIB_SUFFIX = "+zlib"
+
+
+def _ranges(seqs: Sequence[int]) -> List[List[int]]:
+    """Posiciones del log como rangos [inicio, fin) consecutivos."""
+    ranges: List[List[int]] = []
+    for seq in seqs:
+        if ranges and ranges[-1][1] == seq:
+            ranges[-1][1] += 1
+        else:
+            ranges.append([seq, seq + 1])
+    return ranges
+
+
+@dataclass
+class _View:
+    """Última lista de mensajes de una conversación y su posición en el log."""
+    messages: List[Any]
+    seqs: List[int]
+    ranges: List[List[int]]
+
+
+class SQLiteCheckpointer(BaseCheckpointSaver[str]):
+    """
+    Checkpointer de LangGraph en SQLite con el historial como deltas.
+
+    Tablas:
+        checkpoints: checkpoint (sin valores de canales) y metadatos
+        blobs: valor de cada canal por versión (vista del log para `messages`)
+        writes: escrituras pendientes de cada checkpoint
+        messages: log de mensajes por conversación (solo se añade)
+
+    Args:
+        path: Archivo SQLite
+        keep: Checkpoints que se conservan por conversación (0 = todos)
+        compress_min_bytes: Tamaño a partir del que se comprime un valor
+        delta_channels: Canales (listas) que se guardan como vista del log;
+            vacío = el canal completo en cada versión
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        keep: int = KEEP_CHECKPOINTS,
+        compress_min_bytes: int = COMPRESS_MIN_BYTES,
+        delta_channels: Sequence[str] = DELTA_CHANNELS,
+        serde: Optional[SerializerProtocol] = None,
+    ):
+        super().__init__(serde=serde)
+        self.path = path
+        self.keep = keep
+        self.compress_min_bytes = compress_min_bytes
+        self.delta_channels = frozenset(delta_channels)
+        self._lock = threading.Lock()
+        self._views: "OrderedDict[Tuple[str, str], _View]" = OrderedDict()
+        self._puts_since_prune: Dict[Tuple[str, str], int] = {}
+        self._counters = {
+            "checkpoints": 0,
+            "reads": 0,
+            "bytes_written": 0,
+            "messages_appended": 0,
+            "compressed_bytes_saved": 0,
+            "pruned_checkpoints": 0,
+        }
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL,
+                checkpoint_id TEXT NOT NULL,
+                parent_id TEXT,
+                checkpoint_type TEXT NOT NULL,
+                checkpoint BLOB NOT NULL,
+                metadata_type TEXT NOT NULL,
+                metadata BLOB NOT NULL,
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+            );
+            CREATE TABLE IF NOT EXISTS blobs (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL,
+                channel TEXT NOT NULL,
+                version TEXT NOT NULL,
+                type TEXT NOT NULL,
+                value BLOB,
+                PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+            );
+            CREATE TABLE IF NOT EXISTS writes (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL,
+                checkpoint_id TEXT NOT NULL,
+                task_id TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                channel TEXT NOT NULL,
+                type TEXT NOT NULL,
+                value BLOB,
+                task_path TEXT NOT NULL DEFAULT '',
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+            );
+            CREATE TABLE IF NOT EXISTS messages (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                type TEXT NOT NULL,
+                value BLOB NOT NULL,
+                PRIMARY KEY (thread_id, checkpoint_ns, seq)
+            );
+            """
+        )
+
+    # ====================================
+    # Serialización
+    # ====================================
+    def _dump(self, value: Any) -> Tuple[str, bytes]:
+        """Serializa un valor y lo comprime si es grande y se reduce."""
+        type_, data = self.serde.dumps_typed(value)
+        if len(data) >= self.compress_min_bytes:
+            packed = zlib.compress(data, 6)
+            if len(packed) < len(data):
+                self._counters["compressed_bytes_saved"] += len(data) - len(packed)
+                return type_ + _ZLIB_SUFFIX, packed
+        return type_, data
+
+    def _load(self, type_: str, data: bytes) -> Any:
+        if type_.endswith(_ZLIB_SUFFIX):
+            type_, data = type_[: -len(_ZLIB_SUFFIX)], zlib.decompress(data)
+        return self.serde.loads_typed((type_, data))
+
+    def get_next_version(self, current: Optional[str], channel: None = None) -> str:
+        # Como InMemorySaver: sufijo aleatorio para que dos ramas no compartan versión
+        if current is None:
+            number = 0
+        elif isinstance(current, int):
+            number = current
+        else:
+            number = int(current.split(".")[0])
+        return f"{number + 1:032}.{random():016}"
+
+    # ====================================
+    # Log de mensajes
+    # ====================================
+    def _remember(self, key: Tuple[str, str], messages: List[Any], seqs: List[int]) -> _View:
+        view = _View(list(messages), seqs, _ranges(seqs))
+        self._views[key] = view
+        self._views.move_to_end(key)
+        while len(self._views) > CACHED_THREADS:
+            self._views.popitem(last=False)
+        return view
+
+    def _append_messages(self, key: Tuple[str, str], messages: List[Any]) -> bytes:
+        """
+        Añade al log los mensajes nuevos de la lista (con el lock y la transacción tomados).
+
+        Returns:
+            La vista de la lista sobre el log (rangos en JSON)
+        """
+        view = self._views.get(key)
+        prefix = 0
+        if view is not None and view.seqs:
+            low = self._conn.execute(
+                "SELECT MIN(seq) FROM messages WHERE thread_id = ? AND checkpoint_ns = ?", key
+            ).fetchone()[0]
+            # La poda (u otro proceso) borró parte del log que la vista en memoria usa
+            if low is None or min(start for start, _ in view.ranges) < low:
+                view = None
+        if view is not None:
+            limit = min(len(view.messages), len(messages))
+            while prefix < limit and messages[prefix] is view.messages[prefix]:
+                prefix += 1
+
+        seqs = view.seqs[:prefix] if view is not None else []
+        new = messages[prefix:]
+        if new:
+            start = self._conn.execute(
+                "SELECT COALESCE(MAX(seq) + 1, 0) FROM messages WHERE thread_id = ? AND checkpoint_ns = ?", key
+            ).fetchone()[0]
+            rows = [(*key, start + offset, *self._dump(message)) for offset, message in enumerate(new)]
+            self._conn.executemany(
+                "INSERT INTO messages (thread_id, checkpoint_ns, seq, type, value) VALUES (?, ?, ?, ?, ?)", rows
+            )
+            seqs.extend(range(start, start + len(new)))
+            self._counters["messages_appended"] += len(new)
+            self._counters["bytes_written"] += sum(len(row[-1]) for row in rows)
+        return json.dumps(self._remember(key, messages, seqs).ranges).encode()
+
+    def _load_messages(self, key: Tuple[str, str], ranges: List[List[int]], remember: bool) -> List[Any]:
+        """Reconstruye la lista de una vista, reutilizando los mensajes ya cargados."""
+        view = self._views.get(key)
+        if view is not None and view.ranges == ranges:
+            self._views.move_to_end(key)
+            return list(view.messages)
+
+        known = dict(zip(view.seqs, view.messages)) if view is not None else {}
+        messages: List[Any] = []
+        seqs: List[int] = []
+        for start, end in ranges:
+            if all(seq in known for seq in range(start, end)):
+                messages.extend(known[seq] for seq in range(start, end))
+                seqs.extend(range(start, end))
+                continue
+            rows = self._conn.execute(
+                "SELECT seq, type, value FROM messages "
+                "WHERE thread_id = ? AND checkpoint_ns = ? AND seq >= ? AND seq < ? ORDER BY seq",
+                (*key, start, end),
+            )
+            for seq, type_, data in rows:
+                messages.append(known[seq] if seq in known else self._load(type_, data))
+                seqs.append(seq)
+        if remember:
+            self._remember(key, messages, seqs)
+        return messages
+
+    # ====================================
+    # Lectura
+    # ====================================
+    def _tuple(self, thread_id: str, checkpoint_ns: str, row: Tuple, remember: bool) -> CheckpointTuple:
+        """Arma el CheckpointTuple de una fila de `checkpoints` (con el lock tomado)."""
+        checkpoint_id, parent_id, checkpoint_type, checkpoint_data, metadata_type, metadata_data = row
+        key = (thread_id, checkpoint_ns)
+        checkpoint: Checkpoint = self._load(checkpoint_type, checkpoint_data)
+
+        values: Dict[str, Any] = {}
+        for channel, version in checkpoint["channel_versions"].items():
+            # Una búsqueda por clave primaria por canal: no depende de cuántas versiones haya
+            blob = self._conn.execute(
+                "SELECT type, value FROM blobs "
+                "WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                (*key, channel, str(version)),
+            ).fetchone()
+            if blob is None or blob[0] == "empty":
+                continue
+            if blob[0] == _VIEW_TYPE:
+                values[channel] = self._load_messages(key, json.loads(blob[1]), remember)
+            else:
+                values[channel] = self._load(*blob)
+
+        writes = self._conn.execute(
+            "SELECT task_id, channel, type, value, task_path, idx FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+            (*key, checkpoint_id),
+        ).fetchall()
+        writes.sort(key=lambda write: writes_sort_key(write[4], write[0], write[5]))
+
+        def config_for(target: str) -> RunnableConfig:
+            return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": target}}
+
+        self._counters["reads"] += 1
+        return CheckpointTuple(
+            config=config_for(checkpoint_id),
+            checkpoint={**checkpoint, "channel_values": values},
+            metadata=self._load(metadata_type, metadata_data),
+            parent_config=config_for(parent_id) if parent_id else None,
+            pending_writes=[(task_id, channel, self._load(type_, data)) for task_id, channel, type_, data, _, _ in writes],
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        columns = "checkpoint_id, parent_id, checkpoint_type, checkpoint, metadata_type, metadata"
+        with self._lock:
+            if checkpoint_id := get_checkpoint_id(config):
+                row = self._conn.execute(
+                    f"SELECT {columns} FROM checkpoints "
+                    "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, checkpoint_id),
+                ).fetchone()
+            else:
+                row = self._conn.execute(
+                    f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                    "ORDER BY checkpoint_id DESC LIMIT 1",
+                    (thread_id, checkpoint_ns),
+                ).fetchone()
+            if row is None:
+                return None
+            return self._tuple(thread_id, checkpoint_ns, row, remember=True)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        where, params = [], []
+        if config is not None:
+            where.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                where.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                where.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before is not None and (before_id := get_checkpoint_id(before)):
+            where.append("checkpoint_id < ?")
+            params.append(before_id)
+        condition = f"WHERE {' AND '.join(where)}" if where else ""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_id, checkpoint_type, checkpoint, "
+                f"metadata_type, metadata FROM checkpoints {condition} ORDER BY checkpoint_id DESC",
+                params,
+            ).fetchall()
+
+        for thread_id, checkpoint_ns, *row in rows:
+            if limit is not None and limit <= 0:
+                break
+            if filter:
+                metadata = self._load(row[4], row[5])
+                if not all(metadata.get(name) == value for name, value in filter.items()):
+                    continue
+            with self._lock:
+                # El historial no reemplaza la vista en memoria de la conversación
+                item = self._tuple(thread_id, checkpoint_ns, tuple(row), remember=False)
+            if limit is not None:
+                limit -= 1
+            yield item
+
+    # ====================================
+    # Escritura
+    # ====================================
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        key = (thread_id, checkpoint_ns)
+        stored = checkpoint.copy()
+        values = stored.pop("channel_values")
+
+        with self._lock:
+            checkpoint_type, checkpoint_data = self._dump(stored)
+            metadata_type, metadata_data = self._dump(get_checkpoint_metadata(config, metadata))
+            blobs = []
+            # BEGIN IMMEDIATE: las posiciones del log se asignan sin carreras entre procesos
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for channel, version in new_versions.items():
+                    if channel not in values:
+                        type_, data = "empty", b""
+                    elif channel in self.delta_channels and isinstance(values[channel], list):
+                        type_, data = _VIEW_TYPE, self._append_messages(key, values[channel])
+                    else:
+                        type_, data = self._dump(values[channel])
+                    blobs.append((*key, channel, str(version), type_, data))
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO blobs (thread_id, checkpoint_ns, channel, version, type, value) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    blobs,
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO checkpoints (thread_id, checkpoint_ns, checkpoint_id, parent_id, "
+                    "checkpoint_type, checkpoint, metadata_type, metadata) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        *key,
+                        checkpoint["id"],
+                        config["configurable"].get("checkpoint_id"),
+                        checkpoint_type,
+                        checkpoint_data,
+                        metadata_type,
+                        metadata_data,
+                    ),
+                )
+                self._counters["checkpoints"] += 1
+                self._counters["bytes_written"] += (
+                    len(checkpoint_data) + len(metadata_data) + sum(len(blob[-1]) for blob in blobs)
+                )
+                if self.keep:
+                    # Poda amortizada: una vez cada `keep` checkpoints de la conversación
+                    self._puts_since_prune[key] = self._puts_since_prune.get(key, 0) + 1
+                    if self._puts_since_prune[key] >= self.keep:
+                        self._puts_since_prune[key] = 0
+                        self._prune(key, self.keep)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                # La vista en memoria puede apuntar a posiciones del log que no se guardaron
+                self._views.pop(key, None)
+                raise
+
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"]}}
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        with self._lock:
+            for idx, (channel, value) in enumerate(writes):
+                idx = WRITES_IDX_MAP.get(channel, idx)
+                type_, data = self._dump(value)
+                # Las escrituras normales no se repiten; las especiales (errores, interrupciones) se reemplazan
+                verb = "INSERT OR IGNORE" if idx >= 0 else "INSERT OR REPLACE"
+                self._conn.execute(
+                    f"{verb} INTO writes (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type, "
+                    "value, task_path) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type_, data, task_path),
+                )
+                self._counters["bytes_written"] += len(data)
+
+    # ====================================
+    # Poda
+    # ====================================
+    def _prune(self, key: Tuple[str, str], keep: int) -> int:
+        """
+        Deja los `keep` checkpoints más recientes de la conversación y borra
+        los blobs y el principio del log que ya no usan (con el lock tomado).
+
+        Returns:
+            Checkpoints borrados
+        """
+        row = self._conn.execute(
+            "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+            "ORDER BY checkpoint_id DESC LIMIT 1 OFFSET ?",
+            (*key, keep - 1),
+        ).fetchone()
+        if row is None:
+            return 0
+        deleted = self._conn.execute(
+            "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < ?", (*key, row[0])
+        ).rowcount
+        self._conn.execute(
+            "DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < ?", (*key, row[0])
+        )
+
+        referenced = set()
+        for type_, data in self._conn.execute(
+            "SELECT checkpoint_type, checkpoint FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?", key
+        ):
+            referenced.update((channel, str(version)) for channel, version in self._load(type_, data)["channel_versions"].items())
+        stale, low = [], None
+        for channel, version, type_, data in self._conn.execute(
+            "SELECT channel, version, type, CASE WHEN type = ? THEN value END FROM blobs "
+            "WHERE thread_id = ? AND checkpoint_ns = ?",
+            (_VIEW_TYPE, *key),
+        ):
+            if (channel, version) not in referenced:
+                stale.append((*key, channel, version))
+            elif type_ == _VIEW_TYPE:
+                starts = [start for start, _ in json.loads(data)]
+                if starts:
+                    low = min(starts) if low is None else min(low, *starts)
+        self._conn.executemany(
+            "DELETE FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?", stale
+        )
+        # El log solo se recorta por el principio: las posiciones que quedan no cambian
+        if low is None:
+            self._conn.execute("DELETE FROM messages WHERE thread_id = ? AND checkpoint_ns = ?", key)
+        else:
+            self._conn.execute(
+                "DELETE FROM messages WHERE thread_id = ? AND checkpoint_ns = ? AND seq < ?", (*key, low)
+            )
+        self._counters["pruned_checkpoints"] += deleted
+        return deleted
+
+    def prune(self, thread_ids: Sequence[str], *, strategy: str = "keep_latest") -> None:
+        """
+        Poda las conversaciones: `keep_latest` deja solo el último checkpoint
+        de cada namespace y `delete` las borra enteras.
+        """
+        if strategy == "delete":
+            for thread_id in thread_ids:
+                self.delete_thread(thread_id)
+            return
+        if strategy != "keep_latest":
+            raise ValueError(f"Estrategia de poda desconocida: {strategy}")
+        with self._lock:
+            for thread_id in thread_ids:
+                namespaces = self._conn.execute(
+                    "SELECT DISTINCT checkpoint_ns FROM checkpoints WHERE thread_id = ?", (thread_id,)
+                ).fetchall()
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    for (checkpoint_ns,) in namespaces:
+                        self._prune((thread_id, checkpoint_ns), 1)
+                    self._conn.execute("COMMIT")
+                except BaseException:
+                    self._conn.execute("ROLLBACK")
+                    raise
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for table in ("checkpoints", "blobs", "writes", "messages"):
+                    self._conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            for key in [key for key in self._views if key[0] == thread_id]:
+                del self._views[key]
+
+    # ====================================
+    # Versiones asíncronas
+    # ====================================
+    # Son operaciones locales de menos de un milisegundo: pasarlas a un
+    # executor costaría más que ejecutarlas en el event loop.
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return self.get_tuple(config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        for item in self.list(config, filter=filter, before=before, limit=limit):
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        self.put_writes(config, writes, task_id, task_path)
+
+    async def aprune(self, thread_ids: Sequence[str], *, strategy: str = "keep_latest") -> None:
+        self.prune(thread_ids, strategy=strategy)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        self.delete_thread(thread_id)
+
+    # ====================================
+    # Métricas
+    # ====================================
+    def stats(self) -> Dict:
+        """Checkpoints escritos, bytes, mensajes añadidos al log y poda."""
+        with self._lock:
+            counters = dict(self._counters)
+            counters["cached_threads"] = len(self._views)
+        counters["bytes_per_checkpoint"] = (
+            counters["bytes_written"] / counters["checkpoints"] if counters["checkpoints"] else 0.0
+        )
+        return counters
+
+
+# ====================================
+# Instancia compartida
+# ====================================
+_checkpointer: Optional[SQLiteCheckpointer] = None
+_checkpointer_lock = threading.Lock()
+
+
+def get_checkpointer() -> Optional[SQLiteCheckpointer]:
+    """
+    Checkpointer del grafo: None salvo con `SUPPORT_CHECKPOINTER=sqlite`
+    (por defecto en `datos/checkpoints.sqlite3`).
+    """
+    global _checkpointer
+    if not ENABLED:
+        return None
+    if _checkpointer is None:
+        with _checkpointer_lock:
+            if _checkpointer is None:
+                if CHECKPOINT_PATH:
+                    path = Path(CHECKPOINT_PATH)
+                else:
+                    from agents.support.nodes.research.config import get_datos_dir
+
+                    path = get_datos_dir() / "checkpoints.sqlite3"
+                _checkpointer = SQLiteCheckpointer(path)
+    return _checkpointer
+
+
+def get_checkpointer_stats() -> Dict:
+    """Estadísticas del checkpointer (vacío si no está activo o aún no se ha usado)."""
+    return _checkpointer.stats() if _checkpointer is not None else {}
+
+
+def _collect_checkpointer_metrics():
+    if _checkpointer is None:
+        return
+    stats = _checkpointer.stats()
+    yield "support_checkpoints_total", {}, stats["checkpoints"], "counter"
+    yield "support_checkpoint_bytes_written_total", {}, stats["bytes_written"], "counter"
+    yield "support_checkpoint_messages_appended_total", {}, stats["messages_appended"], "counter"
+    yield "support_checkpoints_pruned_total", {}, stats["pruned_checkpoints"], "counter"
+
+
+telemetry.register_collector(_collect_checkpointer_metrics)
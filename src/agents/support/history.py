@@ -0,0 +1,290 @@
+"""
+Ventana de historial con presupuesto de tokens y resumen acumulado.
+
+Cada nodo que envía el historial a un modelo pide su ventana con
+`window_for(nodo, state)`:
+- Lo ya plegado llega como un resumen (`history_summary` en el estado).
+- Lo posterior al resumen se envía literal: solo los turnos recientes que
+  quepan en el presupuesto del nodo (y sin pasar de su máximo de turnos)
+  si con eso no se pierde nada; si el presupuesto dejaría fuera mensajes
+  que el resumen aún no cubre, se envía todo lo no resumido. Ningún
+  mensaje queda fuera a la vez del resumen y de la ventana.
+
+El resumen lo actualiza el nodo `history` al final del turno (antes de
+terminar, así que ese turno incluye la llamada al modelo de resumen) cuando
+el historial sin resumir supera el umbral de plegado: el menor entre
+`HISTORY_SUMMARY_TRIGGER` y el presupuesto más grande de los nodos. Se
+pliegan los mensajes más antiguos (dejando `HISTORY_SUMMARY_KEEP` tokens
+literales, como mucho la mitad del umbral) en el resumen anterior. Nunca se
+resume desde cero. Así lo que se envía a cada nodo está acotado por el
+resumen más el umbral, aunque la conversación siga creciendo.
+
+Los presupuestos se configuran por nodo con variables de entorno:
+`HISTORY_BUDGET_<NODO>` (tokens) y `HISTORY_TURNS_<NODO>` (turnos, 0 = sin
+límite). `HISTORY_WINDOWING=0` envía el historial completo como antes.
+"""
+
+import os
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from langchain_core.messages.utils import count_tokens_approximately
+
+from agents.support import telemetry
+from agents.support.llm import get_chat_model
+from agents.support.state import State
+
+WINDOWING_ENABLED = os.getenv("HISTORY_WINDOWING", "1") not in ("0", "false", "no")
+# Tokens sin resumir a partir de los que se pliega el historial antiguo
+# (como mucho el presupuesto más grande, ver fold_threshold)
+SUMMARY_TRIGGER = int(os.getenv("HISTORY_SUMMARY_TRIGGER", "6000"))
+# Tokens recientes que quedan literales tras plegar (como mucho la mitad del umbral)
+SUMMARY_KEEP = int(os.getenv("HISTORY_SUMMARY_KEEP", "1500"))
+SUMMARY_MODEL = os.getenv("HISTORY_SUMMARY_MODEL", "openai:gpt-4o-mini")
+
+
+@dataclass(frozen=True)
+class HistoryBudget:
+    """Presupuesto de historial de un nodo."""
+    max_tokens: int
+    max_turns: int = 0  # 0 = sin límite de turnos
+
+
+# Presupuestos por defecto: el router solo necesita los últimos turnos
+DEFAULT_BUDGETS = {
+    "intent": HistoryBudget(800, 3),
+    "combined": HistoryBudget(1500, 4),
+    "extractor": HistoryBudget(1000),
+    "booking": HistoryBudget(2000),
+    "research": HistoryBudget(3000),
+}
+
+
+def get_budget(node: str) -> HistoryBudget:
+    """Presupuesto del nodo (por defecto, sobrescrito por variables de entorno)."""
+    default = DEFAULT_BUDGETS.get(node, HistoryBudget(SUMMARY_KEEP))
+    suffix = node.upper()
+    return HistoryBudget(
+        max_tokens=int(os.getenv(f"HISTORY_BUDGET_{suffix}", default.max_tokens)),
+        max_turns=int(os.getenv(f"HISTORY_TURNS_{suffix}", default.max_turns)),
+    )
+
+
+def fold_threshold() -> int:
+    """
+    Tokens sin resumir a partir de los que se pliega: el menor entre
+    `SUMMARY_TRIGGER` y el presupuesto más grande, para que lo no resumido
+    no crezca más allá de lo que algún nodo envía.
+    """
+    largest = max(get_budget(node).max_tokens for node in DEFAULT_BUDGETS)
+    return min(SUMMARY_TRIGGER, largest)
+
+
+def count_tokens(messages: Sequence[BaseMessage]) -> int:
+    """Tokens aproximados de una lista de mensajes (sin tokenizer, ~4 caracteres/token)."""
+    return count_tokens_approximately(messages) if messages else 0
+
+
+def split_turns(messages: Sequence[BaseMessage]) -> List[List[BaseMessage]]:
+    """
+    Agrupa los mensajes en turnos: cada turno empieza en un mensaje del
+    usuario, así las llamadas a herramientas y sus resultados nunca se separan.
+    """
+    turns: List[List[BaseMessage]] = []
+    for message in messages:
+        if isinstance(message, HumanMessage) or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+
+def recent_turns(messages: Sequence[BaseMessage], max_tokens: int, max_turns: int = 0) -> List[BaseMessage]:
+    """Turnos más recientes que caben en el presupuesto (al menos el último)."""
+    turns = split_turns(messages)
+    kept: List[List[BaseMessage]] = []
+    tokens = 0
+    for turn in reversed(turns):
+        turn_tokens = count_tokens(turn)
+        if kept and (tokens + turn_tokens > max_tokens or (max_turns and len(kept) >= max_turns)):
+            break
+        kept.append(turn)
+        tokens += turn_tokens
+    return [message for turn in reversed(kept) for message in turn]
+
+
+def summary_message(summary: str) -> SystemMessage:
+    return SystemMessage(content=f"Resumen de la conversación anterior:\n{summary}")
+
+
+# ====================================
+# Métricas
+# ====================================
+class HistoryMetrics:
+    """Tokens completos frente a tokens enviados, por nodo."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._nodes: Dict[str, Dict[str, int]] = {}
+        self._summaries = 0
+        self._summarized_messages = 0
+
+    def record(self, node: str, full_tokens: int, sent_tokens: int, unsummarized: bool = False) -> None:
+        with self._lock:
+            stats = self._nodes.setdefault(
+                node, {"calls": 0, "full_tokens": 0, "sent_tokens": 0, "unsummarized_windows": 0}
+            )
+            stats["calls"] += 1
+            stats["full_tokens"] += full_tokens
+            stats["sent_tokens"] += sent_tokens
+            # Ventanas que superaron el presupuesto para no perder mensajes sin resumir
+            stats["unsummarized_windows"] += unsummarized
+
+    def record_summary(self, messages: int) -> None:
+        with self._lock:
+            self._summaries += 1
+            self._summarized_messages += messages
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            nodes = {
+                node: {**stats, "saved_tokens": stats["full_tokens"] - stats["sent_tokens"]}
+                for node, stats in self._nodes.items()
+            }
+            return {
+                "nodes": nodes,
+                "saved_tokens": sum(stats["saved_tokens"] for stats in nodes.values()),
+                "summaries": self._summaries,
+                "summarized_messages": self._summarized_messages,
+            }
+
+
+_metrics = HistoryMetrics()
+
+
+def _collect_history_metrics():
+    for node, stats in _metrics.snapshot()["nodes"].items():
+        yield "support_history_saved_tokens_total", {"node": node}, stats["saved_tokens"], "counter"
+
+
+telemetry.register_collector(_collect_history_metrics)
+
+
+def get_history_metrics() -> Dict:
+    """Tokens ahorrados por nodo y resúmenes realizados."""
+    return _metrics.snapshot()
+
+
+# ====================================
+# Ventana por nodo
+# ====================================
+def window_for(node: str, state: State, messages: Optional[Sequence[BaseMessage]] = None) -> List[BaseMessage]:
+    """
+    Historial que el nodo debe enviar al modelo.
+
+    Args:
+        node: Nombre del nodo (clave del presupuesto)
+        state: Estado del grafo (de aquí salen el resumen y su marca)
+        messages: Mensajes a recortar, si no son `state["messages"]`
+            (p. ej. el tramo nuevo del extractor, que no lleva resumen)
+
+    Returns:
+        [resumen] + turnos recientes dentro del presupuesto, o [resumen] +
+        todo lo no resumido si el presupuesto dejaría fuera algo que el
+        resumen no cubre
+    """
+    history = list(state["messages"]) if messages is None else list(messages)
+    if not WINDOWING_ENABLED:
+        return history
+
+    budget = get_budget(node)
+    summary = state.get("history_summary") if messages is None else None
+    header = [summary_message(summary)] if summary else []
+    start = min(state.get("summarized_until") or 0, len(history)) if summary else 0
+    unsummarized = history[start:]
+    recent = recent_turns(unsummarized, budget.max_tokens - count_tokens(header), budget.max_turns)
+    # Lo que el presupuesto deja fuera debe estar en el resumen; si no, va literal
+    overflow = len(recent) < len(unsummarized)
+    window = header + (unsummarized if overflow else recent)
+
+    _metrics.record(node, count_tokens(history), count_tokens(window), overflow)
+    return window
+
+
+# ====================================
+# Resumen acumulado (nodo `history`)
+# ====================================
+SUMMARY_PROMPT = """\
+Mantienes el resumen de una conversación de atención al cliente.
+Actualiza el resumen anterior incorporando los mensajes nuevos. Conserva los
+datos que el asistente pueda necesitar después (datos de contacto, reservas,
+preferencias, preguntas pendientes, temas investigados y sus conclusiones).
+Responde solo con el resumen actualizado, en el idioma de la conversación.
+"""
+
+
+def _render(messages: Sequence[BaseMessage]) -> str:
+    return "\n".join(f"{message.type}: {message.text}" for message in messages if message.text)
+
+
+def _fold_request(state: State):
+    """
+    Mensajes a plegar y petición al modelo, o None si aún no toca resumir.
+
+    Returns:
+        (índice hasta el que llegará el resumen, nº de mensajes plegados,
+        mensajes para el modelo) o None
+    """
+    if not WINDOWING_ENABLED:
+        return None
+    history = state["messages"]
+    start = min(state.get("summarized_until") or 0, len(history))
+    unsummarized = history[start:]
+    threshold = fold_threshold()
+    if count_tokens(unsummarized) <= threshold:
+        return None
+
+    keep = recent_turns(unsummarized, min(SUMMARY_KEEP, threshold // 2))
+    folded = unsummarized[:len(unsummarized) - len(keep)]
+    if not folded:
+        return None
+
+    previous = state.get("history_summary") or "(sin resumen todavía)"
+    request = [
+        ("system", SUMMARY_PROMPT),
+        ("user", f"Resumen anterior:\n{previous}\n\nMensajes nuevos:\n{_render(folded)}"),
+    ]
+    return start + len(folded), len(folded), request
+
+
+def _folded(until: int, count: int, summary: str) -> State:
+    _metrics.record_summary(count)
+    telemetry.event("history_fold", messages=count)
+    return {"history_summary": summary, "summarized_until": until}
+
+
+def summarize_history(state: State) -> State:
+    """
+    Pliega los mensajes antiguos en `history_summary` si el historial sin
+    resumir supera el umbral. Se ejecuta al final del turno, después de la
+    respuesta pero antes de que termine el grafo: los turnos que pliegan
+    (uno cada `fold_threshold() - SUMMARY_KEEP` tokens, aprox.) tardan lo
+    que la llamada al modelo de resumen.
+    """
+    fold = _fold_request(state)
+    if fold is None:
+        return {}
+    until, count, request = fold
+    response = get_chat_model(SUMMARY_MODEL, temperature=0).invoke(request)
+    return _folded(until, count, response.text)
+
+
+async def asummarize_history(state: State) -> State:
+    """Versión asíncrona de `summarize_history`."""
+    fold = _fold_request(state)
+    if fold is None:
+        return {}
+    until, count, request = fold
+    response = await get_chat_model(SUMMARY_MODEL, temperature=0).ainvoke(request)
+    return _folded(until, count, response.text)
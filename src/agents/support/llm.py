@@ -0,0 +1,156 @@
+"""
+Construcción perezosa y compartida de los modelos de chat.
+
+Los nodos piden su modelo con `get_chat_model` la primera vez que lo usan,
+así importar el grafo no crea clientes HTTP ni importa los SDK de los
+proveedores.
+
+Los modelos deterministas (`temperature=0`) comparten la caché de
+respuestas de `llm_cache` (ver `should_cache`).
+
+Todos los modelos comparten además un limitador de peticiones (token
+bucket, `LLM_RATE_LIMIT_RPS` peticiones/s con ráfagas de hasta
+`LLM_RATE_LIMIT_BURST`): router, extractor, conversación, agentes y resumen
+tiran del mismo cubo, así que muchas sesiones concurrentes se reparten el
+límite de la API en lugar de provocar ráfagas de errores 429. Las
+respuestas servidas desde la caché no consumen cupo.
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from langchain.chat_models import init_chat_model
+from langchain_core.language_models import BaseChatModel
+from langchain_core.rate_limiters import InMemoryRateLimiter
+
+from agents.support import telemetry
+from agents.support.llm_cache import get_llm_cache, should_cache
+
+# Peticiones por segundo a los modelos (0 = sin límite)
+RATE_LIMIT_RPS = float(os.getenv("LLM_RATE_LIMIT_RPS", "0"))
+# Peticiones que se pueden hacer de golpe tras un rato sin llamadas (0 = las de un segundo)
+RATE_LIMIT_BURST = float(os.getenv("LLM_RATE_LIMIT_BURST", "0"))
+
+_models: Dict[Tuple, BaseChatModel] = {}
+_lock = threading.Lock()
+
+
+# ====================================
+# Limitador de peticiones compartido
+# ====================================
+class SharedRateLimiter(InMemoryRateLimiter):
+    """`InMemoryRateLimiter` que cuenta las peticiones y el tiempo de espera."""
+
+    def __init__(self, requests_per_second: float, max_bucket_size: float):
+        # Sondeo del cubo: como mucho la mitad del intervalo entre peticiones
+        super().__init__(
+            requests_per_second=requests_per_second,
+            check_every_n_seconds=min(0.1, 0.5 / requests_per_second),
+            max_bucket_size=max_bucket_size,
+        )
+        self._stats_lock = threading.Lock()
+        self.acquired = 0
+        self.wait_seconds = 0.0
+
+    def _record(self, waited: float) -> None:
+        with self._stats_lock:
+            self.acquired += 1
+            self.wait_seconds += waited
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        start = time.perf_counter()
+        acquired = super().acquire(blocking=blocking)
+        if acquired:
+            self._record(time.perf_counter() - start)
+        return acquired
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        start = time.perf_counter()
+        acquired = await super().aacquire(blocking=blocking)
+        if acquired:
+            self._record(time.perf_counter() - start)
+        return acquired
+
+    def stats(self) -> Dict:
+        """Peticiones que pasaron por el limitador y tiempo total de espera."""
+        with self._stats_lock:
+            return {
+                "requests_per_second": self.requests_per_second,
+                "acquired": self.acquired,
+                "wait_seconds": self.wait_seconds,
+            }
+
+
+_rate_limiter: Optional[SharedRateLimiter] = None
+
+
+def set_rate_limit(requests_per_second: float, burst: float = 0) -> Optional[SharedRateLimiter]:
+    """
+    Configura el limitador compartido por todos los modelos (también los ya creados).
+
+    Las copias con herramientas (`bind_tools`) se quedan con el limitador
+    que había al crearlas: llamar antes de construir el grafo.
+
+    Args:
+        requests_per_second: Peticiones por segundo (0 = sin límite)
+        burst: Tamaño del cubo (0 = las peticiones de un segundo)
+    """
+    global _rate_limiter
+    with _lock:
+        _rate_limiter = None
+        if requests_per_second > 0:
+            _rate_limiter = SharedRateLimiter(requests_per_second, burst or max(1.0, requests_per_second))
+        for llm in _models.values():
+            llm.rate_limiter = _rate_limiter
+    return _rate_limiter
+
+
+def get_rate_limit_stats() -> Dict:
+    """Peticiones que pasaron por el limitador y tiempo total de espera (vacío sin límite)."""
+    return _rate_limiter.stats() if _rate_limiter is not None else {}
+
+
+def _collect_rate_limit_metrics():
+    stats = get_rate_limit_stats()
+    if not stats:
+        return
+    yield "support_llm_rate_limited_requests_total", {}, stats["acquired"], "counter"
+    yield "support_llm_rate_limit_wait_seconds_total", {}, stats["wait_seconds"], "counter"
+
+
+telemetry.register_collector(_collect_rate_limit_metrics)
+
+
+def get_chat_model(model: str, *, cache: Optional[bool] = None, **kwargs: Any) -> BaseChatModel:
+    """
+    Obtiene (o crea la primera vez) un modelo de chat.
+
+    Los modelos se comparten entre nodos que piden la misma configuración.
+
+    Args:
+        model: Identificador "proveedor:modelo", p. ej. "openai:gpt-4o"
+        cache: Usar la caché de respuestas; None = solo si `temperature=0`
+        **kwargs: Parámetros para `init_chat_model` (temperature, ...)
+
+    Returns:
+        Modelo de chat listo para usar
+    """
+    key = (model, cache, tuple(sorted(kwargs.items())))
+    llm = _models.get(key)
+    if llm is None:
+        with _lock:
+            llm = _models.get(key)
+            if llm is None:
+                llm = init_chat_model(model, **kwargs)
+                if should_cache(cache, kwargs):
+                    llm.cache = get_llm_cache()
+                if _rate_limiter is not None:
+                    llm.rate_limiter = _rate_limiter
+                _models[key] = llm
+    return llm
+
+
+if RATE_LIMIT_RPS > 0:
+    set_rate_limit(RATE_LIMIT_RPS, RATE_LIMIT_BURST)
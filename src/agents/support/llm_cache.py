@@ -0,0 +1,299 @@
+"""
+Caché compartida de respuestas de los modelos de chat (SQLite en `datos/`).
+
+Se engancha a los modelos que crea `get_chat_model` (campo `cache` de
+LangChain), así que cubre las llamadas con salida estructurada del router,
+del extractor, del análisis combinado y del resumen de historial:
+- Clave: SHA-256 de la descripción del modelo que arma LangChain (modelo,
+  parámetros, herramientas y esquema de salida estructurada) más los
+  mensajes normalizados (sin ids ni metadatos, espacios colapsados).
+- Por defecto solo se cachean las llamadas deterministas (`temperature=0`);
+  los agentes de booking y research solo con `LLM_CACHE_AGENTS=1`.
+- Límite de tamaño (`LLM_CACHE_MB`, desaloja lo usado hace más tiempo) y
+  caducidad (`LLM_CACHE_TTL` segundos, 0 = sin caducidad).
+
+Las respuestas servidas desde la caché llevan
+`response_metadata["cache_hit"] = True` (la telemetría las cuenta en
+`support_llm_cache_hits_total`); los aciertos y fallos están en
+`get_llm_cache_stats()`.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+from pydantic import BaseModel
+
+from agents.support import telemetry
+
+ENABLED = os.getenv("LLM_CACHE", "1") not in ("0", "false", "no")
+# Cachear también los agentes (no deterministas): booking y research
+CACHE_AGENTS = os.getenv("LLM_CACHE_AGENTS", "0") in ("1", "true", "yes")
+MAX_BYTES = int(float(os.getenv("LLM_CACHE_MB", "64")) * 1024 * 1024)
+TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+CACHE_PATH = os.getenv("LLM_CACHE_PATH", "")
+
+# Campos de los mensajes que no cambian la respuesta (ids, metadatos, uso)
+_IGNORED_FIELDS = ("id", "response_metadata", "usage_metadata", "additional_kwargs", "tool_call_id")
+
+
+def _normalize_text(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def _normalize(value: Any) -> Any:
+    """Normaliza un mensaje serializado (o una parte) para la clave."""
+    if isinstance(value, str):
+        return _normalize_text(value)
+    if isinstance(value, list):
+        return [_normalize(item) for item in value]
+    if isinstance(value, dict):
+        if value.get("lc") == 1 and "kwargs" in value:
+            # Mensaje serializado por LangChain: solo su tipo y contenido
+            return _normalize(value["kwargs"])
+        return {
+            key: _normalize(item)
+            for key, item in sorted(value.items())
+            if key not in _IGNORED_FIELDS and item not in (None, [], {}, "")
+        }
+    return value
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Mensajes (serializados por LangChain) sin ids ni metadatos y con espacios normalizados."""
+    try:
+        messages = json.loads(prompt)
+    except ValueError:
+        return _normalize_text(prompt)
+    return json.dumps(_normalize(messages), sort_keys=True, ensure_ascii=False)
+
+
+def cache_key(prompt: str, llm_string: str) -> bytes:
+    """Clave de caché: SHA-256 de modelo/parámetros + mensajes normalizados."""
+    digest = hashlib.sha256()
+    digest.update(llm_string.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(normalize_prompt(prompt).encode("utf-8"))
+    return digest.digest()
+
+
+def _plain(value: Any) -> Any:
+    """Convierte modelos pydantic (p. ej. `additional_kwargs["parsed"]`) en dicts."""
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    return value
+
+
+def _serialize(generations: Sequence[Generation]) -> bytes:
+    rows = []
+    for generation in generations:
+        if isinstance(generation, ChatGeneration):
+            rows.append({"message": _plain(message_to_dict(generation.message)), "info": generation.generation_info})
+        else:
+            rows.append({"text": generation.text, "info": generation.generation_info})
+    return json.dumps(rows, ensure_ascii=False, default=str).encode("utf-8")
+
+
+def _deserialize(blob: bytes) -> List[Generation]:
+    """Generaciones guardadas, marcadas como acierto de caché."""
+    generations: List[Generation] = []
+    for row in json.loads(blob):
+        if "message" not in row:
+            generations.append(Generation(text=row["text"], generation_info=row["info"]))
+            continue
+        message = messages_from_dict([row["message"]])[0]
+        message.response_metadata = {**message.response_metadata, "cache_hit": True}
+        generations.append(ChatGeneration(message=message, generation_info=row["info"]))
+    return generations
+
+
+class SQLiteLLMCache(BaseCache):
+    """
+    Caché de respuestas de LLM en SQLite (modo WAL) con límite de tamaño y TTL.
+
+    Cuando el tamaño total supera `max_bytes`, se eliminan las entradas
+    usadas hace más tiempo hasta quedar por debajo del 90% del límite. Las
+    entradas más antiguas que `ttl_seconds` cuentan como fallo y se borran.
+    Las versiones asíncronas (`alookup`/`aupdate`) de `BaseCache` ejecutan
+    estas en un hilo.
+    """
+
+    def __init__(self, path: Path, max_bytes: int, ttl_seconds: float = 0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key BLOB PRIMARY KEY,"
+            " value BLOB NOT NULL,"
+            " nbytes INTEGER NOT NULL,"
+            " created REAL NOT NULL,"
+            " last_access REAL NOT NULL"
+            ") WITHOUT ROWID"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access)"
+        )
+        self._conn.commit()
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(nbytes), 0) FROM responses"
+        ).fetchone()[0]
+        self._counters = {"hits": 0, "misses": 0, "expired": 0, "writes": 0, "evictions": 0}
+
+    def _count(self, name: str, value: int = 1) -> None:
+        self._counters[name] += value
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = cache_key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, nbytes, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.ttl_seconds and now - row[2] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                self._total_bytes -= row[1]
+                self._count("expired")
+                row = None
+            if row is None:
+                self._count("misses")
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self._count("hits")
+        return _deserialize(row[0])
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key = cache_key(prompt, llm_string)
+        blob = _serialize(return_val)
+        now = time.time()
+        with self._lock:
+            previous = self._conn.execute(
+                "SELECT nbytes FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, nbytes, created, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, blob, len(blob), now, now),
+            )
+            self._total_bytes += len(blob) - (previous[0] if previous else 0)
+            self._count("writes")
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """Elimina las entradas menos usadas hasta quedar bajo el límite (con el lock tomado)."""
+        if self._total_bytes <= self.max_bytes:
+            return
+
+        target = int(self.max_bytes * 0.9)
+        cursor = self._conn.execute(
+            "SELECT key, nbytes FROM responses ORDER BY last_access ASC"
+        )
+        to_delete = []
+        freed = 0
+        for key, nbytes in cursor:
+            if self._total_bytes - freed <= target:
+                break
+            to_delete.append((key,))
+            freed += nbytes
+
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", to_delete)
+        self._total_bytes -= freed
+        self._count("evictions", len(to_delete))
+
+    def clear(self, **kwargs: Any) -> None:
+        """Elimina todas las respuestas almacenadas."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+            self._total_bytes = 0
+
+    def stats(self) -> Dict:
+        """Aciertos, fallos, caducadas, escrituras, desalojos y tamaño."""
+        with self._lock:
+            counters = dict(self._counters)
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        lookups = counters["hits"] + counters["misses"]
+        counters.update({
+            "hit_rate": counters["hits"] / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+        })
+        return counters
+
+
+# ====================================
+# Instancia compartida
+# ====================================
+_cache: Optional[SQLiteLLMCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> SQLiteLLMCache:
+    """Obtiene (o crea la primera vez) la caché compartida en `datos/llm_cache.sqlite3`."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                if CACHE_PATH:
+                    path = Path(CACHE_PATH)
+                else:
+                    from agents.support.nodes.research.config import get_datos_dir
+
+                    path = get_datos_dir() / "llm_cache.sqlite3"
+                _cache = SQLiteLLMCache(path, max_bytes=MAX_BYTES, ttl_seconds=TTL_SECONDS)
+    return _cache
+
+
+def should_cache(cache: Optional[bool], model_kwargs: Dict[str, Any]) -> bool:
+    """
+    Decide si un modelo usa la caché.
+
+    Args:
+        cache: True/False para forzarlo, None para la regla por defecto
+            (solo llamadas deterministas, `temperature=0`)
+        model_kwargs: Parámetros con los que se crea el modelo
+    """
+    if not ENABLED:
+        return False
+    if cache is not None:
+        return cache
+    return model_kwargs.get("temperature") == 0
+
+
+def get_llm_cache_stats() -> Dict:
+    """Estadísticas de la caché (vacío si aún no se ha usado)."""
+    return _cache.stats() if _cache is not None else {}
+
+
+def _collect_llm_cache_metrics():
+    if _cache is None:
+        return
+    stats = _cache.stats()
+    for result in ("hits", "misses", "expired"):
+        yield "support_cache_requests_total", {"cache": "llm", "result": result}, stats[result], "counter"
+    yield "support_llm_cache_bytes", {}, stats["bytes"], "gauge"
+
+
+telemetry.register_collector(_collect_llm_cache_metrics)
@@ -1,11 +1,32 @@
 from langchain.agents import create_agent
+from langchain_core.runnables import RunnableConfig
 
+from agents.support.state import State
+from agents.support.history import window_for
+from agents.support.llm import get_chat_model
+from agents.support.llm_cache import CACHE_AGENTS
 from agents.support.nodes.booking.tools import tools
 from agents.support.nodes.booking.prompt import prompt_template
 
-booking_node = create_agent(
-    model="openai:gpt-4o-mini",
-    tools=tools,
-    system_prompt=prompt_template.format(),
-    checkpointer=False,
-)
\ No newline at end of file
+_booking_agent = None
+
+def get_booking_agent():
+    global _booking_agent
+    if _booking_agent is None:
+        _booking_agent = create_agent(
+            model=get_chat_model("openai:gpt-4o-mini", cache=CACHE_AGENTS),
+            tools=tools,
+            system_prompt=prompt_template.format(),
+            checkpointer=False,
+        )
+    return _booking_agent
+
+def booking_node(state: State, config: RunnableConfig):
+    window = window_for("booking", state)
+    result = get_booking_agent().invoke({**state, "messages": window}, config)
+    return {"messages": result["messages"][len(window):]}
+
+async def abooking_node(state: State, config: RunnableConfig):
+    window = window_for("booking", state)
+    result = await get_booking_agent().ainvoke({**state, "messages": window}, config)
+    return {"messages": result["messages"][len(window):]}
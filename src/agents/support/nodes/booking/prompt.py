@@ -1,6 +1,8 @@
 from langchain_core.prompts import PromptTemplate
 from datetime import date
 
+from agents.support.nodes.booking.slots import SLOT_MINUTES, WINDOW_DAYS
+
 template = """\
 You are a helpful assistant that can book a medical appointment.
 
@@ -16,12 +18,18 @@ Steps:
 
 You have the following tools available:
 - book_appointment: Book a medical appointment for a given date, time, doctor and patient
-- get_appointment_availability: Get the availability of a medical appointment.
+- get_appointment_availability: Get the free slots of a doctor for a date (and whether a time is free).
+
+Dates use the format YYYY-MM-DD and times HH:MM; appointments start every {slot_minutes} minutes.
 
 Rules:
 - Before to use book_appointment, you must check the availability of the appointment with get_appointment_availability.
-- You can only book an appointment for the next 30 days
+- You can only book an appointment for the next {window_days} days
+- If the slot is taken when booking, offer the user the free slots returned by the tool
 """
 
 today = date.today().strftime("%Y-%m-%d")
-prompt_template = PromptTemplate.from_template(template, partial_variables={"today": today})
\ No newline at end of file
+prompt_template = PromptTemplate.from_template(
+    template,
+    partial_variables={"today": today, "slot_minutes": SLOT_MINUTES, "window_days": WINDOW_DAYS},
+)
\ No newline at end of file
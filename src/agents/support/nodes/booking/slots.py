@@ -0,0 +1,310 @@
+"""
+Motor de disponibilidad y reservas de citas (SQLite en modo WAL).
+
+Cada doctor tiene, por día, un bitmap de huecos ocupados (un bit por hueco
+de `SLOT_MINUTES` minutos) con un número de versión. El horario de consulta
+es otro bitmap por día de la semana, así que:
+- Los huecos libres de un día son `horario & ~ocupados` (sin recorrer las
+  citas), y los de toda la ventana de `WINDOW_DAYS` días salen de una sola
+  consulta por rango sobre la clave (doctor, día).
+- Reservar es concurrencia optimista: se lee el bitmap y su versión, y se
+  escribe el bit solo si la versión no ha cambiado
+  (`UPDATE ... WHERE version = ?`); si otra sesión (o proceso) reservó
+  antes, se vuelve a leer. La tabla de citas tiene además una restricción
+  UNIQUE (doctor, día, hueco) como segunda barrera contra dobles reservas.
+
+Cada hilo usa su propia conexión, de modo que las lecturas no se esperan
+entre sí y las reservas concurrentes pasan por la comprobación de versión.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from agents.support import telemetry
+
+SLOT_MINUTES = int(os.getenv("BOOKING_SLOT_MINUTES", "30"))
+# Días reservables a partir de hoy (ventana móvil)
+WINDOW_DAYS = int(os.getenv("BOOKING_WINDOW_DAYS", "30"))
+# Reintentos de una reserva que pierde la carrera de versiones
+MAX_RETRIES = 20
+
+# Horario de consulta por día de la semana (0 = lunes)
+WEEKLY_HOURS = {
+    0: ("10:00", "15:00"),
+    2: ("10:00", "15:00"),
+    3: ("10:00", "15:00"),
+    4: ("10:00", "12:00"),
+}
+
+_TIME_RE = re.compile(r"^\s*(\d{1,2})(?:\s*[:.h]\s*(\d{2}))?\s*(am|pm)?\s*$", re.IGNORECASE)
+_TITLES = {"dr", "dra", "doctor", "doctora"}
+
+
+# ====================================
+# Huecos y bitmaps
+# ====================================
+def parse_time(text: str) -> int:
+    """
+    Índice del hueco que empieza a la hora `text` ("10:30", "10", "3pm").
+
+    Los mensajes de error van en inglés: llegan tal cual al agente de citas.
+    """
+    match = _TIME_RE.match(text or "")
+    if not match:
+        raise ValueError(f"Invalid time {text!r}: use the format HH:MM")
+    hour, minute = int(match.group(1)), int(match.group(2) or 0)
+    suffix = (match.group(3) or "").lower()
+    if suffix == "pm" and hour < 12:
+        hour += 12
+    elif suffix == "am" and hour == 12:
+        hour = 0
+    if hour > 23 or minute > 59 or minute % SLOT_MINUTES:
+        raise ValueError(f"Invalid time {text!r}: appointments start every {SLOT_MINUTES} minutes")
+    return (hour * 60 + minute) // SLOT_MINUTES
+
+
+def slot_time(slot: int) -> str:
+    minutes = slot * SLOT_MINUTES
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _hours_mask(start: str, end: str) -> int:
+    first, last = parse_time(start), parse_time(end)
+    return ((1 << (last - first)) - 1) << first
+
+
+_WEEKDAY_MASKS = {weekday: _hours_mask(*hours) for weekday, hours in WEEKLY_HOURS.items()}
+
+
+def working_mask(day: date) -> int:
+    """Huecos de consulta del día (bitmap)."""
+    return _WEEKDAY_MASKS.get(day.weekday(), 0)
+
+
+def iter_slots(mask: int) -> Iterator[int]:
+    """Índices de los bits a 1, en orden (coste proporcional a los huecos)."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def normalize_doctor(name: str) -> str:
+    """Clave del doctor: sin tildes, mayúsculas, títulos ni signos ("Dra. Pérez" → "perez")."""
+    plain = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode().lower()
+    words = [word for word in re.findall(r"[a-z0-9]+", plain) if word not in _TITLES]
+    return " ".join(words)
+
+
+@dataclass(frozen=True)
+class BookingResult:
+    """Resultado de una reserva."""
+    ok: bool
+    appointment_id: Optional[int] = None
+    reason: Optional[str] = None  # "taken", "closed", "past" o "out_of_window"
+    retries: int = 0
+
+
+class SlotStore:
+    """
+    Bitmaps de huecos ocupados por doctor y día, y citas.
+
+    Tablas:
+        days: (doctor, día) → bitmap de huecos ocupados y versión
+        appointments: citas (UNIQUE doctor, día, hueco)
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._local = threading.local()
+        self._counters_lock = threading.Lock()
+        self._counters = {"bookings": 0, "conflicts": 0, "retries": 0}
+        conn = self._conn()
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS days (
+                doctor TEXT NOT NULL,
+                day TEXT NOT NULL,
+                booked INTEGER NOT NULL DEFAULT 0,
+                version INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (doctor, day)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS appointments (
+                id INTEGER PRIMARY KEY,
+                doctor TEXT NOT NULL,
+                doctor_name TEXT NOT NULL,
+                day TEXT NOT NULL,
+                slot INTEGER NOT NULL,
+                patient TEXT NOT NULL,
+                created REAL NOT NULL,
+                UNIQUE (doctor, day, slot)
+            );
+            """
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        """Conexión del hilo actual."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, **increments: int) -> None:
+        with self._counters_lock:
+            for name, value in increments.items():
+                self._counters[name] += value
+
+    # ====================================
+    # Disponibilidad
+    # ====================================
+    @staticmethod
+    def _bookable_mask(day: date, now: datetime) -> int:
+        """Horario del día sin los huecos que ya empezaron (hoy) ni fuera de la ventana."""
+        today = now.date()
+        if day < today or day > today + timedelta(days=WINDOW_DAYS):
+            return 0
+        mask = working_mask(day)
+        if day == today:
+            started = (now.hour * 60 + now.minute) // SLOT_MINUTES + 1
+            mask &= ~((1 << started) - 1)
+        return mask
+
+    def free_mask(self, doctor: str, start: date, end: date, now: Optional[datetime] = None) -> Dict[date, int]:
+        """
+        Huecos libres de un doctor entre `start` y `end` (incluidos), como bitmaps.
+
+        Una consulta por rango sobre (doctor, día): no se recorren las citas.
+        """
+        now = now or datetime.now()
+        rows = self._conn().execute(
+            "SELECT day, booked FROM days WHERE doctor = ? AND day BETWEEN ? AND ?",
+            (normalize_doctor(doctor), start.isoformat(), end.isoformat()),
+        ).fetchall()
+        booked = {day: mask for day, mask in rows}
+        free = {}
+        day = start
+        while day <= end:
+            free[day] = self._bookable_mask(day, now) & ~booked.get(day.isoformat(), 0)
+            day += timedelta(days=1)
+        return free
+
+    def free_slots(self, doctor: str, day: date, now: Optional[datetime] = None) -> List[int]:
+        """Huecos libres de un día, en orden."""
+        return list(iter_slots(self.free_mask(doctor, day, day, now)[day]))
+
+    def window(self, doctor: str, now: Optional[datetime] = None) -> Dict[date, List[int]]:
+        """Huecos libres de toda la ventana reservable (solo días con hueco)."""
+        now = now or datetime.now()
+        today = now.date()
+        free = self.free_mask(doctor, today, today + timedelta(days=WINDOW_DAYS), now)
+        return {day: list(iter_slots(mask)) for day, mask in free.items() if mask}
+
+    # ====================================
+    # Reservas
+    # ====================================
+    def book(self, doctor: str, day: date, slot: int, patient: str, now: Optional[datetime] = None) -> BookingResult:
+        """
+        Reserva un hueco de forma atómica (concurrencia optimista).
+
+        Returns:
+            `BookingResult` con el id de la cita, o el motivo del rechazo
+        """
+        now = now or datetime.now()
+        bit = 1 << slot
+        if not working_mask(day) & bit:
+            return BookingResult(False, reason="closed")
+        if not self._bookable_mask(day, now) & bit:
+            return BookingResult(False, reason="past" if day <= now.date() else "out_of_window")
+
+        key = (normalize_doctor(doctor), day.isoformat())
+        conn = self._conn()
+        conn.execute("INSERT OR IGNORE INTO days (doctor, day) VALUES (?, ?)", key)
+        for attempt in range(MAX_RETRIES):
+            booked, version = conn.execute(
+                "SELECT booked, version FROM days WHERE doctor = ? AND day = ?", key
+            ).fetchone()
+            if booked & bit:
+                self._count(conflicts=1, retries=attempt)
+                return BookingResult(False, reason="taken", retries=attempt)
+
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                updated = conn.execute(
+                    "UPDATE days SET booked = ?, version = version + 1 "
+                    "WHERE doctor = ? AND day = ? AND version = ?",
+                    (booked | bit, *key, version),
+                ).rowcount
+                if not updated:
+                    # Otra reserva cambió el día entre la lectura y la escritura
+                    conn.execute("ROLLBACK")
+                    continue
+                cursor = conn.execute(
+                    "INSERT INTO appointments (doctor, doctor_name, day, slot, patient, created) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key[0], doctor, key[1], slot, patient, time.time()),
+                )
+                conn.execute("COMMIT")
+            except sqlite3.IntegrityError:
+                conn.execute("ROLLBACK")
+                self._count(conflicts=1, retries=attempt)
+                return BookingResult(False, reason="taken", retries=attempt)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            self._count(bookings=1, retries=attempt)
+            return BookingResult(True, appointment_id=cursor.lastrowid, retries=attempt)
+
+        self._count(conflicts=1, retries=MAX_RETRIES)
+        return BookingResult(False, reason="taken", retries=MAX_RETRIES)
+
+    def stats(self) -> Dict:
+        """Reservas hechas, rechazadas por conflicto y reintentos optimistas."""
+        with self._counters_lock:
+            return dict(self._counters)
+
+
+# ====================================
+# Instancia compartida
+# ====================================
+_store: Optional[SlotStore] = None
+_store_lock = threading.Lock()
+
+
+def get_slot_store() -> SlotStore:
+    """Obtiene (o crea la primera vez) el motor de reservas en `datos/booking.sqlite3`."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                from agents.support.nodes.research.config import get_datos_dir
+
+                _store = SlotStore(get_datos_dir() / "booking.sqlite3")
+    return _store
+
+
+def get_booking_stats() -> Dict:
+    """Estadísticas de reservas (vacío si aún no se ha usado)."""
+    return _store.stats() if _store is not None else {}
+
+
+def _collect_booking_metrics():
+    if _store is None:
+        return
+    stats = _store.stats()
+    yield "support_bookings_total", {"result": "booked"}, stats["bookings"], "counter"
+    yield "support_bookings_total", {"result": "conflict"}, stats["conflicts"], "counter"
+    yield "support_booking_retries_total", {}, stats["retries"], "counter"
+
+
+telemetry.register_collector(_collect_booking_metrics)
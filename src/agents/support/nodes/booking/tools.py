@@ -1,20 +1,88 @@
+from datetime import date as Date, datetime, timedelta
+
 from langchain_core.tools import tool
 
-@tool("book_appointment", description="book a medical appointment for a given date, time, doctor and patient")
+from agents.support.nodes.booking.slots import WINDOW_DAYS, get_slot_store, parse_time, slot_time
+
+# Días con hueco que se sugieren cuando el pedido no está libre
+_SUGGESTED_DAYS = 5
+
+
+def _parse_date(value: str) -> Date:
+    try:
+        return Date.fromisoformat(value.strip())
+    except ValueError:
+        raise ValueError(f"Invalid date {value!r}: use the format YYYY-MM-DD") from None
+
+
+def _format_slots(slots) -> str:
+    return ", ".join(slot_time(slot) for slot in slots)
+
+
+def _next_days(doctor: str, after: Date) -> str:
+    """Próximos días de la ventana con huecos libres, con el primero y el total."""
+    lines = []
+    for day, slots in get_slot_store().window(doctor).items():
+        if day > after:
+            lines.append(f"- {day.isoformat()} ({day:%A}): {len(slots)} free slots from {slot_time(slots[0])}")
+        if len(lines) == _SUGGESTED_DAYS:
+            break
+    if not lines:
+        return f"{doctor} has no free slots in the next {WINDOW_DAYS} days."
+    return "Next days with free slots:\n" + "\n".join(lines)
+
+
+@tool(
+    "get_appointment_availability",
+    description=(
+        "get the free appointment slots of a doctor for a given date (YYYY-MM-DD), "
+        "and whether a given time (HH:MM, optional) is free"
+    ),
+)
+def get_appointment_availability(date: str, doctor: str, time: str = "") -> str:
+    try:
+        day = _parse_date(date)
+        slot = parse_time(time) if time else None
+    except ValueError as error:
+        return str(error)
+    today = datetime.now().date()
+    if day < today or day > today + timedelta(days=WINDOW_DAYS):
+        window = f"{day.isoformat()} is outside the booking window (the next {WINDOW_DAYS} days from {today.isoformat()})."
+        return window + "\n" + _next_days(doctor, today - timedelta(days=1))
+
+    free = get_slot_store().free_slots(doctor, day)
+    lines = []
+    if slot is not None:
+        status = "available" if slot in free else "not available"
+        lines.append(f"{slot_time(slot)} on {day.isoformat()} with {doctor} is {status}.")
+    if free:
+        lines.append(f"Free slots with {doctor} on {day.isoformat()} ({day:%A}): {_format_slots(free)}")
+    else:
+        lines.append(f"{doctor} has no free slots on {day.isoformat()} ({day:%A}).")
+    if not free or (slot is not None and slot not in free):
+        lines.append(_next_days(doctor, day))
+    return "\n".join(lines)
+
+
+@tool("book_appointment", description="book a medical appointment for a given date (YYYY-MM-DD), time (HH:MM), doctor and patient")
 def book_appointment(date: str, time: str, doctor: str, patient: str) -> str:
-    ## TODO: Implement the booking logic
-    return f"Appointment booked for {date} at {time} with {doctor} for {patient}!"
-
-@tool("get_appointment_availability", description="get the availability of a medical appointment for a given date, time and doctor")
-def get_appointment_availability(date: str, time: str, doctor: str) -> str:
-    ## TODO: Implement the availability logic
-    return f"""
-    The availability slots for the {doctor} are:
-    - Monday: 10:00-15:00
-    - Wednesday: 10:00-15:00
-    - Thursday: 10:00-15:00
-    - Friday: 10:00-12:00
-    """
-
-
-tools = [book_appointment, get_appointment_availability]
\ No newline at end of file
+    try:
+        day, slot = _parse_date(date), parse_time(time)
+    except ValueError as error:
+        return str(error)
+    result = get_slot_store().book(doctor, day, slot, patient)
+    when = f"{day.isoformat()} at {slot_time(slot)}"
+    if result.ok:
+        return f"Appointment #{result.appointment_id} booked for {when} with {doctor} for {patient}!"
+    if result.reason == "out_of_window":
+        return f"Could not book {when}: appointments can only be booked for the next {WINDOW_DAYS} days."
+    if result.reason == "past":
+        return f"Could not book {when}: that time has already passed."
+
+    reason = "the doctor does not see patients at that time" if result.reason == "closed" else "the slot is already taken"
+    free = get_slot_store().free_slots(doctor, day)
+    alternatives = f"Free slots that day: {_format_slots(free)}" if free else _next_days(doctor, day)
+    return f"Could not book {when} with {doctor}: {reason}.\n{alternatives}"
+
+
+tools = [book_appointment, get_appointment_availability]
@@ -1,21 +1,50 @@
 from agents.support.state import State
-from langchain.chat_models import init_chat_model
+from agents.support.llm import get_chat_model
 from agents.support.nodes.conversation.tools import tools
 from agents.support.nodes.conversation.prompt import prompt_template
+from agents.support.streaming import TokenClock
 from langchain_core.messages import AIMessage
 
-llm = init_chat_model("openai:gpt-4o", temperature=1)
-llm = llm.bind_tools(tools)
+_llm = None
 
-def conversation(state: State):
-    new_state: State = {}
-    history = state["messages"]
-    last_message = history[-1]
+def get_llm():
+    global _llm
+    if _llm is None:
+        _llm = get_chat_model("openai:gpt-4o", temperature=1).bind_tools(tools)
+    return _llm
+
+def _prompt_messages(state: State):
+    last_message = state["messages"][-1]
     customer_name = state.get("customer_name", None)
     prompt = prompt_template.format(name=customer_name)
-    print('*'*100)
-    print(last_message.text)
-    ai_message = llm.invoke([("system", prompt), ("user", last_message.text)])
-    ai_message = AIMessage(content=ai_message.text)
-    new_state["messages"] = [ai_message]
-    return new_state
\ No newline at end of file
+    return [("system", prompt), ("user", last_message.text)]
+
+def _final_message(message) -> AIMessage:
+    # Sin fragmentos (el modelo no devolvió nada): respuesta vacía
+    if message is None:
+        return AIMessage(content="")
+    # Mismo id que los fragmentos ya emitidos: stream_mode="messages" no
+    # vuelve a enviar la respuesta completa al terminar el nodo
+    return AIMessage(content=message.text, id=message.id)
+
+def conversation(state: State):
+    new_state: State = {}
+    clock = TokenClock("conversation")
+    ai_message = None
+    for chunk in get_llm().stream(_prompt_messages(state)):
+        clock.chunk(chunk)
+        ai_message = chunk if ai_message is None else ai_message + chunk
+    clock.done()
+    new_state["messages"] = [_final_message(ai_message)]
+    return new_state
+
+async def aconversation(state: State):
+    new_state: State = {}
+    clock = TokenClock("conversation")
+    ai_message = None
+    async for chunk in get_llm().astream(_prompt_messages(state)):
+        clock.chunk(chunk)
+        ai_message = chunk if ai_message is None else ai_message + chunk
+    clock.done()
+    new_state["messages"] = [_final_message(ai_message)]
+    return new_state
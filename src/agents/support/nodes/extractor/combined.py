@@ -0,0 +1,139 @@
+"""
+Extracción de contacto y enrutado en una sola llamada al modelo.
+
+En el modo combinado (`SUPPORT_ROUTING_MODE=combined`) el nodo `extractor`
+pide al modelo un único esquema con los datos de contacto y el siguiente
+paso, en lugar de dos llamadas seguidas con el mismo historial. Las
+actualizaciones de estado y el destino son los mismos que en el modo de
+dos llamadas:
+- Si la pasada local del extractor incremental basta: se aplican los datos
+  del regex y solo se enruta con `intent_route` (incluida su ruta rápida)
+- Si el tramo nuevo necesita el LLM, primero se prueban las etapas locales
+  del router (reglas + centroides): si deciden, solo se llama al extractor
+- Si no: una llamada combinada. El modelo ve los últimos turnos y el
+  resumen para enrutar, pero extrae solo del tramo nuevo (tras la marca
+  `NEW_MESSAGES_MARKER`), igual que el extractor incremental; así un valor
+  antiguo del historial no sustituye al que el regex acaba de encontrar
+"""
+
+import time
+from typing import List, Literal
+
+from langchain_core.messages import BaseMessage, SystemMessage
+from langgraph.types import Command
+from pydantic import Field
+
+from agents.support.history import window_for
+from agents.support.llm import get_chat_model
+from agents.support.nodes.extractor.node import (
+    ContactInfo,
+    LocalPass,
+    aextract_with_llm,
+    extract_with_llm,
+    llm_window,
+    local_pass,
+    merge_llm_updates,
+    record_extraction,
+)
+from agents.support.nodes.extractor.prompt import template as extractor_template
+from agents.support.routes.intent.prompt import SYSTEM_PROMPT as ROUTE_PROMPT
+from agents.support.routes.intent.route import (
+    aintent_route,
+    alocal_route,
+    intent_route,
+    local_route,
+    record_llm_route,
+)
+from agents.support.state import State
+
+Step = Literal["conversation", "booking", "research"]
+
+
+class TurnAnalysis(ContactInfo):
+    """Contact information for a person and the next step of the conversation."""
+    step: Step = Field(
+        'conversation',
+        description="The next step in the routing process: conversation, booking, or research"
+    )
+
+
+NEW_MESSAGES_MARKER = "NEW MESSAGES"
+
+SYSTEM_PROMPT = f"""\
+You have two tasks for the latest turn of the conversation.
+
+## Task 1: contact details
+{extractor_template}
+Extract ONLY from the messages after the system message "{NEW_MESSAGES_MARKER}".
+Earlier messages are context for Task 2: do not extract contact details from them.
+
+## Task 2: next step
+{ROUTE_PROMPT}"""
+
+_llm = None
+
+def get_llm():
+    global _llm
+    if _llm is None:
+        _llm = get_chat_model("openai:gpt-4o", temperature=0).with_structured_output(schema=TurnAnalysis)
+    return _llm
+
+def _request(state: State, local: LocalPass):
+    """
+    Petición combinada: contexto para enrutar, la marca y el tramo nuevo.
+
+    Returns:
+        (mensajes para el modelo, nº de mensajes del tramo nuevo)
+    """
+    new_messages = llm_window(state, local)
+    new_ids = {id(message) for message in new_messages}
+    # El contexto del router sin el tramo nuevo, que va detrás de la marca
+    context: List[BaseMessage] = [
+        message for message in window_for("combined", state) if id(message) not in new_ids
+    ]
+    request = (
+        [("system", SYSTEM_PROMPT)]
+        + context
+        + [SystemMessage(content=NEW_MESSAGES_MARKER)]
+        + new_messages
+    )
+    return request, len(new_messages)
+
+def _combined(local: LocalPass, schema: TurnAnalysis, sent: int, start: float) -> Command[Step]:
+    step = schema.step or 'conversation'
+    record_extraction(local, sent)
+    record_llm_route(step, start, stage="combined")
+    return Command(goto=step, update=merge_llm_updates(local, schema))
+
+def extract_and_route(state: State) -> Command[Step]:
+    """Extrae los datos de contacto y decide el siguiente nodo."""
+    local = local_pass(state)
+    if not local.needs_llm:
+        record_extraction(local)
+        return Command(goto=intent_route(state), update=local.updates)
+
+    # Si el router decide en local, basta con la llamada del extractor
+    start = time.perf_counter()
+    step = local_route(state, start)
+    if step is not None:
+        return Command(goto=step, update=extract_with_llm(state, local))
+
+    request, sent = _request(state, local)
+    schema = get_llm().invoke(request)
+    return _combined(local, schema, sent, start)
+
+async def aextract_and_route(state: State) -> Command[Step]:
+    """Versión asíncrona de `extract_and_route`."""
+    local = local_pass(state)
+    if not local.needs_llm:
+        record_extraction(local)
+        return Command(goto=await aintent_route(state), update=local.updates)
+
+    start = time.perf_counter()
+    step = await alocal_route(state, start)
+    if step is not None:
+        return Command(goto=step, update=await aextract_with_llm(state, local))
+
+    request, sent = _request(state, local)
+    schema = await get_llm().ainvoke(request)
+    return _combined(local, schema, sent, start)
@@ -1,8 +1,27 @@
-from langchain.chat_models import init_chat_model
+"""
+Extracción incremental de datos de contacto.
+
+Cada turno solo se procesan los mensajes nuevos desde la marca
+`extracted_until` (guardada en el estado del hilo):
+1. Pasada local (regex) para email, teléfono y edad: sin LLM
+2. LLM solo sobre el tramo nuevo, y solo si plausiblemente contiene datos
+   de contacto (pistas de nombre, datos encontrados sin nombre conocido o
+   cifras que podrían ser el teléfono); si se llama, su valor prevalece
+
+El coste por turno es constante: no crece con la longitud de la conversación.
+"""
+
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
 from pydantic import BaseModel, Field
-from typing import Optional
 
 from agents.support.state import State
+from agents.support.history import window_for
+from agents.support.llm import get_chat_model
+from agents.support.nodes.extractor.prefilter import scan
 from agents.support.nodes.extractor.prompt import prompt_template
 
 class ContactInfo(BaseModel):
@@ -12,28 +31,153 @@ class ContactInfo(BaseModel):
     phone: Optional[str] = Field(default=None, description="The phone number of the person, or null if not provided explicitly")
     age: Optional[str] = Field(default=None, description="The age of the person, or null if not provided explicitly")
 
-llm = init_chat_model("openai:gpt-4o", temperature=0)
-llm = llm.with_structured_output(schema=ContactInfo)
- 
+_llm = None
 
-def extractor(state: State):
-    history = state["messages"]
-    customer_name = state.get("customer_name", None)
+def get_llm():
+    global _llm
+    if _llm is None:
+        _llm = get_chat_model("openai:gpt-4o", temperature=0).with_structured_output(schema=ContactInfo)
+    return _llm
+
+def _is_present(value: Optional[str]) -> bool:
+    if value is None:
+        return False
+    normalized = value.strip().lower()
+    return normalized not in ("", "none", "null", "n/a", "na", "unknown")
+
+def contact_updates(schema: ContactInfo) -> State:
+    """Actualizaciones de estado a partir de los datos extraídos."""
     new_state: State = {}
-    if customer_name is None:
-        prompt = prompt_template.format()
-        schema = llm.invoke([("system", prompt)] + history)
-        # Solo establecer valores cuando el modelo haya devuelto contenido explícito.
-        def _is_present(value: Optional[str]) -> bool:
-            if value is None:
-                return False
-            normalized = value.strip().lower()
-            return normalized not in ("", "none", "null", "n/a", "na", "unknown")
-
-        if _is_present(schema.name):
-            new_state["customer_name"] = schema.name  # type: ignore[assignment]
-        if _is_present(schema.phone):
-            new_state["phone"] = schema.phone  # type: ignore[assignment]
-        if _is_present(schema.age):
-            new_state["my_age"] = schema.age  # type: ignore[assignment]
-    return new_state
\ No newline at end of file
+    # Solo establecer valores cuando el modelo haya devuelto contenido explícito.
+    if _is_present(schema.name):
+        new_state["customer_name"] = schema.name  # type: ignore[assignment]
+    if _is_present(schema.email):
+        new_state["email"] = schema.email  # type: ignore[assignment]
+    if _is_present(schema.phone):
+        new_state["phone"] = schema.phone  # type: ignore[assignment]
+    if _is_present(schema.age):
+        new_state["my_age"] = schema.age  # type: ignore[assignment]
+    return new_state
+
+# ====================================
+# Tramo nuevo y pasada local
+# ====================================
+@dataclass
+class LocalPass:
+    """Resultado de procesar el tramo nuevo sin LLM."""
+    updates: State                  # Datos encontrados por regex + nueva marca
+    new_messages: List[BaseMessage]  # Mensajes desde la marca anterior
+    needs_llm: bool                 # El tramo plausiblemente contiene datos que solo el LLM extrae
+
+
+def local_pass(state: State) -> LocalPass:
+    """Aplica la pasada local a los mensajes nuevos desde `extracted_until`."""
+    history = state["messages"]
+    start = min(state.get("extracted_until") or 0, len(history))
+    new_messages = history[start:]
+    updates: State = {"extracted_until": len(history)}  # type: ignore[typeddict-item]
+
+    user_texts = [message.text for message in new_messages if isinstance(message, HumanMessage)]
+    if not user_texts:
+        return LocalPass(updates, new_messages, False)
+
+    # Último mensaje del asistente (p. ej. "¿cuál es tu nombre?")
+    previous_ai = next(
+        (message.text for message in reversed(history) if isinstance(message, AIMessage)),
+        None,
+    )
+
+    local = scan(user_texts, previous_ai)
+    updates.update(local.found)  # type: ignore[typeddict-item]
+    needs_llm = (
+        local.name_cue
+        or (state.get("customer_name") is None and bool(local.found))
+        # Cifra sin pista: que el LLM decida si es el teléfono
+        or (local.maybe_phone and state.get("phone") is None)
+    )
+    return LocalPass(updates, new_messages, needs_llm)
+
+
+def merge_llm_updates(local: LocalPass, schema: ContactInfo) -> State:
+    """El LLM, que ve el contexto, prevalece; el regex aporta lo que el LLM no devolvió."""
+    updates = dict(local.updates)
+    updates.update(contact_updates(schema))
+    return updates  # type: ignore[return-value]
+
+
+# ====================================
+# Métricas
+# ====================================
+class ExtractorMetrics:
+    """Contadores del extractor (llamadas al LLM evitadas y mensajes enviados)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {"turns": 0, "llm_calls": 0, "local_fields": 0, "llm_messages": 0}
+
+    def record(self, local: LocalPass, llm_messages: int) -> None:
+        with self._lock:
+            self._counts["turns"] += 1
+            self._counts["llm_calls"] += int(llm_messages > 0)
+            self._counts["llm_messages"] += llm_messages
+            self._counts["local_fields"] += len(local.updates) - 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            counts = dict(self._counts)
+        turns = counts["turns"]
+        counts["llm_call_rate"] = counts["llm_calls"] / turns if turns else 0.0
+        return counts
+
+
+_metrics = ExtractorMetrics()
+
+
+def get_extractor_metrics() -> Dict:
+    """Métricas del extractor incremental."""
+    return _metrics.snapshot()
+
+
+def record_extraction(local: LocalPass, llm_messages: int = 0) -> None:
+    """Registra un turno del extractor (`llm_messages` = mensajes enviados al LLM, 0 si no se llamó)."""
+    _metrics.record(local, llm_messages)
+
+
+def llm_window(state: State, local: LocalPass) -> List[BaseMessage]:
+    """Mensajes que ve el LLM para extraer: solo el tramo nuevo, recortado al presupuesto."""
+    return window_for("extractor", state, local.new_messages)
+
+
+def extract_with_llm(state: State, local: LocalPass) -> State:
+    """Llamada al LLM sobre el tramo nuevo, combinada con la pasada local."""
+    prompt = prompt_template.format()
+    messages = llm_window(state, local)
+    schema = get_llm().invoke([("system", prompt)] + messages)
+    record_extraction(local, len(messages))
+    return merge_llm_updates(local, schema)
+
+
+async def aextract_with_llm(state: State, local: LocalPass) -> State:
+    """Versión asíncrona de `extract_with_llm`."""
+    prompt = prompt_template.format()
+    messages = llm_window(state, local)
+    schema = await get_llm().ainvoke([("system", prompt)] + messages)
+    record_extraction(local, len(messages))
+    return merge_llm_updates(local, schema)
+
+
+def extractor(state: State):
+    local = local_pass(state)
+    if not local.needs_llm:
+        record_extraction(local)
+        return local.updates
+    return extract_with_llm(state, local)
+
+
+async def aextractor(state: State):
+    """Versión asíncrona de `extractor`."""
+    local = local_pass(state)
+    if not local.needs_llm:
+        record_extraction(local)
+        return local.updates
+    return await aextract_with_llm(state, local)
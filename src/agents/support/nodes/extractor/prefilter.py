@@ -0,0 +1,136 @@
+"""
+Pasada local (sin LLM) sobre los mensajes nuevos del usuario.
+
+- Teléfono, email y edad se reconocen con expresiones regulares y se
+  guardan directamente (si el LLM también se llama, su valor prevalece).
+- Un número solo cuenta como teléfono con una pista ("tel.", "móvil",
+  "phone", prefijo "+", o el asistente lo acaba de pedir); una cifra larga
+  sin pista (importes, DNI) solo hace que se consulte al LLM.
+- El nombre no se puede extraer de forma fiable con reglas, así que solo se
+  detectan pistas ("me llamo", "my name is", o el asistente acaba de pedir
+  el nombre). Con pistas, el extractor llama al LLM sobre el tramo nuevo.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Sequence
+
+EMAIL = re.compile(r"\b[\w.+-]+@[\w-]+(?:\.[\w-]+)*\.[a-zA-Z]{2,}\b")
+
+# Secuencias de 7 a 15 dígitos con separadores habituales (+34 600 123 456, (555) 123-4567)
+PHONE = re.compile(r"(?<![\w@])\+?\(?\d[\d\s().-]{5,}\d(?![\w@])")
+DATE = re.compile(r"^\d{1,4}[-/.]\d{1,2}[-/.]\d{1,4}$")
+# Pistas de teléfono justo antes del número (sin otro número en medio)
+PHONE_CUE = re.compile(
+    r"\b(?:tel[eé]fono|tel|tlf|tfno|m[oó]vil|celular|cel|whatsapp|phone|mobile|cell)\b",
+    re.IGNORECASE,
+)
+PHONE_CUE_CHARS = 30
+# El asistente pidió el teléfono: la respuesta puede ser solo el número
+PHONE_REQUEST = re.compile(r"\b(?:tel[eé]fono|m[oó]vil|celular|phone(?:\s+number)?)\b", re.IGNORECASE)
+
+# Una alternativa por pista; se prefiere la más explícita (ver AGE_CUE_STRENGTH).
+# "tengo 3 años de experiencia" no es una edad ("de edad" sí)
+AGE = re.compile(
+    r"\b(?:tengo|cumpl[iío]\w*)\s+(\d{1,3})\s+años\b(?!\s+de\s+(?!edad\b))"
+    r"|\b(\d{1,3})\s+años\s+de\s+edad\b"
+    r"|\bedad\s*(?:es\s+de\s+|es\s+|:\s*|de\s+)?(\d{1,3})\b"
+    r"|\b(?:i\s+am|i'm)\s+(\d{1,3})(?:\s+years?\s+old|\s+y/?o)\b"
+    r"|\b(?:i\s+am|i'm)\s+(\d{1,3})\b"
+    r"|\b(\d{1,3})\s+years?\s+old\b"
+    r"|\bage\s*(?:is\s+|:\s*)?(\d{1,3})\b",
+    re.IGNORECASE,
+)
+# Fuerza de cada alternativa de AGE (mismo orden que los grupos)
+AGE_CUE_STRENGTH = (1, 3, 3, 3, 1, 2, 3)
+
+# El verbo no distingue mayúsculas ("Soy", "I'm"); el nombre debe empezar por mayúscula
+NAME_CUE = re.compile(
+    r"\b(?:me\s+llamo|mi\s+nombre\s+es|(?i:soy|habla)\s+[A-ZÁÉÍÓÚÑ]|nombre\s*:"
+    r"|my\s+name\s+is|(?i:i\s+am|i['’]m)\s+[A-Z]|call\s+me|name\s*:)",
+)
+NAME_CUE_CI = re.compile(r"\b(?:me\s+llamo|mi\s+nombre\s+es|my\s+name\s+is|call\s+me)\b", re.IGNORECASE)
+
+# El asistente pidió el nombre: la respuesta puede ser solo "Juan"
+NAME_REQUEST = re.compile(r"\b(?:nombre|c[oó]mo\s+te\s+llamas|c[oó]mo\s+se\s+llama|your\s+name)\b", re.IGNORECASE)
+
+
+@dataclass
+class LocalScan:
+    """Resultado de la pasada local."""
+    found: Dict[str, str] = field(default_factory=dict)  # campo del estado → valor
+    name_cue: bool = False
+    maybe_phone: bool = False  # Cifra con forma de teléfono pero sin pista
+
+
+def _phone_candidates(text: str):
+    """Números con forma de teléfono y si van precedidos de una pista."""
+    previous_end = 0
+    for match in PHONE.finditer(text):
+        candidate = match.group().strip(" .-")
+        digits = re.sub(r"\D", "", candidate)
+        if 7 <= len(digits) <= 15 and not DATE.match(candidate):
+            before = text[max(previous_end, match.start() - PHONE_CUE_CHARS):match.start()]
+            yield candidate, candidate.startswith("+") or bool(PHONE_CUE.search(before))
+        previous_end = match.end()
+
+
+def find_phone(text: str, requested: bool = False) -> Optional[str]:
+    """
+    Primer número con pista de teléfono (o cualquiera si el asistente lo pidió).
+
+    Sin pista, "presupuesto de 1.250.000" o "mi DNI es 12345678" no son teléfonos.
+    """
+    for candidate, cued in _phone_candidates(text):
+        if cued or requested:
+            return candidate
+    return None
+
+
+def find_email(text: str) -> Optional[str]:
+    match = EMAIL.search(text)
+    return match.group() if match else None
+
+
+def find_age(text: str) -> Optional[str]:
+    """Edad con la pista más explícita (a igualdad, la primera)."""
+    best, best_strength = None, 0
+    for match in AGE.finditer(text):
+        index = next(n for n, group in enumerate(match.groups()) if group)
+        value = match.group(index + 1)
+        if 0 < int(value) <= 120 and AGE_CUE_STRENGTH[index] > best_strength:
+            best, best_strength = value, AGE_CUE_STRENGTH[index]
+    return best
+
+
+def scan(user_texts: Sequence[str], previous_ai_text: Optional[str] = None) -> LocalScan:
+    """
+    Busca datos de contacto en los mensajes nuevos del usuario.
+
+    Args:
+        user_texts: Textos de los mensajes nuevos del usuario, en orden
+        previous_ai_text: Último mensaje del asistente antes del tramo nuevo
+
+    Returns:
+        Valores encontrados (el más reciente gana), si hay pistas de nombre y
+        si hay cifras que podrían ser un teléfono
+    """
+    result = LocalScan()
+    phone_requested = bool(previous_ai_text and PHONE_REQUEST.search(previous_ai_text))
+    for position, text in enumerate(user_texts):
+        # La petición del asistente solo vale para la respuesta inmediata
+        values = {
+            "email": find_email(text),
+            "phone": find_phone(text, requested=phone_requested and position == 0),
+            "my_age": find_age(text),
+        }
+        for key, value in values.items():
+            if value is not None:
+                result.found[key] = value
+        if values["phone"] is None and any(True for _ in _phone_candidates(text)):
+            result.maybe_phone = True
+        if NAME_CUE.search(text) or NAME_CUE_CI.search(text):
+            result.name_cue = True
+    if user_texts and previous_ai_text and NAME_REQUEST.search(previous_ai_text):
+        result.name_cue = True
+    return result
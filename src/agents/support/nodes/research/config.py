@@ -17,6 +17,39 @@ class ResearchConfig:
     def __init__(self):
         self._project_root = self._find_project_root()
         self._paths = self._initialize_paths()
+        self.embeddings_cache_max_bytes = int(
+            float(os.getenv("RESEARCH_EMBEDDINGS_CACHE_MB", "512")) * 1024 * 1024
+        )
+        # Pipeline de ingesta
+        self.embed_batch_size = int(os.getenv("RESEARCH_EMBED_BATCH_SIZE", "64"))
+        self.embed_concurrency = int(os.getenv("RESEARCH_EMBED_CONCURRENCY", "4"))
+        self.split_workers = int(os.getenv("RESEARCH_SPLIT_WORKERS", str(os.cpu_count() or 1)))
+        # Backend vectorial: "chroma" o "numpy" (matriz mmap con búsqueda exacta)
+        self.vector_backend = os.getenv("RESEARCH_VECTOR_BACKEND", "chroma")
+        # Tipo de dato de la matriz del backend numpy: "float32", "float16" o "int8"
+        self.vector_dtype = os.getenv("RESEARCH_VECTOR_DTYPE", "float32")
+        # Vigilancia de documentos/ (reindexación incremental en segundo plano)
+        self.watch_enabled = os.getenv("RESEARCH_WATCH", "0") in ("1", "true", "yes")
+        self.watch_interval = float(os.getenv("RESEARCH_WATCH_INTERVAL", "2.0"))
+        self.watch_debounce = float(os.getenv("RESEARCH_WATCH_DEBOUNCE", "1.0"))
+        # Búsqueda: llamadas concurrentes de embeddings/Chroma por proceso
+        self.search_concurrency = int(os.getenv("RESEARCH_SEARCH_CONCURRENCY", "8"))
+        # Búsqueda híbrida: "hybrid" (BM25 + vectores), "vector" o "lexical"
+        self.search_mode = os.getenv("RESEARCH_SEARCH_MODE", "hybrid")
+        # Responder solo con BM25 (sin embeddings) cuando el resultado léxico es concluyente
+        self.lexical_fast_path = os.getenv("RESEARCH_LEXICAL_FAST_PATH", "1") not in ("0", "false", "no")
+        self.lexical_min_score = float(os.getenv("RESEARCH_LEXICAL_MIN_SCORE", "4.0"))
+        self.lexical_decisive_ratio = float(os.getenv("RESEARCH_LEXICAL_DECISIVE_RATIO", "2.0"))
+        # Caché de resultados de búsqueda
+        self.query_cache_size = int(os.getenv("RESEARCH_QUERY_CACHE_SIZE", "512"))
+        self.query_cache_ttl = float(os.getenv("RESEARCH_QUERY_CACHE_TTL", "300"))
+        semantic_threshold = os.getenv("RESEARCH_QUERY_CACHE_SEMANTIC_THRESHOLD")
+        self.query_cache_semantic_threshold = float(semantic_threshold) if semantic_threshold else None
+        # Caché de buscar_web: TTL, tamaño y refresco anticipado de consultas calientes
+        self.web_cache_ttl = float(os.getenv("RESEARCH_WEB_CACHE_TTL", "900"))
+        self.web_cache_size = int(os.getenv("RESEARCH_WEB_CACHE_SIZE", "1024"))
+        self.web_refresh_ahead = float(os.getenv("RESEARCH_WEB_REFRESH_AHEAD", "0"))
+        self.web_hot_hits = int(os.getenv("RESEARCH_WEB_HOT_HITS", "3"))
     
     def _find_project_root(self) -> Path:
         """Encuentra la raíz del proyecto (donde está pyproject.toml)."""
@@ -49,6 +82,12 @@ class ResearchConfig:
             datos_dir = Path(datos_dir)
         
         chroma_db_dir = datos_dir / "chroma_db"
+        manifest_file = datos_dir / "chroma_manifest.json"
+        embeddings_cache_file = datos_dir / "embeddings_cache.sqlite3"
+        lexical_index_file = datos_dir / "lexical_index.sqlite3"
+        vector_index_dir = datos_dir / "vector_index"
+        pdf_text_cache_file = datos_dir / "pdf_text_cache.sqlite3"
+        notes_file = datos_dir / "notes.sqlite3"
         
         # 3. Crear directorios si no existen
         documentos_dir.mkdir(parents=True, exist_ok=True)
@@ -73,6 +112,12 @@ class ResearchConfig:
             "documentos": documentos_dir,
             "datos": datos_dir,
             "chroma_db": chroma_db_dir,
+            "manifest": manifest_file,
+            "embeddings_cache": embeddings_cache_file,
+            "lexical_index": lexical_index_file,
+            "vector_index": vector_index_dir,
+            "pdf_text_cache": pdf_text_cache_file,
+            "notes": notes_file,
         }
     
     @property
@@ -90,6 +135,39 @@ class ResearchConfig:
         """Directorio de la base de datos vectorial."""
         return self._paths["chroma_db"]
     
+    @property
+    def manifest_file(self) -> Path:
+        """Manifiesto de ingesta incremental (hashes de archivos y chunks)."""
+        # Cada backend tiene su propio índice y, por tanto, su propio manifiesto
+        if self.vector_backend == "numpy":
+            return self.vector_index_dir / "manifest.json"
+        return self._paths["manifest"]
+    
+    @property
+    def embeddings_cache_file(self) -> Path:
+        """Base SQLite de la caché de embeddings."""
+        return self._paths["embeddings_cache"]
+    
+    @property
+    def lexical_index_file(self) -> Path:
+        """Base SQLite del índice léxico BM25."""
+        return self._paths["lexical_index"]
+    
+    @property
+    def vector_index_dir(self) -> Path:
+        """Directorio del índice del backend numpy (uno por tipo de dato)."""
+        return self._paths["vector_index"] / self.vector_dtype
+    
+    @property
+    def pdf_text_cache_file(self) -> Path:
+        """Base SQLite con el texto extraído de los PDFs."""
+        return self._paths["pdf_text_cache"]
+    
+    @property
+    def notes_file(self) -> Path:
+        """Base SQLite de las notas del usuario."""
+        return self._paths["notes"]
+    
     @property
     def project_root(self) -> Path:
         """Raíz del proyecto."""
@@ -152,6 +230,30 @@ def get_chroma_db_dir() -> Path:
     """Obtiene el directorio de ChromaDB."""
     return get_config().chroma_db_dir
 
+def get_manifest_file() -> Path:
+    """Obtiene la ruta del manifiesto de ingesta."""
+    return get_config().manifest_file
+
+def get_embeddings_cache_file() -> Path:
+    """Obtiene la ruta de la caché de embeddings."""
+    return get_config().embeddings_cache_file
+
+def get_lexical_index_file() -> Path:
+    """Obtiene la ruta del índice léxico BM25."""
+    return get_config().lexical_index_file
+
+def get_vector_index_dir() -> Path:
+    """Obtiene el directorio del índice del backend numpy."""
+    return get_config().vector_index_dir
+
+def get_pdf_text_cache_file() -> Path:
+    """Obtiene la ruta de la caché de texto de PDFs."""
+    return get_config().pdf_text_cache_file
+
+def get_notes_file() -> Path:
+    """Obtiene la ruta de la base de notas."""
+    return get_config().notes_file
+
 def get_research_stats() -> Dict:
     """Obtiene estadísticas de uso."""
     return get_config().get_stats()
\ No newline at end of file
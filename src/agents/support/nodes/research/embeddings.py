@@ -0,0 +1,324 @@
+"""
+Caché persistente de embeddings.
+
+Envuelve cualquier modelo de embeddings de LangChain con dos niveles de caché:
+1. LRU en memoria para embeddings de consultas (`embed_query`)
+2. Almacén SQLite en disco, compacto (float32) y con desalojo por tamaño
+
+La clave es el nombre del modelo más el hash del texto normalizado, de modo
+que reindexar o repetir consultas no vuelve a pagar la llamada remota.
+"""
+
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from langchain_core.embeddings import Embeddings
+
+
+def normalize_text(text: str) -> str:
+    """Normaliza el texto (Unicode NFC y espacios) antes de calcular la clave."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def embedding_key(model: str, text: str) -> bytes:
+    """Clave de caché: SHA-256 de modelo + texto normalizado."""
+    digest = hashlib.sha256()
+    digest.update(model.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(normalize_text(text).encode("utf-8"))
+    return digest.digest()
+
+
+def _pack(vector: Sequence[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _unpack(blob: bytes) -> List[float]:
+    values = array("f")
+    values.frombytes(blob)
+    return values.tolist()
+
+
+class EmbeddingStore:
+    """
+    Almacén de embeddings en SQLite con límite de tamaño.
+
+    Los vectores se guardan como float32 (4 bytes por dimensión). Cuando el
+    tamaño total supera `max_bytes`, se eliminan las entradas usadas hace
+    más tiempo hasta quedar por debajo del 90% del límite.
+    """
+
+    def __init__(self, path: Path, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key BLOB PRIMARY KEY,"
+            " vector BLOB NOT NULL,"
+            " nbytes INTEGER NOT NULL,"
+            " last_access REAL NOT NULL"
+            ") WITHOUT ROWID"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings(last_access)"
+        )
+        self._conn.commit()
+        self.evictions = 0
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(nbytes), 0) FROM embeddings"
+        ).fetchone()[0]
+
+    @property
+    def total_bytes(self) -> int:
+        """Bytes ocupados por los vectores almacenados."""
+        return self._total_bytes
+
+    def count(self) -> int:
+        """Número de embeddings almacenados."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def get_many(self, keys: Sequence[bytes]) -> Dict[bytes, bytes]:
+        """Busca varias claves y retorna los blobs encontrados."""
+        found: Dict[bytes, bytes] = {}
+        if not keys:
+            return found
+
+        now = time.time()
+        unique_keys = list(dict.fromkeys(keys))
+        with self._lock:
+            # SQLite limita el número de parámetros por consulta
+            for start in range(0, len(unique_keys), 500):
+                batch = unique_keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch,
+                ).fetchall()
+                found.update(rows)
+            if found:
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+                self._conn.commit()
+        return found
+
+    def put_many(self, items: Dict[bytes, bytes]) -> None:
+        """Guarda varios embeddings y aplica el desalojo si hace falta."""
+        if not items:
+            return
+
+        now = time.time()
+        with self._lock:
+            for key, blob in items.items():
+                previous = self._conn.execute(
+                    "SELECT nbytes FROM embeddings WHERE key = ?", (key,)
+                ).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO embeddings (key, vector, nbytes, last_access) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, blob, len(blob), now),
+                )
+                self._total_bytes += len(blob) - (previous[0] if previous else 0)
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """Elimina las entradas menos usadas hasta quedar bajo el límite (con el lock tomado)."""
+        if self._total_bytes <= self.max_bytes:
+            return
+
+        target = int(self.max_bytes * 0.9)
+        cursor = self._conn.execute(
+            "SELECT key, nbytes FROM embeddings ORDER BY last_access ASC"
+        )
+        to_delete = []
+        freed = 0
+        for key, nbytes in cursor:
+            if self._total_bytes - freed <= target:
+                break
+            to_delete.append((key,))
+            freed += nbytes
+
+        self._conn.executemany("DELETE FROM embeddings WHERE key = ?", to_delete)
+        self._total_bytes -= freed
+        self.evictions += len(to_delete)
+
+    def clear(self) -> None:
+        """Elimina todos los embeddings almacenados."""
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+            self._total_bytes = 0
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Modelo de embeddings con caché en memoria y en disco.
+
+    - `embed_documents`: busca todos los textos en disco y solo envía al
+      modelo los que faltan (aciertos parciales por lote).
+    - `embed_query`: consulta primero un LRU en memoria, luego el disco.
+
+    Los contadores de aciertos, fallos y bytes están disponibles en `stats()`.
+    """
+
+    def __init__(
+        self,
+        underlying: Embeddings,
+        model: str,
+        store: EmbeddingStore,
+        query_cache_size: int = 1024,
+    ):
+        self.underlying = underlying
+        self.model = model
+        self.store = store
+        self.query_cache_size = query_cache_size
+        self._query_cache: "OrderedDict[bytes, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "bytes_read": 0,
+            "bytes_written": 0,
+        }
+
+    # ====================================
+    # Contadores
+    # ====================================
+    def _count(self, **increments: int) -> None:
+        with self._lock:
+            for name, value in increments.items():
+                self._counters[name] += value
+
+    def stats(self) -> Dict:
+        """Retorna contadores de aciertos, fallos y bytes de la caché."""
+        with self._lock:
+            counters = dict(self._counters)
+        hits = counters["memory_hits"] + counters["disk_hits"]
+        lookups = hits + counters["misses"]
+        counters.update({
+            "model": self.model,
+            "hits": hits,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "store_entries": self.store.count(),
+            "store_bytes": self.store.total_bytes,
+            "store_max_bytes": self.store.max_bytes,
+            "evictions": self.store.evictions,
+        })
+        return counters
+
+    # ====================================
+    # LRU de consultas
+    # ====================================
+    def _memory_get(self, key: bytes) -> Optional[List[float]]:
+        with self._lock:
+            vector = self._query_cache.get(key)
+            if vector is not None:
+                self._query_cache.move_to_end(key)
+            return vector
+
+    def _memory_put(self, key: bytes, vector: List[float]) -> None:
+        with self._lock:
+            self._query_cache[key] = vector
+            self._query_cache.move_to_end(key)
+            while len(self._query_cache) > self.query_cache_size:
+                self._query_cache.popitem(last=False)
+
+    # ====================================
+    # Lógica común
+    # ====================================
+    def _lookup(self, texts: List[str]):
+        """Retorna (claves, vectores encontrados, textos pendientes sin duplicados)."""
+        keys = [embedding_key(self.model, text) for text in texts]
+        blobs = self.store.get_many(keys)
+        found = {key: _unpack(blob) for key, blob in blobs.items()}
+
+        pending: Dict[bytes, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in pending:
+                pending[key] = text
+
+        hits = sum(1 for key in keys if key in found)
+        self._count(
+            disk_hits=hits,
+            misses=len(keys) - hits,
+            bytes_read=sum(len(blob) for blob in blobs.values()),
+        )
+        return keys, found, pending
+
+    def _store(self, pending_keys: List[bytes], vectors: List[List[float]]) -> Dict[bytes, List[float]]:
+        items = {key: _pack(vector) for key, vector in zip(pending_keys, vectors)}
+        self.store.put_many(items)
+        self._count(bytes_written=sum(len(blob) for blob in items.values()))
+        return dict(zip(pending_keys, vectors))
+
+    # ====================================
+    # Interfaz Embeddings
+    # ====================================
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embebe documentos enviando al modelo solo los textos no cacheados."""
+        keys, found, pending = self._lookup(texts)
+        if pending:
+            vectors = self.underlying.embed_documents(list(pending.values()))
+            found.update(self._store(list(pending.keys()), vectors))
+        return [found[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embebe una consulta usando el LRU en memoria y luego el disco."""
+        key = embedding_key(self.model, text)
+        vector = self._memory_get(key)
+        if vector is not None:
+            self._count(memory_hits=1)
+            return vector
+
+        _, found, pending = self._lookup([text])
+        if pending:
+            found.update(self._store([key], [self.underlying.embed_query(text)]))
+        vector = found[key]
+        self._memory_put(key, vector)
+        return vector
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Versión asíncrona de `embed_documents`.
+
+        La caché en disco (SQLite, con el lock que comparte con la ingesta) se
+        consulta en un hilo para no bloquear el event loop.
+        """
+        keys, found, pending = await asyncio.to_thread(self._lookup, texts)
+        if pending:
+            vectors = await self.underlying.aembed_documents(list(pending.values()))
+            found.update(await asyncio.to_thread(self._store, list(pending.keys()), vectors))
+        return [found[key] for key in keys]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """Versión asíncrona de `embed_query`."""
+        key = embedding_key(self.model, text)
+        vector = self._memory_get(key)
+        if vector is not None:
+            self._count(memory_hits=1)
+            return vector
+
+        # Solo el LRU en memoria se consulta en el event loop; el disco, en un hilo
+        _, found, pending = await asyncio.to_thread(self._lookup, [text])
+        if pending:
+            vector = await self.underlying.aembed_query(text)
+            found.update(await asyncio.to_thread(self._store, [key], [vector]))
+        vector = found[key]
+        self._memory_put(key, vector)
+        return vector
@@ -0,0 +1,443 @@
+"""
+Pipeline de ingesta en streaming con memoria acotada.
+
+Etapas:
+1. Lectura perezosa: cada archivo se lee solo cuando hay hueco en la ventana
+2. División en chunks en un pool de procesos (los PDFs se extraen y dividen
+   por tramos de páginas, ver `pdf.py`)
+3. Agrupación en lotes de tamaño fijo para embeddings, enviados con
+   concurrencia acotada
+4. Escritura incremental de cada lote en el vector store
+
+En memoria solo conviven los archivos de la ventana de división y los lotes
+en vuelo, por lo que el consumo no crece con el tamaño del corpus.
+"""
+
+import hashlib
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from agents.support.nodes.research.manifest import chunk_id, hash_file
+from agents.support.nodes.research.pdf import (
+    PDF_PAGES_PER_TASK,
+    PdfTextCache,
+    count_pages,
+    split_pdf_pages,
+)
+
+# Por debajo de este número de archivos no compensa arrancar procesos
+PARALLEL_SPLIT_MIN_FILES = 8
+
+EmbedFn = Callable[[List[str]], List[List[float]]]
+WriteFn = Callable[[List[str], List[List[float]], List[str], List[Dict]], None]
+
+
+@dataclass
+class SourceDocument:
+    """
+    Documento a ingerir.
+
+    Si `text` es None, el contenido se lee de `path` de forma perezosa,
+    justo antes de dividirlo.
+    """
+    source: str
+    metadata: Dict
+    path: Optional[Path] = None
+    text: Optional[str] = None
+
+
+@dataclass
+class IngestedFile:
+    """Resultado de un documento completamente escrito en el vector store."""
+    document: SourceDocument
+    content_hash: str
+    chunk_ids: List[str]
+    stat: Optional[os.stat_result] = None
+
+
+@dataclass
+class IngestStats:
+    """Contadores y tiempos acumulados por etapa."""
+    files: int = 0
+    failed_files: int = 0
+    bytes_read: int = 0
+    pages: int = 0
+    cached_pages: int = 0
+    chunks: int = 0
+    batches: int = 0
+    read_seconds: float = 0.0
+    split_seconds: float = 0.0
+    embed_seconds: float = 0.0
+    write_seconds: float = 0.0
+    wall_seconds: float = 0.0
+
+    def throughput(self) -> Dict[str, float]:
+        """Throughput por etapa (unidades por segundo de trabajo de esa etapa)."""
+        def rate(amount: float, seconds: float) -> float:
+            return amount / seconds if seconds > 0 else 0.0
+
+        return {
+            "read_mb_s": rate(self.bytes_read / (1024 * 1024), self.read_seconds),
+            "split_chunks_s": rate(self.chunks, self.split_seconds),
+            "embed_chunks_s": rate(self.chunks, self.embed_seconds),
+            "write_chunks_s": rate(self.chunks, self.write_seconds),
+            "end_to_end_chunks_s": rate(self.chunks, self.wall_seconds),
+        }
+
+    def summary(self) -> str:
+        """Resumen legible para los logs."""
+        rates = self.throughput()
+        pages = f"{self.pages} páginas PDF ({self.cached_pages} de caché), " if self.pages else ""
+        return (
+            f"{self.files} archivos, {pages}{self.chunks} chunks, {self.batches} lotes en "
+            f"{self.wall_seconds:.2f}s | lectura {rates['read_mb_s']:.1f} MB/s, "
+            f"división {rates['split_chunks_s']:.0f} chunks/s, "
+            f"embeddings {rates['embed_chunks_s']:.0f} chunks/s, "
+            f"escritura {rates['write_chunks_s']:.0f} chunks/s, "
+            f"total {rates['end_to_end_chunks_s']:.0f} chunks/s"
+        )
+
+
+# ====================================
+# Etapa de división (se ejecuta en procesos hijos)
+# ====================================
+_splitter: Optional[RecursiveCharacterTextSplitter] = None
+_splitter_params: Optional[Tuple] = None
+
+
+def _get_splitter(chunk_size: int, chunk_overlap: int, separators: Tuple[str, ...]):
+    """Reutiliza el splitter dentro de cada proceso."""
+    global _splitter, _splitter_params
+    params = (chunk_size, chunk_overlap, separators)
+    if _splitter is None or _splitter_params != params:
+        _splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            separators=list(separators),
+        )
+        _splitter_params = params
+    return _splitter
+
+
+def split_text(
+    source: str,
+    text: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    separators: Tuple[str, ...],
+) -> Tuple[List[str], List[str], float]:
+    """
+    Divide un texto en chunks y calcula sus IDs deterministas.
+
+    Returns:
+        Tupla con (ids, textos de los chunks, segundos empleados)
+    """
+    start = time.perf_counter()
+    splitter = _get_splitter(chunk_size, chunk_overlap, separators)
+    texts = splitter.split_text(text)
+    ids = [chunk_id(source, i, content) for i, content in enumerate(texts)]
+    return ids, texts, time.perf_counter() - start
+
+
+class _InlineExecutor(Executor):
+    """Ejecutor síncrono para corpus pequeños (evita arrancar procesos)."""
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        future: Future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as exc:
+            future.set_exception(exc)
+        return future
+
+
+class _SplitExecutors:
+    """
+    Elige dónde dividir cada tarea: en el proceso actual o en el pool.
+
+    El pool de procesos se crea la primera vez que se necesita (p. ej. al
+    llegar un PDF grande aunque haya pocos archivos).
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._inline = _InlineExecutor()
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def get(self, parallel: bool) -> Executor:
+        if not parallel or self.workers <= 1:
+            return self._inline
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+
+
+# ====================================
+# Pipeline
+# ====================================
+class IngestPipeline:
+    """
+    Ingesta en streaming: lectura perezosa → división en paralelo →
+    lotes de embeddings con concurrencia acotada → escritura incremental.
+
+    Args:
+        embed: Función que embebe una lista de textos
+        write: Función que escribe (ids, embeddings, textos, metadatos)
+        splitter_params: chunk_size, chunk_overlap y separators
+        batch_size: Número de chunks por llamada de embeddings
+        max_concurrency: Lotes de embeddings en vuelo simultáneamente
+        split_workers: Procesos para dividir (1 = división en el proceso actual)
+        pdf_cache: Caché del texto extraído de PDFs (None = sin caché)
+    """
+
+    def __init__(
+        self,
+        embed: EmbedFn,
+        write: WriteFn,
+        splitter_params: Dict,
+        batch_size: int = 64,
+        max_concurrency: int = 4,
+        split_workers: int = 1,
+        pdf_cache: Optional[PdfTextCache] = None,
+    ):
+        self.embed = embed
+        self.write = write
+        self.chunk_size = splitter_params["chunk_size"]
+        self.chunk_overlap = splitter_params["chunk_overlap"]
+        self.separators = tuple(splitter_params["separators"])
+        self.batch_size = max(1, batch_size)
+        self.max_concurrency = max(1, max_concurrency)
+        self.split_workers = max(1, split_workers)
+        self.pdf_cache = pdf_cache
+
+    def _read(self, document: SourceDocument, stats: IngestStats):
+        """Lee un documento y calcula el hash de su contenido."""
+        start = time.perf_counter()
+        stat = None
+        if document.text is not None:
+            text = document.text
+            data = text.encode("utf-8")
+        else:
+            stat = document.path.stat()
+            data = document.path.read_bytes()
+            text = data.decode("utf-8")
+        content_hash = hashlib.sha256(data).hexdigest()
+        stats.bytes_read += len(data)
+        stats.read_seconds += time.perf_counter() - start
+        return text, content_hash, stat
+
+    def run(
+        self,
+        documents: Iterable[SourceDocument],
+        on_document_done: Optional[Callable[[IngestedFile], None]] = None,
+        total: Optional[int] = None,
+    ) -> IngestStats:
+        """
+        Ejecuta el pipeline sobre los documentos.
+
+        Args:
+            documents: Iterable (idealmente perezoso) de documentos
+            on_document_done: Se llama cuando todos los chunks de un documento
+                están escritos (p. ej. para actualizar el manifiesto)
+            total: Número de documentos, si se conoce (decide si usar procesos)
+
+        Returns:
+            Estadísticas por etapa
+        """
+        stats = IngestStats()
+        wall_start = time.perf_counter()
+
+        use_processes = self.split_workers > 1 and (total is None or total >= PARALLEL_SPLIT_MIN_FILES)
+        executors = _SplitExecutors(self.split_workers)
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as embed_executor:
+                self._run(documents, executors, use_processes, embed_executor, on_document_done, stats)
+        finally:
+            executors.shutdown()
+            stats.wall_seconds = time.perf_counter() - wall_start
+        return stats
+
+    def _pdf_tasks(self, document: SourceDocument, stats: IngestStats):
+        """
+        Prepara la extracción de un PDF por tramos de páginas.
+
+        Returns:
+            Tupla con (hash del archivo, stat, lista de tramos
+            (primera página, número de páginas, texto cacheado o None))
+        """
+        start = time.perf_counter()
+        stat = document.path.stat()
+        file_hash = hash_file(document.path)
+        stats.bytes_read += stat.st_size
+
+        pages = self.pdf_cache.page_count(file_hash) if self.pdf_cache else None
+        if pages is None:
+            pages = count_pages(document.path)
+            if self.pdf_cache:
+                self.pdf_cache.set_page_count(file_hash, pages)
+        stats.read_seconds += time.perf_counter() - start
+
+        tasks = []
+        for first_page in range(1, pages + 1, PDF_PAGES_PER_TASK):
+            count = min(PDF_PAGES_PER_TASK, pages - first_page + 1)
+            cached = self.pdf_cache.get_pages(file_hash, first_page, count) if self.pdf_cache else None
+            tasks.append((first_page, count, cached))
+        return file_hash, stat, tasks
+
+    def _run(
+        self,
+        documents: Iterable[SourceDocument],
+        executors: _SplitExecutors,
+        use_processes: bool,
+        embed_executor: ThreadPoolExecutor,
+        on_document_done: Optional[Callable[[IngestedFile], None]],
+        stats: IngestStats,
+    ) -> None:
+        split_window = self.split_workers * 2
+        # Cada tarea de división: (documento, future, primera página si es un PDF)
+        split_queue: Deque[Tuple[IngestedFile, Future, Optional[int]]] = deque()
+        # Cada chunk en un lote: (id, texto, documento, metadatos)
+        embed_queue: Deque[Tuple[List[Tuple[str, str, IngestedFile, Dict]], Future]] = deque()
+        # Por documento: tareas de división sin terminar + chunks sin escribir
+        pending: Dict[int, int] = {}
+        batch: List[Tuple[str, str, IngestedFile, Dict]] = []
+
+        def finish(entry: IngestedFile) -> None:
+            stats.files += 1
+            if on_document_done is not None:
+                on_document_done(entry)
+
+        def drain_embed(limit: int) -> None:
+            # Escribir lotes (en orden) hasta dejar como mucho `limit` en vuelo
+            while len(embed_queue) > limit:
+                items, future = embed_queue.popleft()
+                vectors, seconds = future.result()
+                stats.embed_seconds += seconds
+
+                # Un mismo lote puede traer chunks idénticos (mismo ID): se escriben una vez
+                unique: Dict[str, int] = {}
+                for index, item in enumerate(items):
+                    unique[item[0]] = index
+                positions = list(unique.values())
+
+                start = time.perf_counter()
+                self.write(
+                    [items[i][0] for i in positions],
+                    [vectors[i] for i in positions],
+                    [items[i][1] for i in positions],
+                    [items[i][3] for i in positions],
+                )
+                stats.write_seconds += time.perf_counter() - start
+                stats.batches += 1
+
+                for _, _, entry, _ in items:
+                    release(entry)
+
+        def timed_embed(texts: List[str]) -> Tuple[List[List[float]], float]:
+            start = time.perf_counter()
+            vectors = self.embed(texts)
+            return vectors, time.perf_counter() - start
+
+        def flush_batch() -> None:
+            nonlocal batch
+            if not batch:
+                return
+            drain_embed(self.max_concurrency - 1)
+            embed_queue.append((batch, embed_executor.submit(timed_embed, [item[1] for item in batch])))
+            batch = []
+
+        def release(entry: IngestedFile) -> None:
+            key = id(entry)
+            pending[key] -= 1
+            if pending[key] == 0:
+                del pending[key]
+                finish(entry)
+
+        def drain_split(limit: int) -> None:
+            while len(split_queue) > limit:
+                entry, future, first_page = split_queue.popleft()
+                if first_page is None:
+                    ids, texts, seconds = future.result()
+                    metadatas = [entry.document.metadata] * len(ids)
+                else:
+                    ids, texts, pages, extracted, seconds = future.result()
+                    metadatas = [{**entry.document.metadata, "page": page} for page in pages]
+                    if extracted is not None and self.pdf_cache:
+                        self.pdf_cache.put_pages(entry.content_hash, first_page, extracted)
+                stats.split_seconds += seconds
+                stats.chunks += len(ids)
+                entry.chunk_ids.extend(ids)
+                pending[id(entry)] += len(ids)
+                for item in zip(ids, texts, metadatas):
+                    batch.append((item[0], item[1], entry, item[2]))
+                    if len(batch) >= self.batch_size:
+                        flush_batch()
+                # La tarea de división terminó
+                release(entry)
+
+        for document in documents:
+            is_pdf = document.text is None and document.path.suffix.lower() == ".pdf"
+            try:
+                if is_pdf:
+                    content_hash, stat, tasks = self._pdf_tasks(document, stats)
+                else:
+                    text, content_hash, stat = self._read(document, stats)
+            except Exception as e:  # PDFs corruptos, pypdf ausente, errores de E/S
+                print(f"[Research] Error leyendo {document.source}: {e}")
+                stats.failed_files += 1
+                continue
+
+            entry = IngestedFile(document=document, content_hash=content_hash, chunk_ids=[], stat=stat)
+            if not is_pdf:
+                pending[id(entry)] = 1
+                future = executors.get(use_processes).submit(
+                    split_text, document.source, text,
+                    self.chunk_size, self.chunk_overlap, self.separators,
+                )
+                del text
+                split_queue.append((entry, future, None))
+                drain_split(split_window)
+                continue
+
+            if not tasks:
+                finish(entry)
+                continue
+            pending[id(entry)] = len(tasks)
+            # Un PDF de varios tramos se reparte entre procesos aunque sea el único archivo
+            executor = executors.get(use_processes or len(tasks) > 1)
+            for first_page, count, cached in tasks:
+                stats.pages += count
+                if cached is not None:
+                    stats.cached_pages += count
+                future = executor.submit(
+                    split_pdf_pages, document.source, document.path, first_page, count, cached,
+                    self.chunk_size, self.chunk_overlap, self.separators,
+                )
+                split_queue.append((entry, future, first_page))
+                drain_split(split_window)
+
+        drain_split(0)
+        flush_batch()
+        drain_embed(0)
+
+
+def iter_source_files(files: Dict[str, Path]) -> Iterator[SourceDocument]:
+    """Genera documentos perezosos (sin leer su contenido) a partir de rutas."""
+    for source, path in files.items():
+        yield SourceDocument(source=source, metadata={"source": str(path)}, path=path)
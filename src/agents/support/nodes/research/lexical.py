@@ -0,0 +1,213 @@
+"""
+Índice léxico BM25 persistente sobre los mismos chunks que `base_conocimientos`.
+
+Usa SQLite FTS5 (índice invertido con ranking BM25) con tokenización que
+ignora mayúsculas y tildes. Se mantiene de forma incremental en cada ingesta
+y permite encontrar términos exactos (nombres de productos, códigos, nombres
+de doctores) que la búsqueda por embeddings suele pasar por alto.
+"""
+
+import json
+import re
+import sqlite3
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+from langchain_core.documents import Document
+
+# Palabras vacías frecuentes: no aportan a BM25 y alargan las consultas OR
+STOPWORDS = frozenset("""
+a al algo algun alguna algunas alguno algunos ante antes como con contra cual
+cuales cuando de del desde donde dos el ella ellas ellos en entre era es esa
+esas ese eso esos esta estaba estan estas este esto estos fue ha hay la las le
+les lo los mas me mi mis muy nada ni no nos o os otra otro para pero por porque
+que quien se sea segun ser si sin sobre son su sus te tiene tu tus un una uno
+unos y ya yo the of and or to in is are for on with what how
+""".split())
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def query_terms(query: str) -> List[str]:
+    """Extrae los términos de búsqueda de una consulta (sin palabras vacías)."""
+    # Quitar tildes igual que el tokenizador de FTS5 (remove_diacritics)
+    decomposed = unicodedata.normalize("NFKD", query.lower())
+    plain = "".join(char for char in decomposed if not unicodedata.combining(char))
+    terms = []
+    for token in _TOKEN_RE.findall(plain):
+        if token not in STOPWORDS and token not in terms:
+            terms.append(token)
+    return terms
+
+
+class LexicalIndex:
+    """
+    Índice BM25 incremental en SQLite FTS5.
+
+    Tablas:
+        chunks: id del chunk, metadatos (JSON) y contenido
+        chunks_fts: índice invertido (contenido externo apuntando a chunks)
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS chunks (
+                rowid INTEGER PRIMARY KEY,
+                id TEXT NOT NULL UNIQUE,
+                metadata TEXT NOT NULL,
+                content TEXT NOT NULL
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(
+                content,
+                content='chunks',
+                content_rowid='rowid',
+                tokenize='unicode61 remove_diacritics 2'
+            );
+            """
+        )
+        self._conn.commit()
+
+    def count(self) -> int:
+        """Número de chunks indexados."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def _delete_locked(self, ids: Sequence[str]) -> None:
+        for start in range(0, len(ids), 500):
+            batch = list(ids[start:start + 500])
+            placeholders = ",".join("?" * len(batch))
+            rows = self._conn.execute(
+                f"SELECT rowid, content FROM chunks WHERE id IN ({placeholders})", batch
+            ).fetchall()
+            self._conn.executemany(
+                "INSERT INTO chunks_fts(chunks_fts, rowid, content) VALUES('delete', ?, ?)", rows
+            )
+            self._conn.executemany("DELETE FROM chunks WHERE rowid = ?", [(row[0],) for row in rows])
+
+    def upsert(self, ids: Sequence[str], texts: Sequence[str], metadatas: Sequence[Dict]) -> None:
+        """Añade o reemplaza chunks en el índice."""
+        if not ids:
+            return
+        with self._lock:
+            self._delete_locked(ids)
+            for chunk_id, text, metadata in zip(ids, texts, metadatas):
+                cursor = self._conn.execute(
+                    "INSERT INTO chunks (id, metadata, content) VALUES (?, ?, ?)",
+                    (chunk_id, json.dumps(metadata, ensure_ascii=False), text),
+                )
+                self._conn.execute(
+                    "INSERT INTO chunks_fts(rowid, content) VALUES (?, ?)",
+                    (cursor.lastrowid, text),
+                )
+            self._conn.commit()
+
+    def delete(self, ids: Sequence[str]) -> None:
+        """Elimina chunks del índice."""
+        if not ids:
+            return
+        with self._lock:
+            self._delete_locked(ids)
+            self._conn.commit()
+
+    def clear(self) -> None:
+        """Vacía el índice."""
+        with self._lock:
+            self._conn.execute("DELETE FROM chunks")
+            self._conn.execute("INSERT INTO chunks_fts(chunks_fts) VALUES('delete-all')")
+            self._conn.commit()
+
+    def search(self, query: str, k: int = 4) -> List[Tuple[Document, float]]:
+        """
+        Busca con BM25.
+
+        Args:
+            query: Consulta en lenguaje natural
+            k: Número máximo de resultados
+
+        Returns:
+            Lista de (documento, puntuación BM25), de mayor a menor puntuación
+        """
+        terms = query_terms(query)
+        if not terms:
+            return []
+
+        # Cada término entre comillas: FTS5 lo trata como literal
+        match = " OR ".join('"' + term.replace('"', '""') + '"' for term in terms)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT c.id, c.metadata, c.content, -bm25(chunks_fts) AS score "
+                "FROM chunks_fts JOIN chunks c ON c.rowid = chunks_fts.rowid "
+                "WHERE chunks_fts MATCH ? ORDER BY bm25(chunks_fts) LIMIT ?",
+                (match, k),
+            ).fetchall()
+
+        return [
+            (Document(id=chunk_id, page_content=content, metadata=json.loads(metadata)), score)
+            for chunk_id, metadata, content, score in rows
+        ]
+
+
+def is_decisive(scores: Sequence[float], min_score: float, ratio: float) -> bool:
+    """
+    Indica si el resultado léxico es concluyente por sí solo.
+
+    Lo es cuando el mejor resultado supera `min_score` y aventaja al
+    segundo al menos `ratio` veces (p. ej. un código o nombre exacto que
+    solo aparece en un chunk).
+    """
+    if not scores or scores[0] < min_score:
+        return False
+    return len(scores) == 1 or scores[0] >= ratio * max(scores[1], 1e-9)
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[Document]],
+    k: int,
+    rrf_k: int = 60,
+) -> List[Document]:
+    """
+    Fusiona varias listas ordenadas con Reciprocal Rank Fusion.
+
+    score(d) = Σ 1 / (rrf_k + posición de d en cada lista)
+
+    Args:
+        rankings: Listas de documentos ordenadas por relevancia
+        k: Número de documentos a retornar
+        rrf_k: Constante de suavizado (60 es el valor habitual)
+
+    Returns:
+        Los `k` documentos con mayor puntuación fusionada
+    """
+    scores: Dict[str, float] = {}
+    documents: Dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            key = doc.id or doc.page_content
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+            documents.setdefault(key, doc)
+
+    ordered = sorted(scores, key=scores.get, reverse=True)
+    return [documents[key] for key in ordered[:k]]
+
+
+def rebuild_from(index: LexicalIndex, batches) -> int:
+    """
+    Reconstruye el índice a partir de lotes (ids, textos, metadatos).
+
+    Returns:
+        Número de chunks indexados
+    """
+    index.clear()
+    total = 0
+    for ids, texts, metadatas in batches:
+        index.upsert(ids, texts, metadatas)
+        total += len(ids)
+    return total
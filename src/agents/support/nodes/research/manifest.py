@@ -0,0 +1,160 @@
+"""
+Manifiesto de ingesta incremental para el vector store.
+
+Guarda, junto a ChromaDB, el hash de contenido de cada archivo indexado y
+los IDs (hashes) de los chunks que generó. Con esto, al iniciar solo se
+procesan los archivos nuevos o modificados y se eliminan los chunks de los
+archivos borrados o cambiados.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+MANIFEST_VERSION = 1
+
+
+def hash_file(path: Path, block_size: int = 1024 * 1024) -> str:
+    """Calcula el hash SHA-256 del contenido de un archivo."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_id(source: str, index: int, content: str) -> str:
+    """
+    Genera un ID determinista para un chunk.
+
+    El ID depende del archivo de origen, la posición del chunk y su
+    contenido, de modo que reindexar el mismo archivo produce los mismos IDs.
+    """
+    digest = hashlib.sha256()
+    digest.update(source.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(str(index).encode("ascii"))
+    digest.update(b"\0")
+    digest.update(content.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class IngestManifest:
+    """
+    Registro persistente de los archivos y chunks indexados.
+
+    Estructura del archivo JSON:
+        {
+            "version": 1,
+            "splitter": {...},
+            "files": {
+                "<ruta relativa>": {
+                    "sha256": "...",
+                    "size": 123,
+                    "mtime_ns": 456,
+                    "chunks": ["<chunk id>", ...]
+                }
+            }
+        }
+    """
+
+    def __init__(self, path: Path, splitter: Optional[Dict] = None):
+        self.path = path
+        self.splitter: Dict = splitter or {}
+        self.files: Dict[str, Dict] = {}
+
+    @classmethod
+    def load(cls, path: Path, splitter: Dict) -> "IngestManifest":
+        """
+        Carga el manifiesto desde disco.
+
+        Si no existe, está corrupto o fue generado con otra configuración de
+        chunking, se retorna un manifiesto vacío (lo que fuerza reindexar).
+        """
+        manifest = cls(path, splitter)
+        if not path.exists():
+            return manifest
+
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return manifest
+
+        if data.get("version") != MANIFEST_VERSION or data.get("splitter") != splitter:
+            return manifest
+
+        manifest.files = data.get("files", {})
+        return manifest
+
+    @property
+    def exists(self) -> bool:
+        """Indica si el manifiesto ya fue guardado alguna vez."""
+        return self.path.exists()
+
+    def is_unchanged(self, source: str, path: Path) -> bool:
+        """
+        Comprueba si un archivo no cambió desde la última indexación.
+
+        Primero compara tamaño y mtime (sin leer el archivo); solo si
+        difieren se calcula el hash del contenido.
+        """
+        entry = self.files.get(source)
+        if entry is None:
+            return False
+
+        stat = path.stat()
+        if entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            return True
+
+        if entry["size"] != stat.st_size:
+            return False
+
+        # Mismo tamaño pero distinto mtime (p. ej. `touch`): comparar contenido
+        if hash_file(path) == entry["sha256"]:
+            entry["mtime_ns"] = stat.st_mtime_ns
+            return True
+        return False
+
+    def record(
+        self,
+        source: str,
+        path: Path,
+        file_hash: str,
+        chunk_ids: List[str],
+        stat: Optional[os.stat_result] = None,
+    ) -> None:
+        """
+        Registra un archivo indexado con los IDs de sus chunks.
+
+        `stat` debe ser el tomado al leer el archivo, para que una
+        modificación posterior se detecte en la siguiente sincronización.
+        """
+        stat = stat or path.stat()
+        self.files[source] = {
+            "sha256": file_hash,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "chunks": chunk_ids,
+        }
+
+    def forget(self, source: str) -> List[str]:
+        """Elimina un archivo del manifiesto y retorna los IDs de sus chunks."""
+        entry = self.files.pop(source, None)
+        return entry["chunks"] if entry else []
+
+    def clear(self) -> None:
+        """Vacía el manifiesto."""
+        self.files = {}
+
+    def save(self) -> None:
+        """Guarda el manifiesto de forma atómica."""
+        data = {
+            "version": MANIFEST_VERSION,
+            "splitter": self.splitter,
+            "files": self.files,
+        }
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp_path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, self.path)
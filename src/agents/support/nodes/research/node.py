@@ -1,29 +1,103 @@
 """
 Nodo principal del agente de investigación.
+
+El agente se ejecuta en streaming: sus tokens llegan al cliente con
+`stream_mode="messages"` (`subgraphs=True`) y cada llamada a herramienta se
+anuncia como evento de progreso (`stream_mode="custom"`) en cuanto el modelo
+la decide, antes de ejecutarla.
 """
 
+import asyncio
+from typing import Any, List, Optional, Sequence
+
 from langchain.agents import create_agent
+from langchain_core.messages import AIMessageChunk, BaseMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
+
 from agents.support.state import State
+from agents.support import telemetry
+from agents.support.history import window_for
+from agents.support.llm import get_chat_model
+from agents.support.llm_cache import CACHE_AGENTS
+from agents.support.streaming import TokenClock, emit_progress
 from agents.support.nodes.research.tools import get_research_tools
 from agents.support.nodes.research.prompt import prompt_template
-from agents.support.nodes.research.vectorstore import initialize_vectorstore
-
-# Inicializar vector store al cargar el módulo
-print("[Research] Inicializando módulo de investigación...")
-initialize_vectorstore()
-print("[Research] Módulo listo")
-
-# Crear el agente de investigación sin checkpointer
-# (el checkpointer del grafo padre maneja la persistencia)
-research_agent = create_agent(
-    model="openai:gpt-4o",
-    tools=get_research_tools(),
-    system_prompt=prompt_template,
-    checkpointer=False,
+from agents.support.nodes.research.vectorstore import (
+    is_vectorstore_ready,
+    is_warmup_running,
+    wait_until_ready,
 )
 
+# Segundos que una consulta espera a un warm-up en curso antes de seguir
+# (buscar_documentos informa al modelo si el índice aún no está listo)
+WARMUP_WAIT_SECONDS = 5.0
+
+# "values" da el estado final, "updates" las llamadas a herramientas y
+# "messages" los tokens (para medir el primer token de la respuesta)
+_STREAM_MODES = ["values", "updates", "messages"]
+
+_research_agent = None
+
+
+def get_research_agent():
+    """
+    Obtiene el agente de investigación, creándolo en el primer uso.
+    
+    Se crea sin checkpointer (el checkpointer del grafo padre maneja la
+    persistencia).
+    """
+    global _research_agent
+    if _research_agent is None:
+        _research_agent = create_agent(
+            model=get_chat_model("openai:gpt-4o", cache=CACHE_AGENTS),
+            tools=get_research_tools(),
+            system_prompt=prompt_template,
+            checkpointer=False,
+        )
+    return _research_agent
+
+
+def _on_event(mode: str, data: Any, clock: TokenClock) -> Optional[dict]:
+    """
+    Procesa un evento del agente en streaming.
+    
+    Returns:
+        El estado del agente si el evento es de tipo "values", si no None
+    """
+    if mode == "values":
+        return data
+    if mode == "messages":
+        message, _ = data
+        if isinstance(message, AIMessageChunk):
+            clock.chunk(message)
+    elif mode == "updates":
+        for update in data.values():
+            if not isinstance(update, dict):
+                continue
+            for message in update.get("messages", []):
+                for call in getattr(message, "tool_calls", None) or []:
+                    emit_progress("research", call["name"], args=call["args"])
+    return None
+
+
+def _saved_notes(state: State, messages: Sequence[BaseMessage]) -> List[str]:
+    """`saved_notes` con las notas que `guardar_nota` guardó en este turno."""
+    ids = [
+        str(message.artifact["note_id"])
+        for message in messages
+        if isinstance(message, ToolMessage) and message.name == "guardar_nota"
+        and isinstance(message.artifact, dict) and "note_id" in message.artifact
+    ]
+    return (state.get("saved_notes") or []) + ids
+
+
+def _result(state: State, result: dict, window: list) -> dict:
+    # Solo los mensajes nuevos: el resumen inyectado no debe acabar en el historial
+    messages = result["messages"][len(window):]
+    return {**result, "messages": messages, "saved_notes": _saved_notes(state, messages)}
 
-def research_node(state: State) -> dict:
+
+def research_node(state: State, config: RunnableConfig) -> dict:
     """
     Nodo que maneja investigación y búsqueda de información.
     
@@ -32,18 +106,47 @@ def research_node(state: State) -> dict:
     2. Invoca el agente de investigación que decide qué herramientas usar
     3. Retorna la respuesta generada
     
+    El vector store no se inicializa al importar el módulo: si hay un
+    warm-up en segundo plano en curso se espera un tiempo acotado, y si no
+    se ha iniciado, la primera búsqueda lo inicializa.
+    
     Args:
         state: Estado actual del grafo con el historial de mensajes
+        config: Configuración de la ejecución (callbacks, thread, ...)
         
     Returns:
         Diccionario con los mensajes actualizados
     """
-    print("[Research Node] Procesando consulta de investigación...")
+    if not is_vectorstore_ready() and is_warmup_running():
+        telemetry.event("research_warmup_wait")
+        wait_until_ready(WARMUP_WAIT_SECONDS)
     
-    # El agente procesa automáticamente los mensajes
+    # El agente recibe los turnos recientes + el resumen (no el historial completo)
     # y usa las herramientas según necesite
-    result = research_agent.invoke(state)
+    window = window_for("research", state)
+    clock = TokenClock("research")
+    result = None
+    for mode, data in get_research_agent().stream({**state, "messages": window}, config, stream_mode=_STREAM_MODES):
+        result = _on_event(mode, data, clock) or result
+    clock.done()
+    return _result(state, result, window)
+
+
+async def aresearch_node(state: State, config: RunnableConfig) -> dict:
+    """
+    Versión asíncrona de `research_node`.
     
-    print("[Research Node] Consulta procesada")
+    La espera al warm-up se hace en un hilo y el agente se ejecuta con
+    `astream`, así que `buscar_documentos` usa su versión asíncrona.
+    """
+    if not is_vectorstore_ready() and is_warmup_running():
+        telemetry.event("research_warmup_wait")
+        await asyncio.to_thread(wait_until_ready, WARMUP_WAIT_SECONDS)
     
-    return result
\ No newline at end of file
+    window = window_for("research", state)
+    clock = TokenClock("research")
+    result = None
+    async for mode, data in get_research_agent().astream({**state, "messages": window}, config, stream_mode=_STREAM_MODES):
+        result = _on_event(mode, data, clock) or result
+    clock.done()
+    return _result(state, result, window)
@@ -0,0 +1,239 @@
+"""
+Almacén persistente de notas del usuario (SQLite en modo WAL + FTS5).
+
+Cada nota pertenece a un usuario y a la conversación (thread) en la que se
+guardó: el listado y la búsqueda se hacen siempre dentro del usuario y,
+opcionalmente, solo en la conversación actual.
+
+- Listado paginado, de la más reciente a la más antigua, con filtros por
+  conversación y antigüedad (índices por usuario/thread y fecha).
+- Búsqueda BM25 sobre título y contenido con el mismo tokenizador que el
+  índice léxico (ignora mayúsculas y tildes). Las claves del usuario y de
+  la conversación son columnas más del índice FTS5, así que la consulta
+  solo recorre las notas de ese usuario aunque la base tenga las de muchos.
+  Si una consulta coincide con muchísimas notas, solo se ordenan por
+  relevancia las `MAX_RANKED_MATCHES` más recientes (el coste de BM25
+  crece con el número de coincidencias).
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+from agents.support.nodes.research.lexical import query_terms
+
+# Coincidencias (las más recientes) que se ordenan por BM25 en cada búsqueda
+MAX_RANKED_MATCHES = 500
+
+
+@dataclass(frozen=True)
+class Note:
+    """Nota guardada."""
+    id: int
+    thread_id: str
+    title: str
+    content: str
+    created: float
+    snippet: Optional[str] = None  # Fragmento que coincide (solo en búsquedas)
+
+
+@dataclass(frozen=True)
+class NotesPage:
+    """Una página del listado de notas."""
+    notes: List[Note]
+    total: int
+    offset: int
+
+    @property
+    def has_more(self) -> bool:
+        return self.offset + len(self.notes) < self.total
+
+
+def _key(prefix: str, *parts: str) -> str:
+    """Token del usuario o de la conversación en el índice FTS5 (alfanumérico)."""
+    return prefix + hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()[:24]
+
+
+def _user_key(user_id: str) -> str:
+    return _key("u", user_id)
+
+
+def _thread_key(user_id: str, thread_id: str) -> str:
+    return _key("t", user_id, thread_id)
+
+
+class NotesStore:
+    """
+    Notas en SQLite con índice de texto completo.
+
+    Tablas:
+        notes: notas (usuario, thread, título, contenido, fecha)
+        notes_fts: índice invertido de título, contenido y claves del
+            usuario y de la conversación (contenido externo apuntando a notes)
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS notes (
+                id INTEGER PRIMARY KEY,
+                user_id TEXT NOT NULL,
+                user_key TEXT NOT NULL,
+                thread_key TEXT NOT NULL,
+                thread_id TEXT NOT NULL,
+                title TEXT NOT NULL,
+                content TEXT NOT NULL,
+                created REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_notes_user ON notes(user_id, created DESC, id DESC);
+            CREATE INDEX IF NOT EXISTS idx_notes_thread ON notes(user_id, thread_id, created DESC, id DESC);
+            CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+                title,
+                content,
+                user_key,
+                thread_key,
+                content='notes',
+                content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            );
+            """
+        )
+        # Ranking por defecto (`rank`): el título pesa el doble, las claves nada
+        self._conn.execute("INSERT INTO notes_fts(notes_fts, rank) VALUES('rank', 'bm25(2.0, 1.0, 0.0, 0.0)')")
+        self._conn.commit()
+
+    def add(self, user_id: str, thread_id: str, title: str, content: str) -> Note:
+        """Guarda una nota y la indexa."""
+        now = time.time()
+        user_key, thread_key = _user_key(user_id), _thread_key(user_id, thread_id)
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO notes (user_id, user_key, thread_key, thread_id, title, content, created) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (user_id, user_key, thread_key, thread_id, title, content, now),
+            )
+            self._conn.execute(
+                "INSERT INTO notes_fts(rowid, title, content, user_key, thread_key) VALUES (?, ?, ?, ?, ?)",
+                (cursor.lastrowid, title, content, user_key, thread_key),
+            )
+            self._conn.commit()
+        return Note(cursor.lastrowid, thread_id, title, content, now)
+
+    def delete(self, user_id: str, note_id: int) -> bool:
+        """Elimina una nota del usuario. Retorna False si no existe."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT title, content, user_key, thread_key FROM notes WHERE id = ? AND user_id = ?",
+                (note_id, user_id),
+            ).fetchone()
+            if row is None:
+                return False
+            self._conn.execute(
+                "INSERT INTO notes_fts(notes_fts, rowid, title, content, user_key, thread_key) "
+                "VALUES('delete', ?, ?, ?, ?, ?)",
+                (note_id, *row),
+            )
+            self._conn.execute("DELETE FROM notes WHERE id = ?", (note_id,))
+            self._conn.commit()
+        return True
+
+    def list(
+        self,
+        user_id: str,
+        thread_id: Optional[str] = None,
+        since: Optional[float] = None,
+        limit: int = 10,
+        offset: int = 0,
+    ) -> NotesPage:
+        """
+        Lista las notas del usuario, de la más reciente a la más antigua.
+
+        Args:
+            user_id: Usuario
+            thread_id: Solo las notas de esta conversación (None = todas)
+            since: Solo las notas creadas a partir de este instante (epoch)
+            limit: Notas por página
+            offset: Notas a saltar (página * limit)
+        """
+        where, params = ["user_id = ?"], [user_id]
+        if thread_id is not None:
+            where.append("thread_id = ?")
+            params.append(thread_id)
+        if since is not None:
+            where.append("created >= ?")
+            params.append(since)
+        condition = " AND ".join(where)
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM notes WHERE {condition}", params).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT id, thread_id, title, content, created FROM notes WHERE {condition} "
+                "ORDER BY created DESC, id DESC LIMIT ? OFFSET ?",
+                (*params, limit, offset),
+            ).fetchall()
+        return NotesPage([Note(*row) for row in rows], total, offset)
+
+    def search(self, user_id: str, query: str, thread_id: Optional[str] = None, k: int = 5) -> List[Note]:
+        """
+        Busca notas del usuario con BM25 sobre título y contenido.
+
+        Returns:
+            Hasta `k` notas, de mayor a menor relevancia, con el fragmento
+            que coincide en `snippet`
+        """
+        terms = query_terms(query)
+        if not terms:
+            return []
+
+        # Cada término entre comillas (literal); usuario y conversación como filtros del propio índice
+        words = " OR ".join('"' + term.replace('"', '""') + '"' for term in terms)
+        scope = f'user_key:"{_user_key(user_id)}"'
+        if thread_id is not None:
+            scope = f'thread_key:"{_thread_key(user_id, thread_id)}"'
+        match = f"{scope} AND {{title content}}:({words})"
+        with self._lock:
+            # Solo las MAX_RANKED_MATCHES coincidencias más recientes pasan por BM25
+            row = self._conn.execute(
+                "SELECT rowid FROM notes_fts WHERE notes_fts MATCH ? ORDER BY rowid DESC LIMIT 1 OFFSET ?",
+                (match, MAX_RANKED_MATCHES - 1),
+            ).fetchone()
+            rows = self._conn.execute(
+                "SELECT n.id, n.thread_id, n.title, n.content, n.created, "
+                "snippet(notes_fts, 1, '«', '»', '…', 24) "
+                "FROM notes_fts JOIN notes n ON n.id = notes_fts.rowid "
+                "WHERE notes_fts MATCH ? AND notes_fts.rowid >= ? ORDER BY rank LIMIT ?",
+                (match, row[0] if row else 0, k),
+            ).fetchall()
+        return [Note(*row) for row in rows]
+
+    def count(self, user_id: str) -> int:
+        """Número de notas del usuario."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM notes WHERE user_id = ?", (user_id,)).fetchone()[0]
+
+
+# ====================================
+# Instancia compartida
+# ====================================
+_store: Optional[NotesStore] = None
+_store_lock = threading.Lock()
+
+
+def get_notes_store() -> NotesStore:
+    """Obtiene (o crea la primera vez) el almacén de notas en `datos/notes.sqlite3`."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                from agents.support.nodes.research.config import get_notes_file
+
+                _store = NotesStore(get_notes_file())
+    return _store
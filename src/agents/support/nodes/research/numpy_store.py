@@ -0,0 +1,518 @@
+"""
+Vector store local sobre una matriz de embeddings mapeada en memoria (NumPy).
+
+Para corpus pequeños y medianos una búsqueda exacta vectorizada sobre la
+matriz completa es más rápida que un índice ANN y no tiene el coste de
+arranque de Chroma. Ofrece la misma superficie que `vectorstore.py` usa de
+Chroma (`upsert`/`count`/`get` de la colección, `delete`,
+`reset_collection` y MMR por vector), así que se puede elegir uno u otro con
+`RESEARCH_VECTOR_BACKEND`.
+
+Formato en disco (un directorio por tipo de dato):
+    index.json      dimensión y tipo de dato de la matriz
+    vectors.bin     matriz append-only, una fila por chunk (vectores normalizados)
+    scales.bin      escala por fila (solo int8)
+    meta.jsonl      sidecar append-only: altas (fila, id, texto, metadatos) y bajas
+
+Actualizar o borrar un chunk marca su fila como muerta; cuando las filas
+muertas superan la mitad, el directorio se compacta.
+"""
+
+import json
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+DTYPES = {
+    "float32": np.float32,
+    "float16": np.float16,
+    "int8": np.int8,
+}
+
+# Filas por bloque al puntuar: acota la memoria temporal al convertir float16/int8
+_SCORE_BLOCK_ROWS = 65536
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def quantize(vectors: np.ndarray, dtype: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Convierte vectores normalizados al tipo de dato de la matriz.
+
+    Returns:
+        Tupla con (filas en `dtype`, escala por fila o None si no es int8)
+    """
+    if dtype != "int8":
+        return vectors.astype(DTYPES[dtype]), None
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    rows = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return rows, scales.astype(np.float32)
+
+
+def maximal_marginal_relevance(
+    query: np.ndarray,
+    candidates: np.ndarray,
+    k: int,
+    lambda_mult: float = 0.5,
+) -> List[int]:
+    """
+    MMR vectorizado sobre vectores normalizados.
+
+    La similitud con el conjunto ya elegido se mantiene como un vector de
+    máximos que se actualiza con una sola fila de la matriz de similitudes
+    por paso, en lugar de recalcularla para cada candidato.
+
+    Args:
+        query: Vector de la consulta normalizado (d,)
+        candidates: Candidatos normalizados (n, d)
+        k: Número de índices a elegir
+        lambda_mult: Balance relevancia/diversidad (1 = solo relevancia)
+
+    Returns:
+        Índices de `candidates` en orden de selección
+    """
+    n = len(candidates)
+    if n == 0 or k <= 0:
+        return []
+
+    relevance = candidates @ query
+    pairwise = candidates @ candidates.T
+    redundancy = np.full(n, -np.inf, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+
+    selected = [int(np.argmax(relevance))]
+    available[selected[0]] = False
+    redundancy = np.maximum(redundancy, pairwise[selected[0]])
+
+    while len(selected) < min(k, n):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, pairwise[best])
+    return selected
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    Vector store exacto sobre una matriz mmap.
+
+    Args:
+        embedding_function: Modelo de embeddings (para búsquedas por texto)
+        directory: Directorio del índice
+        dtype: "float32", "float16" o "int8"
+    """
+
+    def __init__(
+        self,
+        embedding_function: Embeddings,
+        directory: Path,
+        dtype: str = "float32",
+    ):
+        if dtype not in DTYPES:
+            raise ValueError(f"Tipo de dato no soportado: {dtype!r} (opciones: {tuple(DTYPES)})")
+        self._embedding_function = embedding_function
+        self.directory = Path(directory)
+        self.dtype = dtype
+        self._lock = threading.RLock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._load()
+
+    # ------------------------------------
+    # Archivos
+    # ------------------------------------
+    @property
+    def _header_path(self) -> Path:
+        return self.directory / "index.json"
+
+    @property
+    def _vectors_path(self) -> Path:
+        return self.directory / "vectors.bin"
+
+    @property
+    def _scales_path(self) -> Path:
+        return self.directory / "scales.bin"
+
+    @property
+    def _meta_path(self) -> Path:
+        return self.directory / "meta.jsonl"
+
+    def _row_bytes(self) -> int:
+        return self._dim * np.dtype(DTYPES[self.dtype]).itemsize
+
+    def _load(self) -> None:
+        """Lee el índice del disco (reproduce el sidecar)."""
+        self._dim: Optional[int] = None
+        self._rows = 0
+        self._row_of: Dict[str, int] = {}
+        self._records: Dict[int, Tuple[str, str, Dict]] = {}
+        self._alive = np.zeros(0, dtype=bool)
+        self._matrix: Optional[np.memmap] = None
+        self._scales: Optional[np.memmap] = None
+
+        if self._header_path.exists():
+            header = json.loads(self._header_path.read_text())
+            if header.get("dtype") == self.dtype:
+                self._dim = header["dim"]
+        if self._dim is None:
+            self._clear_files()
+            return
+
+        # Filas completas en disco (una escritura interrumpida deja una fila parcial)
+        self._rows = self._vectors_path.stat().st_size // self._row_bytes() if self._vectors_path.exists() else 0
+        if self.dtype == "int8":
+            scale_rows = self._scales_path.stat().st_size // 4 if self._scales_path.exists() else 0
+            self._rows = min(self._rows, scale_rows)
+            self._truncate(self._scales_path, self._rows * 4)
+        self._truncate(self._vectors_path, self._rows * self._row_bytes())
+
+        if self._meta_path.exists():
+            with self._meta_path.open(encoding="utf-8") as fh:
+                for line in fh:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        break  # línea final incompleta
+                    row = entry["row"]
+                    if "id" in entry:
+                        if row < self._rows:
+                            previous = self._row_of.get(entry["id"])
+                            if previous is not None:
+                                self._records.pop(previous, None)
+                            self._row_of[entry["id"]] = row
+                            self._records[row] = (entry["id"], entry["text"], entry["metadata"])
+                    elif row in self._records:
+                        chunk_id = self._records.pop(row)[0]
+                        if self._row_of.get(chunk_id) == row:
+                            del self._row_of[chunk_id]
+
+        self._alive = np.zeros(self._rows, dtype=bool)
+        if self._records:
+            self._alive[list(self._records)] = True
+
+    @staticmethod
+    def _truncate(path: Path, size: int) -> None:
+        """Descarta una fila parcial al final (para que las siguientes queden alineadas)."""
+        if path.exists() and path.stat().st_size > size:
+            with path.open("r+b") as fh:
+                fh.truncate(size)
+
+    def _clear_files(self) -> None:
+        for path in (self._header_path, self._vectors_path, self._scales_path, self._meta_path):
+            path.unlink(missing_ok=True)
+
+    def _mapped(self) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+        """Matriz (y escalas) mapeadas en memoria; se vuelven a mapear tras escribir."""
+        if self._rows == 0:
+            return None, None
+        if self._matrix is None or len(self._matrix) != self._rows:
+            self._matrix = np.memmap(
+                self._vectors_path, dtype=DTYPES[self.dtype], mode="r", shape=(self._rows, self._dim)
+            )
+            if self.dtype == "int8":
+                self._scales = np.memmap(self._scales_path, dtype=np.float32, mode="r", shape=(self._rows,))
+        return self._matrix, self._scales
+
+    def _append_meta(self, entries: Iterable[Dict], path: Optional[Path] = None) -> None:
+        with (path or self._meta_path).open("a", encoding="utf-8") as fh:
+            fh.writelines(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n" for entry in entries)
+
+    # ------------------------------------
+    # Superficie de colección (como `Chroma._collection`)
+    # ------------------------------------
+    @property
+    def _collection(self) -> "NumpyVectorStore":
+        # vectorstore.py accede a la colección de Chroma para upsert/count/get
+        return self
+
+    def count(self) -> int:
+        """Número de chunks vivos."""
+        return len(self._row_of)
+
+    def upsert(
+        self,
+        ids: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        documents: Sequence[str],
+        metadatas: Optional[Sequence[Optional[Dict]]] = None,
+    ) -> None:
+        """Añade o reemplaza chunks con sus vectores ya calculados."""
+        if not ids:
+            return
+        vectors = _normalize(np.asarray(embeddings, dtype=np.float32))
+        metadatas = metadatas or [None] * len(ids)
+
+        with self._lock:
+            if self._dim is None:
+                self._dim = vectors.shape[1]
+                self._header_path.write_text(json.dumps({"dim": self._dim, "dtype": self.dtype}))
+            elif vectors.shape[1] != self._dim:
+                raise ValueError(f"Dimensión {vectors.shape[1]} distinta de la del índice ({self._dim})")
+
+            # Si el id se repite en el lote, gana la última aparición
+            last = {chunk_id: i for i, chunk_id in enumerate(ids)}
+            order = sorted(last.values())
+            rows, scales = quantize(vectors[order], self.dtype)
+
+            # Matriz primero y sidecar después: una fila sin metadatos se ignora al cargar
+            with self._vectors_path.open("ab") as fh:
+                fh.write(rows.tobytes())
+            if scales is not None:
+                with self._scales_path.open("ab") as fh:
+                    fh.write(scales.tobytes())
+
+            start = self._rows
+            self._alive = np.concatenate([self._alive, np.ones(len(order), dtype=bool)])
+            entries = []
+            for offset, i in enumerate(order):
+                row = start + offset
+                previous = self._row_of.get(ids[i])
+                if previous is not None:
+                    self._records.pop(previous, None)
+                    self._alive[previous] = False
+                self._row_of[ids[i]] = row
+                self._records[row] = (ids[i], documents[i], metadatas[i] or {})
+                entries.append({"row": row, "id": ids[i], "text": documents[i], "metadata": metadatas[i] or {}})
+            self._append_meta(entries)
+
+            self._rows += len(order)
+
+    def get(
+        self,
+        ids: Optional[Sequence[str]] = None,
+        include: Sequence[str] = ("documents", "metadatas"),
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> Dict[str, List]:
+        """Lee chunks por id o por páginas (mismo formato que Chroma)."""
+        with self._lock:
+            if ids is not None:
+                rows = [self._row_of[chunk_id] for chunk_id in ids if chunk_id in self._row_of]
+            else:
+                rows = sorted(self._records)
+                rows = rows[offset:offset + limit] if limit is not None else rows[offset:]
+            records = [self._records[row] for row in rows]
+
+        result: Dict[str, List] = {"ids": [record[0] for record in records]}
+        if "documents" in include:
+            result["documents"] = [record[1] for record in records]
+        if "metadatas" in include:
+            result["metadatas"] = [record[2] for record in records]
+        return result
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> None:
+        """Marca chunks como eliminados."""
+        if not ids:
+            return
+        with self._lock:
+            entries = []
+            for chunk_id in ids:
+                row = self._row_of.pop(chunk_id, None)
+                if row is not None:
+                    self._records.pop(row, None)
+                    self._alive[row] = False
+                    entries.append({"row": row})
+            if entries:
+                self._append_meta(entries)
+            if self._rows and len(self._records) < self._rows // 2:
+                self._compact()
+
+    def reset_collection(self) -> None:
+        """Vacía el índice."""
+        with self._lock:
+            self._matrix = self._scales = None
+            self._clear_files()
+            self._load()
+
+    def _compact(self) -> None:
+        """Reescribe la matriz y el sidecar solo con las filas vivas."""
+        matrix, scales = self._mapped()
+        rows = sorted(self._records)
+        records = [self._records[row] for row in rows]
+        kept = np.array(matrix[rows]) if rows else None
+        kept_scales = np.array(scales[rows]) if rows and scales is not None else None
+
+        self._matrix = self._scales = None
+        for path, data in ((self._vectors_path, kept), (self._scales_path, kept_scales)):
+            if data is None:
+                path.unlink(missing_ok=True)
+                continue
+            tmp = path.with_suffix(".tmp")
+            tmp.write_bytes(data.tobytes())
+            os.replace(tmp, path)
+
+        tmp = self._meta_path.with_suffix(".tmp")
+        tmp.unlink(missing_ok=True)
+        self._append_meta(
+            (
+                {"row": row, "id": chunk_id, "text": text, "metadata": metadata}
+                for row, (chunk_id, text, metadata) in enumerate(records)
+            ),
+            path=tmp,
+        )
+        os.replace(tmp, self._meta_path)
+        self._load()
+
+    # ------------------------------------
+    # Búsqueda
+    # ------------------------------------
+    def _scores(self, queries: np.ndarray) -> np.ndarray:
+        """Similitud coseno de cada consulta con todas las filas (muertas = -inf)."""
+        matrix, scales = self._mapped()
+        scores = np.empty((len(queries), self._rows), dtype=np.float32)
+        for start in range(0, self._rows, _SCORE_BLOCK_ROWS):
+            block = np.asarray(matrix[start:start + _SCORE_BLOCK_ROWS], dtype=np.float32)
+            part = queries @ block.T
+            if scales is not None:
+                part *= scales[start:start + _SCORE_BLOCK_ROWS]
+            scores[:, start:start + _SCORE_BLOCK_ROWS] = part
+        scores[:, ~self._alive] = -np.inf
+        return scores
+
+    def search_by_vectors(self, embeddings: Sequence[Sequence[float]], k: int) -> List[List[Tuple[int, float]]]:
+        """
+        Top-k exacto para un lote de consultas (una sola multiplicación de matrices).
+
+        Las filas solo son válidas mientras no haya una compactación (que
+        renumera): para convertirlas en documentos, llamar con `self._lock`
+        tomado y mapearlas dentro del mismo bloque.
+
+        Returns:
+            Para cada consulta, lista de (fila, similitud) de mayor a menor
+        """
+        queries = _normalize(np.atleast_2d(np.asarray(embeddings, dtype=np.float32)))
+        with self._lock:
+            alive = len(self._records)
+            if alive == 0 or k <= 0:
+                return [[] for _ in queries]
+            scores = self._scores(queries)
+
+            k = min(k, alive)
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            results = []
+            for query_scores, rows in zip(scores, top):
+                rows = rows[np.argsort(-query_scores[rows])]
+                results.append([(int(row), float(query_scores[row])) for row in rows])
+            return results
+
+    def _document(self, row: int) -> Document:
+        chunk_id, text, metadata = self._records[row]
+        return Document(id=chunk_id, page_content=text, metadata=dict(metadata))
+
+    def _rows_as_float(self, rows: Sequence[int]) -> np.ndarray:
+        matrix, scales = self._mapped()
+        vectors = np.asarray(matrix[list(rows)], dtype=np.float32)
+        if scales is not None:
+            vectors *= np.asarray(scales[list(rows)])[:, None]
+        return _normalize(vectors)
+
+    def similarity_search_by_vector_with_score(
+        self, embedding: Sequence[float], k: int = 4
+    ) -> List[Tuple[Document, float]]:
+        """Top-k exacto por similitud coseno."""
+        # Búsqueda y mapeo fila → documento sin soltar el lock (ver search_by_vectors)
+        with self._lock:
+            hits = self.search_by_vectors([embedding], k)[0]
+            return [(self._document(row), score) for row, score in hits if row in self._records]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k)]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return self.similarity_search_by_vector(self._embedding_function.embed_query(query), k)
+
+    def _similarity_search_with_relevance_scores(
+        self, query: str, k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        embedding = self._embedding_function.embed_query(query)
+        return [
+            (doc, (score + 1) / 2)
+            for doc, score in self.similarity_search_by_vector_with_score(embedding, k)
+        ]
+
+    def max_marginal_relevance_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        **kwargs: Any,
+    ) -> List[Document]:
+        """MMR: top `fetch_k` exacto y selección diversa vectorizada."""
+        query = _normalize(np.asarray(embedding, dtype=np.float32))
+        with self._lock:
+            hits = self.search_by_vectors([embedding], fetch_k)[0]
+            if not hits:
+                return []
+            rows = [row for row, _ in hits if row in self._records]
+            candidates = self._rows_as_float(rows)
+            chosen = maximal_marginal_relevance(query, candidates, k, lambda_mult)
+            return [self._document(rows[i]) for i in chosen]
+
+    def max_marginal_relevance_search(
+        self,
+        query: str,
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        **kwargs: Any,
+    ) -> List[Document]:
+        embedding = self._embedding_function.embed_query(query)
+        return self.max_marginal_relevance_search_by_vector(embedding, k, fetch_k, lambda_mult)
+
+    # ------------------------------------
+    # Interfaz VectorStore
+    # ------------------------------------
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding_function
+
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        return lambda score: (score + 1) / 2
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[Dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        if ids is None:
+            ids = [str(uuid.uuid4()) for _ in texts]
+        self.upsert(ids, self._embedding_function.embed_documents(texts), texts, metadatas)
+        return list(ids)
+
+    def get_by_ids(self, ids: Sequence[str], /) -> List[Document]:
+        with self._lock:
+            return [self._document(self._row_of[chunk_id]) for chunk_id in ids if chunk_id in self._row_of]
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[Dict]] = None,
+        *,
+        directory: Optional[Path] = None,
+        dtype: str = "float32",
+        **kwargs: Any,
+    ) -> "NumpyVectorStore":
+        if directory is None:
+            raise ValueError("NumpyVectorStore.from_texts requiere `directory`")
+        store = cls(embedding, directory, dtype=dtype)
+        store.add_texts(texts, metadatas, ids=kwargs.get("ids"))
+        return store
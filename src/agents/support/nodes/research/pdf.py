@@ -0,0 +1,192 @@
+"""
+Ingesta de PDFs página a página.
+
+Los PDFs se procesan en tramos de páginas (`PDF_PAGES_PER_TASK`) que se
+reparten entre los procesos del pipeline de ingesta, así que un manual de
+cientos de páginas se extrae en paralelo y nunca se carga entero en memoria.
+
+El texto extraído se guarda en una caché SQLite indexada por el hash del
+archivo: un PDF que ya se extrajo una vez (aunque se reindexe, cambie de
+nombre o cambie el chunking) no se vuelve a parsear.
+"""
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from agents.support.nodes.research.manifest import chunk_id
+
+# Páginas por tarea del pool: equilibra reparto entre procesos y coste de abrir el PDF
+PDF_PAGES_PER_TASK = 8
+
+# Lector reutilizado dentro de cada proceso (abrir un PDF lee su tabla xref)
+_reader = None
+_reader_file = None
+_reader_key: Optional[Tuple] = None
+
+
+def _get_reader(path: Path):
+    """Abre el PDF (o reutiliza el ya abierto en este proceso)."""
+    global _reader, _reader_file, _reader_key
+    from pypdf import PdfReader
+
+    stat = path.stat()
+    key = (str(path), stat.st_size, stat.st_mtime_ns)
+    if _reader is None or _reader_key != key:
+        if _reader_file is not None:
+            _reader_file.close()
+        # Con un archivo abierto pypdf lee los objetos bajo demanda;
+        # con una ruta cargaría el PDF entero en memoria
+        _reader_file = open(path, "rb")
+        _reader = PdfReader(_reader_file)
+        _reader_key = key
+    return _reader
+
+
+def count_pages(path: Path) -> int:
+    """Número de páginas de un PDF (solo lee la estructura, no extrae texto)."""
+    from pypdf import PdfReader
+
+    with open(path, "rb") as fh:
+        return len(PdfReader(fh).pages)
+
+
+def extract_pages(path: Path, first_page: int, count: int) -> List[str]:
+    """
+    Extrae el texto de un tramo de páginas.
+
+    Args:
+        path: Ruta del PDF
+        first_page: Primera página (empezando en 1)
+        count: Número de páginas
+
+    Returns:
+        Texto de cada página del tramo
+    """
+    reader = _get_reader(path)
+    texts = []
+    for number in range(first_page, min(first_page + count, len(reader.pages) + 1)):
+        try:
+            texts.append(reader.pages[number - 1].extract_text() or "")
+        except Exception as e:  # una página corrupta no invalida el documento
+            print(f"[Research] Error extrayendo página {number} de {path.name}: {e}")
+            texts.append("")
+    return texts
+
+
+def split_pdf_pages(
+    source: str,
+    path: Path,
+    first_page: int,
+    count: int,
+    page_texts: Optional[List[str]],
+    chunk_size: int,
+    chunk_overlap: int,
+    separators: Tuple[str, ...],
+) -> Tuple[List[str], List[str], List[int], Optional[List[str]], float]:
+    """
+    Extrae (si no viene de la caché) y divide un tramo de páginas.
+
+    Cada página se divide por separado para que cada chunk tenga una sola
+    página de origen que se pueda citar.
+
+    Returns:
+        Tupla con (ids, textos de los chunks, página de cada chunk,
+        texto extraído de cada página o None si venía de la caché,
+        segundos empleados)
+    """
+    from agents.support.nodes.research.ingest import _get_splitter
+
+    start = time.perf_counter()
+    extracted = None
+    if page_texts is None:
+        page_texts = extracted = extract_pages(path, first_page, count)
+
+    splitter = _get_splitter(chunk_size, chunk_overlap, separators)
+    ids: List[str] = []
+    texts: List[str] = []
+    pages: List[int] = []
+    for number, text in enumerate(page_texts, start=first_page):
+        for i, content in enumerate(splitter.split_text(text)):
+            ids.append(chunk_id(f"{source}#page={number}", i, content))
+            texts.append(content)
+            pages.append(number)
+    return ids, texts, pages, extracted, time.perf_counter() - start
+
+
+class PdfTextCache:
+    """
+    Caché SQLite del texto extraído de PDFs, por hash de archivo.
+
+    Tablas:
+        files: hash del archivo → número de páginas
+        pages: (hash, página) → texto extraído
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                file_hash TEXT PRIMARY KEY,
+                pages INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS pages (
+                file_hash TEXT NOT NULL,
+                page INTEGER NOT NULL,
+                text TEXT NOT NULL,
+                PRIMARY KEY (file_hash, page)
+            ) WITHOUT ROWID;
+            """
+        )
+        self._conn.commit()
+
+    def page_count(self, file_hash: str) -> Optional[int]:
+        """Número de páginas de un PDF ya visto, o None."""
+        with self._lock:
+            row = self._conn.execute("SELECT pages FROM files WHERE file_hash = ?", (file_hash,)).fetchone()
+        return row[0] if row else None
+
+    def set_page_count(self, file_hash: str, pages: int) -> None:
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO files (file_hash, pages) VALUES (?, ?)", (file_hash, pages))
+            self._conn.commit()
+
+    def get_pages(self, file_hash: str, first_page: int, count: int) -> Optional[List[str]]:
+        """Texto de un tramo de páginas, o None si falta alguna."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT text FROM pages WHERE file_hash = ? AND page >= ? AND page < ? ORDER BY page",
+                (file_hash, first_page, first_page + count),
+            ).fetchall()
+        if len(rows) != count:
+            return None
+        return [row[0] for row in rows]
+
+    def put_pages(self, file_hash: str, first_page: int, texts: Sequence[str]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO pages (file_hash, page, text) VALUES (?, ?, ?)",
+                [(file_hash, first_page + i, text) for i, text in enumerate(texts)],
+            )
+            self._conn.commit()
+
+    def forget(self, file_hashes: Sequence[str]) -> None:
+        """Elimina el texto de PDFs que ya no existen."""
+        with self._lock:
+            for file_hash in file_hashes:
+                self._conn.execute("DELETE FROM pages WHERE file_hash = ?", (file_hash,))
+                self._conn.execute("DELETE FROM files WHERE file_hash = ?", (file_hash,))
+            self._conn.commit()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            files = self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+            pages = self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+        return {"files": files, "pages": pages}
@@ -0,0 +1,191 @@
+"""
+Caché de resultados de búsqueda para `search_documents`.
+
+La clave es la consulta normalizada más `k` y los parámetros de búsqueda,
+y cada entrada recuerda la versión del corpus con la que se calculó: cuando
+el corpus cambia (ingesta, recarga o reinicio) la versión sube y los
+resultados anteriores dejan de servirse.
+
+Opcionalmente, el modo semántico reutiliza resultados de una consulta
+distinta si su embedding es suficientemente parecido al de una cacheada.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from agents.support.nodes.research.embeddings import normalize_text
+
+
+@dataclass
+class _Entry:
+    documents: List[Document]
+    version: int
+    created_at: float
+    params_key: Tuple
+    embedding: Optional[np.ndarray] = None
+
+
+class QueryResultCache:
+    """
+    Caché LRU con TTL de resultados de búsqueda.
+
+    Args:
+        max_entries: Número máximo de consultas cacheadas
+        ttl_seconds: Vida máxima de una entrada
+        semantic_threshold: Similitud coseno mínima para un acierto
+            semántico (None desactiva el modo semántico)
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl_seconds: float = 300.0,
+        semantic_threshold: Optional[float] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.semantic_threshold = semantic_threshold
+        self._entries: "OrderedDict[Tuple, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {
+            "hits": 0,
+            "semantic_hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "evictions": 0,
+            "invalidations": 0,
+        }
+
+    @property
+    def semantic(self) -> bool:
+        """Indica si el modo semántico está activo."""
+        return self.semantic_threshold is not None
+
+    @staticmethod
+    def _params_key(k: int, params: Dict) -> Tuple:
+        return (k, tuple(sorted(params.items())))
+
+    def _is_valid(self, entry: _Entry, version: int, now: float) -> bool:
+        return entry.version == version and now - entry.created_at <= self.ttl_seconds
+
+    def get(self, query: str, k: int, params: Dict, version: int) -> Optional[List[Document]]:
+        """Busca un resultado exacto (consulta normalizada + parámetros)."""
+        key = (normalize_text(query).lower(),) + self._params_key(k, params)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not self._is_valid(entry, version, now):
+                del self._entries[key]
+                self._counters["expired"] += 1
+                entry = None
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+            return list(entry.documents)
+
+    def get_similar(
+        self,
+        embedding: Sequence[float],
+        k: int,
+        params: Dict,
+        version: int,
+    ) -> Optional[List[Document]]:
+        """
+        Busca un resultado de una consulta semánticamente equivalente.
+
+        Solo compara con entradas de los mismos parámetros y versión.
+        """
+        if not self.semantic:
+            return None
+
+        params_key = self._params_key(k, params)
+        query = np.asarray(embedding, dtype=np.float32)
+        query_norm = np.linalg.norm(query)
+        if query_norm == 0:
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            candidates = [
+                (key, entry)
+                for key, entry in self._entries.items()
+                if entry.embedding is not None
+                and entry.params_key == params_key
+                and self._is_valid(entry, version, now)
+            ]
+            if not candidates:
+                return None
+
+            matrix = np.stack([entry.embedding for _, entry in candidates])
+            scores = matrix @ (query / query_norm)
+            best = int(np.argmax(scores))
+            if scores[best] < self.semantic_threshold:
+                return None
+
+            key, entry = candidates[best]
+            self._entries.move_to_end(key)
+            self._counters["semantic_hits"] += 1
+            return list(entry.documents)
+
+    def record_miss(self) -> None:
+        """Cuenta una búsqueda que no se pudo servir desde la caché."""
+        with self._lock:
+            self._counters["misses"] += 1
+
+    def put(
+        self,
+        query: str,
+        k: int,
+        params: Dict,
+        version: int,
+        documents: List[Document],
+        embedding: Optional[Sequence[float]] = None,
+    ) -> None:
+        """Guarda el resultado de una búsqueda."""
+        params_key = self._params_key(k, params)
+        key = (normalize_text(query).lower(),) + params_key
+
+        normalized = None
+        if self.semantic and embedding is not None:
+            vector = np.asarray(embedding, dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            if norm > 0:
+                normalized = vector / norm
+
+        entry = _Entry(
+            documents=list(documents),
+            version=version,
+            created_at=time.monotonic(),
+            params_key=params_key,
+            embedding=normalized,
+        )
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def invalidate(self) -> None:
+        """Descarta todas las entradas (el corpus cambió)."""
+        with self._lock:
+            self._entries.clear()
+            self._counters["invalidations"] += 1
+
+    def stats(self) -> Dict:
+        """Contadores de la caché."""
+        with self._lock:
+            counters = dict(self._counters)
+            counters["entries"] = len(self._entries)
+        lookups = counters["hits"] + counters["semantic_hits"] + counters["misses"]
+        counters["hit_rate"] = (
+            (counters["hits"] + counters["semantic_hits"]) / lookups if lookups else 0.0
+        )
+        return counters
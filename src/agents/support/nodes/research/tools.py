@@ -2,20 +2,72 @@
 Herramientas para el agente de investigación.
 """
 
-from typing import List, Tuple
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
 from langchain.tools import tool
-from langchain_tavily import TavilySearch
+from langchain_core.documents import Document
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import BaseTool, StructuredTool
+from pydantic import BaseModel, ConfigDict, Field
 
-from agents.support.nodes.research.vectorstore import search_documents
+from agents.support import telemetry
+from agents.support.nodes.research.config import get_config
+from agents.support.nodes.research.notes import Note, get_notes_store
+from agents.support.nodes.research.web_cache import WebSearchCache
+from agents.support.nodes.research.vectorstore import (
+    asearch_documents,
+    is_vectorstore_ready,
+    is_warmup_running,
+    search_documents,
+)
 
 
-@tool(response_format="content_and_artifact")
-def buscar_documentos(consulta: str) -> Tuple[str, List[dict]]:
+# Mensaje cuando el índice se está construyendo en segundo plano
+_INDEXANDO = (
+    "La base de conocimientos local todavía se está indexando. "
+    "Intenta de nuevo en unos segundos o usa la búsqueda web."
+)
+
+
+def _cita(doc: Document) -> str:
+    """Fuente del documento, con la página si viene de un PDF."""
+    fuente = doc.metadata.get("source", "desconocida")
+    pagina = doc.metadata.get("page")
+    return f"{fuente}, página {pagina}" if pagina is not None else fuente
+
+
+def _format_documents(docs: List[Document]) -> Tuple[str, List[dict]]:
+    """Formatea los documentos encontrados como (contenido, metadatos)."""
+    if not docs:
+        return "No se encontró información relevante en los documentos locales.", []
+    
+    # Formatear contenido para el modelo
+    contenido = "\n\n".join([
+        f"[Fuente: {_cita(doc)}]\n{doc.page_content}"
+        for doc in docs
+    ])
+    
+    # Metadatos como artefacto
+    metadatos = [
+        {
+            "fuente": doc.metadata.get("source", "desconocida"),
+            "pagina": doc.metadata.get("page"),
+            "preview": doc.page_content[:200] + "..." if len(doc.page_content) > 200 else doc.page_content
+        }
+        for doc in docs
+    ]
+    
+    return contenido, metadatos
+
+
+def _buscar_documentos(consulta: str) -> Tuple[str, List[dict]]:
     """
     Busca información en la base de conocimientos local del usuario.
     
     Usa esta herramienta cuando el usuario pregunte sobre temas que
     podrían estar en los documentos que ha cargado en el sistema.
+    Cada resultado indica su fuente (y la página, en PDFs) para citarla.
     
     Args:
         consulta: La pregunta o tema a buscar en los documentos locales
@@ -23,42 +75,41 @@ def buscar_documentos(consulta: str) -> Tuple[str, List[dict]]:
     Returns:
         Tupla con (contenido formateado, metadatos de los documentos)
     """
+    # Si el índice se está construyendo en segundo plano, no bloquear el turno
+    if not is_vectorstore_ready() and is_warmup_running():
+        return _INDEXANDO, []
+    
     try:
-        docs = search_documents(consulta, k=4)
-        
-        if not docs:
-            return "No se encontró información relevante en los documentos locales.", []
-        
-        # Formatear contenido para el modelo
-        contenido = "\n\n".join([
-            f"[Fuente: {doc.metadata.get('source', 'desconocida')}]\n{doc.page_content}"
-            for doc in docs
-        ])
-        
-        # Metadatos como artefacto
-        metadatos = [
-            {
-                "fuente": doc.metadata.get("source", "desconocida"),
-                "preview": doc.page_content[:200] + "..." if len(doc.page_content) > 200 else doc.page_content
-            }
-            for doc in docs
-        ]
-        
-        return contenido, metadatos
-        
+        return _format_documents(search_documents(consulta, k=4))
+    except Exception as e:
+        return f"Error al buscar en documentos: {str(e)}", []
+
+
+async def _abuscar_documentos(consulta: str) -> Tuple[str, List[dict]]:
+    """Versión asíncrona de `buscar_documentos` (no bloquea el event loop)."""
+    if not is_vectorstore_ready() and is_warmup_running():
+        return _INDEXANDO, []
+    
+    try:
+        return _format_documents(await asearch_documents(consulta, k=4))
     except Exception as e:
         return f"Error al buscar en documentos: {str(e)}", []
 
 
-# Configurar herramienta de búsqueda web con Tavily
-buscar_web = TavilySearch(
-    max_results=5,
-    search_depth="basic",
-    include_answer=True,
-    include_raw_content=False
+# Herramienta con implementación síncrona y asíncrona:
+# `invoke` usa la primera y `ainvoke` la segunda.
+buscar_documentos = StructuredTool.from_function(
+    func=_buscar_documentos,
+    coroutine=_abuscar_documentos,
+    name="buscar_documentos",
+    description=_buscar_documentos.__doc__,
+    response_format="content_and_artifact",
 )
-buscar_web.name = "buscar_web"
-buscar_web.description = """
+
+
+# Herramienta de búsqueda web: Tavily detrás de una caché con TTL y
+# coalescencia de consultas (ver web_cache.py). Se crea en el primer uso.
+_BUSCAR_WEB_DESCRIPTION = """
 Busca información actualizada en Internet usando Tavily.
 
 Usa esta herramienta cuando necesites:
@@ -71,9 +122,158 @@ Args:
     query: La consulta de búsqueda para Internet
 """
 
+_buscar_web: Optional[BaseTool] = None
+_web_cache: Optional[WebSearchCache] = None
 
-@tool
-def guardar_nota(titulo: str, contenido: str) -> str:
+
+class _WebSearchInput(BaseModel):
+    """Entrada mínima (backends sin esquema propio, p. ej. un stub)."""
+    model_config = ConfigDict(extra="allow")
+    query: str = Field(description="Search query to look up")
+
+
+def _create_tavily() -> BaseTool:
+    from langchain_tavily import TavilySearch
+    
+    return TavilySearch(
+        max_results=5,
+        search_depth="basic",
+        include_answer=True,
+        include_raw_content=False
+    )
+
+
+def _new_web_cache(backend) -> WebSearchCache:
+    config = get_config()
+    return WebSearchCache(
+        backend,
+        ttl_seconds=config.web_cache_ttl,
+        max_entries=config.web_cache_size,
+        refresh_ahead=config.web_refresh_ahead,
+        hot_hits=config.web_hot_hits,
+    )
+
+
+def get_web_cache() -> WebSearchCache:
+    """Obtiene la caché de búsquedas web (con Tavily como backend por defecto)."""
+    global _web_cache
+    if _web_cache is None:
+        _web_cache = _new_web_cache(_create_tavily())
+    return _web_cache
+
+
+def use_web_backend(backend) -> None:
+    """
+    Sustituye el backend de `buscar_web` (p. ej. por un stub local en
+    benchmarks y pruebas). La caché empieza vacía.
+    """
+    global _web_cache, _buscar_web
+    _web_cache = _new_web_cache(backend)
+    _buscar_web = None
+
+
+def get_web_cache_stats() -> dict:
+    """Aciertos, llamadas a la API y latencia ahorrada de `buscar_web`."""
+    return _web_cache.stats() if _web_cache is not None else {}
+
+
+def _collect_web_cache_metrics():
+    if _web_cache is None:
+        return
+    stats = _web_cache.stats()
+    for result in ("hits", "coalesced", "misses"):
+        yield "support_cache_requests_total", {"cache": "web", "result": result}, stats[result], "counter"
+    yield "support_web_upstream_seconds_total", {}, stats["upstream_seconds"], "counter"
+    yield "support_web_saved_seconds_total", {}, stats["saved_seconds"], "counter"
+
+
+telemetry.register_collector(_collect_web_cache_metrics)
+
+
+def _buscar_web_cacheado(query: str, **params) -> dict:
+    return get_web_cache().get(query, **params)
+
+
+async def _abuscar_web_cacheado(query: str, **params) -> dict:
+    return await get_web_cache().aget(query, **params)
+
+
+def get_buscar_web() -> BaseTool:
+    """Obtiene la herramienta de búsqueda web, creándola la primera vez."""
+    global _buscar_web
+    if _buscar_web is None:
+        backend = get_web_cache().backend
+        _buscar_web = StructuredTool.from_function(
+            func=_buscar_web_cacheado,
+            coroutine=_abuscar_web_cacheado,
+            name="buscar_web",
+            description=_BUSCAR_WEB_DESCRIPTION,
+            # Mismos parámetros que Tavily (dominios, fechas, ...)
+            args_schema=getattr(backend, "args_schema", None) or _WebSearchInput,
+            # Como TavilySearch: "sin resultados" llega al modelo como texto
+            handle_tool_error=True,
+        )
+    return _buscar_web
+
+
+# ====================================
+# Notas
+# ====================================
+NOTES_PAGE_SIZE = 10
+NOTES_SEARCH_K = 5
+# Caracteres de cada nota en el listado y de toda la salida de una herramienta
+NOTE_PREVIEW_CHARS = 200
+MAX_NOTES_OUTPUT_CHARS = 4000
+MAX_NOTE_CHARS = 20000
+
+_SIN_IDENTIDAD = (
+    "Error: no se pueden usar las notas sin identificar al usuario ni la conversación "
+    "(configurable.user_id o thread_id)."
+)
+
+
+def _namespace(config: Optional[RunnableConfig]) -> Optional[Tuple[str, str]]:
+    """
+    (usuario, thread) de la ejecución (`configurable.user_id` / `thread_id`).
+
+    Sin `user_id` (p. ej. `langgraph dev` o un servidor sin autenticación)
+    las notas quedan en la conversación: el usuario es el propio thread, así
+    que nunca se comparte un espacio anónimo entre usuarios. Sin ninguno de
+    los dos retorna None y las herramientas de notas se niegan.
+    """
+    configurable = (config or {}).get("configurable", {})
+    user_id, thread_id = configurable.get("user_id"), configurable.get("thread_id")
+    if user_id:
+        return str(user_id), str(thread_id or "")
+    if thread_id:
+        return f"thread:{thread_id}", str(thread_id)
+    return None
+
+
+def _recortar(texto: str, limite: int) -> str:
+    texto = " ".join(texto.split())
+    return texto if len(texto) <= limite else texto[:limite - 1] + "…"
+
+
+def _linea_nota(nota: Note, texto: str) -> str:
+    fecha = datetime.fromtimestamp(nota.created).strftime("%Y-%m-%d")
+    return f"- [{nota.id}] {nota.title} ({fecha}): {texto}"
+
+
+def _acotar(lineas: List[str], pie: str = "") -> str:
+    """Une las líneas sin pasar de MAX_NOTES_OUTPUT_CHARS (corta por notas enteras)."""
+    salida, usados = [], len(pie)
+    for linea in lineas:
+        if usados + len(linea) + 1 > MAX_NOTES_OUTPUT_CHARS:
+            salida.append("(resultado recortado)")
+            break
+        salida.append(linea)
+        usados += len(linea) + 1
+    return "\n".join(salida + ([pie] if pie else []))
+
+
+@tool(response_format="content_and_artifact")
+def guardar_nota(titulo: str, contenido: str, config: RunnableConfig) -> Tuple[str, dict]:
     """
     Guarda una nota importante para referencia futura del usuario.
     
@@ -89,40 +289,103 @@ def guardar_nota(titulo: str, contenido: str) -> str:
     Returns:
         Confirmación de que la nota fue guardada
     """
-    # TODO: Implementar persistencia real con store o base de datos
-    # Por ahora retornamos confirmación
-    
     # Validaciones básicas
     if not titulo or not contenido:
-        return "Error: Tanto el título como el contenido son requeridos."
+        return "Error: Tanto el título como el contenido son requeridos.", {}
     
     if len(titulo) > 100:
-        return "Error: El título es demasiado largo (máximo 100 caracteres)."
+        return "Error: El título es demasiado largo (máximo 100 caracteres).", {}
+    
+    if len(contenido) > MAX_NOTE_CHARS:
+        return f"Error: El contenido es demasiado largo (máximo {MAX_NOTE_CHARS} caracteres).", {}
     
-    # En una implementación real, guardarías esto en el store de LangGraph
-    # o en una base de datos
-    print(f"[Research] Nota guardada: {titulo}")
-    return f"✓ Nota '{titulo}' guardada correctamente."
+    namespace = _namespace(config)
+    if namespace is None:
+        return _SIN_IDENTIDAD, {}
+    usuario, thread = namespace
+    nota = get_notes_store().add(usuario, thread, titulo, contenido)
+    telemetry.event("note_saved", titulo=titulo)
+    # El id va como artefacto: el nodo research lo añade a `saved_notes`
+    return f"✓ Nota '{titulo}' guardada correctamente (id {nota.id}).", {"note_id": nota.id}
 
 
 @tool
-def listar_notas() -> str:
+def listar_notas(
+    config: RunnableConfig,
+    pagina: int = 1,
+    solo_esta_conversacion: bool = False,
+    ultimos_dias: Optional[int] = None,
+) -> str:
     """
-    Lista todas las notas guardadas por el usuario en sesiones anteriores.
+    Lista las notas guardadas por el usuario, de la más reciente a la más antigua.
     
     Usa esta herramienta cuando:
     - El usuario pregunte qué notas tiene guardadas
     - El usuario quiera revisar información guardada previamente
-    - Necesites recordar contexto de investigaciones anteriores
     
+    Para recuperar notas sobre un tema concreto usa `buscar_notas`.
+    
+    Args:
+        pagina: Página del listado (10 notas por página, empieza en 1)
+        solo_esta_conversacion: Solo las notas guardadas en esta conversación
+        ultimos_dias: Solo las notas de los últimos N días
+        
     Returns:
-        Lista formateada de notas guardadas o mensaje si no hay notas
+        Página de notas (título y comienzo del contenido) o mensaje si no hay notas
     """
-    # TODO: Implementar recuperación real desde store o base de datos
+    namespace = _namespace(config)
+    if namespace is None:
+        return _SIN_IDENTIDAD
+    usuario, thread = namespace
+    pagina = max(1, pagina)
+    since = time.time() - ultimos_dias * 86400 if ultimos_dias else None
+    page = get_notes_store().list(
+        usuario,
+        thread_id=thread if solo_esta_conversacion else None,
+        since=since,
+        limit=NOTES_PAGE_SIZE,
+        offset=(pagina - 1) * NOTES_PAGE_SIZE,
+    )
+    if not page.notes:
+        if page.total:
+            return f"No hay más notas: la última página es la {-(-page.total // NOTES_PAGE_SIZE)}."
+        return "No hay notas guardadas aún. Usa 'guardar_nota' para crear una."
     
-    # En una implementación real, recuperarías esto del store
-    # Por ahora retornamos mensaje placeholder
-    return "No hay notas guardadas aún. Usa 'guardar_nota' para crear una."
+    cabecera = f"Notas {page.offset + 1}-{page.offset + len(page.notes)} de {page.total}:"
+    pie = f"Hay más notas: usa pagina={pagina + 1}." if page.has_more else ""
+    lineas = [_linea_nota(nota, _recortar(nota.content, NOTE_PREVIEW_CHARS)) for nota in page.notes]
+    return _acotar([cabecera] + lineas, pie)
+
+
+@tool
+def buscar_notas(consulta: str, config: RunnableConfig, solo_esta_conversacion: bool = False) -> str:
+    """
+    Busca en las notas guardadas del usuario las relacionadas con un tema.
+    
+    Usa esta herramienta cuando necesites recordar lo que el usuario guardó
+    sobre un tema concreto (en lugar de listar todas sus notas).
+    
+    Args:
+        consulta: Tema o palabras clave a buscar en títulos y contenido
+        solo_esta_conversacion: Solo las notas guardadas en esta conversación
+        
+    Returns:
+        Las notas más relevantes con el fragmento que coincide
+    """
+    namespace = _namespace(config)
+    if namespace is None:
+        return _SIN_IDENTIDAD
+    usuario, thread = namespace
+    notas = get_notes_store().search(
+        usuario,
+        consulta,
+        thread_id=thread if solo_esta_conversacion else None,
+        k=NOTES_SEARCH_K,
+    )
+    if not notas:
+        return f"No hay notas sobre '{consulta}'."
+    lineas = [_linea_nota(nota, _recortar(nota.snippet or nota.content, NOTE_PREVIEW_CHARS * 2)) for nota in notas]
+    return _acotar([f"Notas sobre '{consulta}':"] + lineas)
 
 
 def get_research_tools() -> List:
@@ -134,7 +397,8 @@ def get_research_tools() -> List:
     """
     return [
         buscar_documentos,
-        buscar_web,
+        get_buscar_web(),
         guardar_nota,
-        listar_notas
+        listar_notas,
+        buscar_notas,
     ]
\ No newline at end of file
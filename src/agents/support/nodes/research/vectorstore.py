@@ -1,136 +1,533 @@
 """
-Gestión del vector store con ChromaDB para búsqueda RAG.
+Gestión del vector store para búsqueda RAG.
+
+El backend vectorial se elige con `RESEARCH_VECTOR_BACKEND`: ChromaDB (por
+defecto) o una matriz NumPy mapeada en memoria con búsqueda exacta
+(`numpy_store.py`). La búsqueda es híbrida: embeddings (MMR) más un índice
+léxico BM25 sobre los mismos chunks, fusionados con Reciprocal Rank Fusion.
 """
 
-import os
-from typing import Optional, List
+import asyncio
+import threading
+import time
+import weakref
+from typing import Dict, Optional, List, Set, Tuple
 from pathlib import Path
 
-from langchain_openai import OpenAIEmbeddings
-from langchain_chroma import Chroma
-from langchain_community.document_loaders import DirectoryLoader, TextLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
 
+from agents.support import telemetry
 from agents.support.nodes.research.config import (
     get_documentos_dir, 
     get_chroma_db_dir,
-    get_research_stats
+    get_config,
+    get_embeddings_cache_file,
+    get_lexical_index_file,
+    get_manifest_file,
+    get_pdf_text_cache_file,
+    get_vector_index_dir,
+)
+from agents.support.nodes.research.embeddings import CachedEmbeddings, EmbeddingStore
+from agents.support.nodes.research.ingest import (
+    IngestedFile,
+    IngestPipeline,
+    SourceDocument,
+    iter_source_files,
 )
+from agents.support.nodes.research.lexical import (
+    LexicalIndex,
+    is_decisive,
+    rebuild_from,
+    reciprocal_rank_fusion,
+)
+from agents.support.nodes.research.manifest import IngestManifest, hash_file
+from agents.support.nodes.research.pdf import PdfTextCache
+from agents.support.nodes.research.query_cache import QueryResultCache
+from agents.support.nodes.research.watcher import DirectoryWatcher
 
 # ====================================
 # Variables globales (singleton pattern)
 # ====================================
-_vectorstore: Optional[Chroma] = None
+_vectorstore: Optional[VectorStore] = None
 _retriever = None
-_embeddings: Optional[OpenAIEmbeddings] = None
+_embeddings: Optional[Embeddings] = None
+_lexical_index: Optional[LexicalIndex] = None
+_pdf_text_cache: Optional[PdfTextCache] = None
+
+# Inicialización perezosa / en segundo plano
+_init_lock = threading.RLock()
+_ready = threading.Event()
+_warmup_thread: Optional[threading.Thread] = None
+_warmup_error: Optional[BaseException] = None
 
+# Versión del corpus: sube cada vez que cambia el contenido indexado
+_corpus_version = 0
+_query_cache: Optional[QueryResultCache] = None
 
-def get_embeddings() -> OpenAIEmbeddings:
-    """Obtiene o crea el modelo de embeddings."""
+EMBEDDINGS_MODEL = "text-embedding-3-small"
+
+
+def get_embeddings() -> Embeddings:
+    """
+    Obtiene o crea el modelo de embeddings.
+    
+    El modelo de OpenAI se envuelve con `CachedEmbeddings`, que guarda los
+    vectores en disco (y las consultas en un LRU en memoria) para no volver
+    a pagar embeddings ya calculados.
+    """
     global _embeddings
     if _embeddings is None:
-        _embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
+        from langchain_openai import OpenAIEmbeddings
+        
+        store = EmbeddingStore(
+            get_embeddings_cache_file(),
+            max_bytes=get_config().embeddings_cache_max_bytes,
+        )
+        _embeddings = CachedEmbeddings(
+            OpenAIEmbeddings(model=EMBEDDINGS_MODEL),
+            model=EMBEDDINGS_MODEL,
+            store=store,
+        )
     return _embeddings
 
 
-def initialize_vectorstore(force_reload: bool = False) -> Chroma:
+def get_embeddings_stats() -> Dict:
+    """Obtiene los contadores de la caché de embeddings (aciertos, fallos, bytes)."""
+    embeddings = get_embeddings()
+    if isinstance(embeddings, CachedEmbeddings):
+        return embeddings.stats()
+    return {}
+
+
+def get_lexical_index() -> LexicalIndex:
+    """Obtiene el índice léxico BM25 (persistido en `datos/`)."""
+    global _lexical_index
+    if _lexical_index is None:
+        _lexical_index = LexicalIndex(get_lexical_index_file())
+    return _lexical_index
+
+
+def get_pdf_text_cache() -> PdfTextCache:
+    """Obtiene la caché del texto extraído de PDFs (por hash de archivo)."""
+    global _pdf_text_cache
+    if _pdf_text_cache is None:
+        _pdf_text_cache = PdfTextCache(get_pdf_text_cache_file())
+    return _pdf_text_cache
+
+
+# ====================================
+# Caché de resultados y versión del corpus
+# ====================================
+def get_query_cache() -> QueryResultCache:
+    """Obtiene la caché de resultados de `search_documents`."""
+    global _query_cache
+    if _query_cache is None:
+        config = get_config()
+        _query_cache = QueryResultCache(
+            max_entries=config.query_cache_size,
+            ttl_seconds=config.query_cache_ttl,
+            semantic_threshold=config.query_cache_semantic_threshold,
+        )
+    return _query_cache
+
+
+def _collect_cache_metrics():
+    """Aciertos de las cachés de embeddings y de resultados (solo si ya existen)."""
+    if isinstance(_embeddings, CachedEmbeddings):
+        stats = _embeddings.stats()
+        for result in ("memory_hits", "disk_hits", "misses"):
+            yield "support_cache_requests_total", {"cache": "embeddings", "result": result}, stats[result], "counter"
+    if _query_cache is not None:
+        stats = _query_cache.stats()
+        for result in ("hits", "semantic_hits", "misses"):
+            yield "support_cache_requests_total", {"cache": "query", "result": result}, stats[result], "counter"
+
+
+telemetry.register_collector(_collect_cache_metrics)
+
+
+def get_corpus_version() -> int:
+    """Versión actual del corpus indexado."""
+    return _corpus_version
+
+
+def _bump_corpus_version() -> None:
+    """Marca el corpus como modificado: los resultados cacheados dejan de servirse."""
+    global _corpus_version
+    _corpus_version += 1
+    if _query_cache is not None:
+        _query_cache.invalidate()
+
+
+# ====================================
+# Configuración de chunking
+# ====================================
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+SEPARATORS = ["\n\n", "\n", ". ", " ", ""]
+COLLECTION_NAME = "base_conocimientos"
+SOURCE_PATTERNS = ("*.txt", "*.pdf")
+
+
+def _splitter_signature() -> dict:
+    """Parámetros de chunking guardados en el manifiesto (si cambian, se reindexa todo)."""
+    return {
+        "chunk_size": CHUNK_SIZE,
+        "chunk_overlap": CHUNK_OVERLAP,
+        "separators": SEPARATORS,
+    }
+
+
+def _list_source_files(docs_dir: Path) -> Dict[str, Path]:
+    """Lista los documentos indexables (.txt y .pdf), indexados por ruta relativa."""
+    paths = sorted(path for pattern in SOURCE_PATTERNS for path in docs_dir.glob(pattern))
+    return {
+        path.name: path
+        for path in paths
+        # Excluir el README.txt generado automáticamente
+        if path.name != "README.txt"
+    }
+
+
+def initialize_vectorstore(force_reload: bool = False) -> VectorStore:
     """
-    Inicializa o recarga el vector store.
+    Inicializa el vector store de forma incremental.
+    
+    Abre la colección persistida y la sincroniza con `documentos/` usando el
+    manifiesto de hashes: solo se dividen y embeben los archivos nuevos o
+    modificados, y se eliminan los chunks de archivos borrados o cambiados.
+    Los documentos sin cambios no generan ninguna llamada de embeddings.
+    
+    Es seguro llamarla desde varios hilos: si otro hilo (p. ej. el warm-up en
+    segundo plano) ya está inicializando, se espera a que termine.
     
     Args:
-        force_reload: Si True, recarga todos los documentos incluso si el store existe
+        force_reload: Si True, vacía la colección y reindexa todos los documentos
         
     Returns:
-        Instancia de Chroma vector store
+        Vector store del backend configurado
     """
-    global _vectorstore, _retriever
-    
     # Si ya existe y no se fuerza recarga, retornar existente
     if _vectorstore is not None and not force_reload:
         return _vectorstore
     
+    with _init_lock:
+        if _vectorstore is not None and not force_reload:
+            return _vectorstore
+        return _initialize_vectorstore(force_reload)
+
+
+def _initialize_vectorstore(force_reload: bool) -> VectorStore:
+    """Inicializa el vector store (con `_init_lock` tomado)."""
+    global _vectorstore, _retriever
+    
+    start = time.perf_counter()
     embeddings = get_embeddings()
-    chroma_dir = get_chroma_db_dir()
     docs_dir = get_documentos_dir()
     
     print(f"[Research] Inicializando vector store...")
     print(f"[Research] Directorio documentos: {docs_dir}")
-    print(f"[Research] Directorio ChromaDB: {chroma_dir}")
     
-    # Verificar si hay documentos para cargar
-    txt_files = list(docs_dir.glob("*.txt"))
+    vectorstore = _create_empty_vectorstore(embeddings)
+    manifest = IngestManifest.load(get_manifest_file(), _splitter_signature())
+    count = vectorstore._collection.count()
     
-    # Excluir el README.txt generado automáticamente
-    txt_files = [f for f in txt_files if f.name != "README.txt"]
+    # Sin manifiesto válido no sabemos qué chunks hay en la colección
+    # (p. ej. índices creados antes del manifiesto, con duplicados): se reconstruye.
+    # Tampoco si el manifiesto lista chunks pero el índice está vacío (borrado a mano).
+    if force_reload or (not manifest.files and count > 0) or (manifest.files and count == 0):
+        print(f"[Research] Reconstruyendo la colección desde cero")
+        vectorstore.reset_collection()
+        get_lexical_index().clear()
+        manifest.clear()
+        _bump_corpus_version()
     
-    if txt_files or force_reload:
-        print(f"[Research] Encontrados {len(txt_files)} documentos .txt")
-        
-        # Cargar documentos
-        loader = DirectoryLoader(
-            str(docs_dir),
-            glob="*.txt",
-            loader_cls=TextLoader,
-            exclude=["README.txt"]  # Excluir el README
-        )
-        
-        try:
-            documents = loader.load()
-            
-            if documents:
-                print(f"[Research] Cargados {len(documents)} documentos")
-                
-                # Dividir en chunks
-                text_splitter = RecursiveCharacterTextSplitter(
-                    chunk_size=1000,
-                    chunk_overlap=200,
-                    separators=["\n\n", "\n", ". ", " ", ""]
-                )
-                chunks = text_splitter.split_documents(documents)
-                print(f"[Research] Generados {len(chunks)} chunks")
-                
-                # Crear vector store
-                _vectorstore = Chroma.from_documents(
-                    documents=chunks,
-                    embedding=embeddings,
-                    persist_directory=str(chroma_dir),
-                    collection_name="base_conocimientos"
-                )
-                print(f"[Research] Vector store creado exitosamente")
-            else:
-                print(f"[Research] No se encontraron documentos válidos")
-                _vectorstore = _create_empty_vectorstore(embeddings, chroma_dir)
-                
-        except Exception as e:
-            print(f"[Research] Error cargando documentos: {e}")
-            _vectorstore = _create_empty_vectorstore(embeddings, chroma_dir)
-    else:
-        print(f"[Research] No hay documentos para indexar")
-        _vectorstore = _create_empty_vectorstore(embeddings, chroma_dir)
+    try:
+        _sync_documents(vectorstore, manifest, docs_dir)
+        _sync_lexical_index(vectorstore)
+    except Exception as e:
+        print(f"[Research] Error cargando documentos: {e}")
+    
+    _vectorstore = vectorstore
     
     # Crear retriever
     _retriever = _vectorstore.as_retriever(
         search_type="mmr",  # Maximum Marginal Relevance
         search_kwargs={
-            "k": 4,           # Número de documentos a retornar
-            "fetch_k": 10     # Número de documentos a considerar para MMR
+            "k": 4,                   # Número de documentos a retornar
+            "fetch_k": DEFAULT_FETCH_K  # Número de documentos a considerar para MMR
         }
     )
     
-    # Mostrar estadísticas
-    stats = get_research_stats()
-    print(f"[Research] Estadísticas: {stats}")
+    _ready.set()
+    if get_config().watch_enabled:
+        start_watcher()
+    # Las estadísticas completas (recorren todo chroma_db) solo bajo demanda: get_research_stats()
+    print(
+        f"[Research] Vector store listo: {_vectorstore._collection.count()} chunks "
+        f"en {time.perf_counter() - start:.2f}s"
+    )
     
     return _vectorstore
 
 
-def _create_empty_vectorstore(embeddings, chroma_dir: Path) -> Chroma:
-    """Crea un vector store vacío."""
+# ====================================
+# Warm-up en segundo plano
+# ====================================
+def is_vectorstore_ready() -> bool:
+    """Indica si el vector store ya está inicializado y listo para buscar."""
+    return _ready.is_set()
+
+
+def wait_until_ready(timeout: Optional[float] = None) -> bool:
+    """
+    Espera a que el vector store esté listo.
+    
+    Args:
+        timeout: Segundos máximos de espera (None = sin límite)
+        
+    Returns:
+        True si está listo, False si se agotó el tiempo
+    """
+    return _ready.wait(timeout)
+
+
+def is_warmup_running() -> bool:
+    """Indica si hay un warm-up en segundo plano en curso."""
+    return _warmup_thread is not None and _warmup_thread.is_alive()
+
+
+def start_background_warmup() -> threading.Thread:
+    """
+    Inicializa el vector store en un hilo en segundo plano.
+    
+    Es idempotente: si ya hay un warm-up en curso, retorna ese hilo.
+    
+    Returns:
+        Hilo del warm-up
+    """
+    global _warmup_thread
+    with _init_lock:
+        if _warmup_thread is not None and (_warmup_thread.is_alive() or _ready.is_set()):
+            return _warmup_thread
+        
+        def run() -> None:
+            global _warmup_error
+            try:
+                initialize_vectorstore()
+            except BaseException as e:
+                _warmup_error = e
+                print(f"[Research] Error en el warm-up del vector store: {e}")
+        
+        _warmup_thread = threading.Thread(target=run, name="research-warmup", daemon=True)
+        _warmup_thread.start()
+        return _warmup_thread
+
+
+def _build_pipeline(vectorstore: VectorStore) -> IngestPipeline:
+    """Crea el pipeline de ingesta que escribe directamente en la colección."""
+    config = get_config()
+    embeddings = get_embeddings()
+    
+    lexical_index = get_lexical_index()
+    
+    def write(ids, vectors, texts, metadatas):
+        vectorstore._collection.upsert(
+            ids=ids,
+            embeddings=vectors,
+            documents=texts,
+            metadatas=metadatas,
+        )
+        lexical_index.upsert(ids, texts, metadatas)
+    
+    return IngestPipeline(
+        embed=embeddings.embed_documents,
+        write=write,
+        splitter_params=_splitter_signature(),
+        batch_size=config.embed_batch_size,
+        max_concurrency=config.embed_concurrency,
+        split_workers=config.split_workers,
+        pdf_cache=get_pdf_text_cache(),
+    )
+
+
+def _sync_documents(vectorstore: VectorStore, manifest: IngestManifest, docs_dir: Path) -> int:
+    """
+    Sincroniza la colección con los archivos de `docs_dir`.
+    
+    Los archivos pendientes pasan por el pipeline de ingesta en streaming y
+    el manifiesto se guarda a medida que cada archivo queda escrito, así que
+    una interrupción no obliga a reprocesar lo que ya se indexó.
+    
+    Los chunks obsoletos de un archivo modificado se eliminan después de
+    escribir los nuevos: las búsquedas concurrentes nunca ven el archivo
+    ausente a mitad de la actualización.
+    
+    Args:
+        vectorstore: Colección de destino
+        manifest: Manifiesto con el estado indexado actual
+        docs_dir: Directorio de documentos
+        
+    Returns:
+        Número de archivos añadidos, modificados o eliminados
+    """
+    files = _list_source_files(docs_dir)
+    
+    # 1. Detectar archivos borrados, nuevos o modificados
+    removed = [source for source in manifest.files if source not in files]
+    pending = {
+        source: path
+        for source, path in files.items()
+        if not manifest.is_unchanged(source, path)
+    }
+    print(
+        f"[Research] Documentos: {len(files)} total, {len(pending)} nuevos/modificados, "
+        f"{len(removed)} eliminados"
+    )
+    
+    # 2. Eliminar los chunks de archivos borrados
+    stale_ids = []
+    # Hashes de PDFs que quizá ya no se usen: se olvidan tras la ingesta
+    stale_pdfs = {
+        manifest.files[source]["sha256"]
+        for source in [*removed, *pending]
+        if _is_pdf(source) and source in manifest.files
+    }
+    for source in removed:
+        stale_ids.extend(manifest.forget(source))
+    if stale_ids:
+        _delete_chunks(vectorstore, stale_ids)
+        _bump_corpus_version()
+    # Guardar también cuando solo hubo eliminaciones o cambios de mtime
+    manifest.save()
+    
+    if not pending:
+        _forget_pdf_text(stale_pdfs, manifest, pending)
+        print(f"[Research] Vector store al día, no hay documentos que indexar")
+        return len(removed)
+    
+    # 3. Ingerir los pendientes en streaming
+    last_save = time.monotonic()
+    
+    def on_document_done(entry: IngestedFile) -> None:
+        nonlocal last_save
+        # Chunks de la versión anterior que ya no existen en la nueva
+        previous = manifest.forget(entry.document.source)
+        stale = sorted(set(previous) - set(entry.chunk_ids))
+        if stale:
+            _delete_chunks(vectorstore, stale)
+        manifest.record(
+            entry.document.source,
+            entry.document.path,
+            entry.content_hash,
+            entry.chunk_ids,
+            stat=entry.stat,
+        )
+        # Guardar como mucho una vez por segundo (el manifiesto crece con el corpus)
+        if time.monotonic() - last_save >= 1.0:
+            manifest.save()
+            last_save = time.monotonic()
+    
+    try:
+        stats = _build_pipeline(vectorstore).run(
+            iter_source_files(pending),
+            on_document_done=on_document_done,
+            total=len(pending),
+        )
+    finally:
+        manifest.save()
+        _bump_corpus_version()
+        _forget_pdf_text(stale_pdfs, manifest, pending)
+    print(f"[Research] Ingesta: {stats.summary()}")
+    return len(pending) + len(removed)
+
+
+def _is_pdf(source: str) -> bool:
+    return source.lower().endswith(".pdf")
+
+
+def _forget_pdf_text(candidates: Set[str], manifest: IngestManifest, pending: Dict[str, Path]) -> None:
+    """
+    Olvida el texto cacheado de versiones de PDFs que ya no usa ningún archivo.
+
+    Se llama tras la ingesta: un PDF renombrado o con otro mtime pero el mismo
+    contenido conserva su hash y reutiliza el texto. Un hash sigue en uso si
+    lo registra el manifiesto o si es el de un pendiente que no llegó a
+    registrarse (p. ej. por un error de lectura).
+    """
+    if not candidates:
+        return
+    in_use = {entry["sha256"] for source, entry in manifest.files.items() if _is_pdf(source)}
+    for source, path in pending.items():
+        if _is_pdf(source) and source not in manifest.files:
+            try:
+                in_use.add(hash_file(path))
+            except OSError:
+                pass  # Borrado mientras tanto: ya no lo referencia
+    unused = sorted(candidates - in_use)
+    if unused:
+        get_pdf_text_cache().forget(unused)
+
+
+def _delete_chunks(vectorstore: VectorStore, ids: List[str]) -> None:
+    """Elimina chunks de la colección y del índice léxico."""
+    vectorstore.delete(ids=ids)
+    get_lexical_index().delete(ids)
+
+
+def _sync_lexical_index(vectorstore: VectorStore, page_size: int = 1000) -> None:
+    """
+    Reconstruye el índice léxico si no coincide con la colección.
+    
+    Ocurre, por ejemplo, la primera vez que se usa con una colección ya
+    indexada. El texto se lee de la colección por páginas, sin volver a embeber.
+    """
+    lexical_index = get_lexical_index()
+    total = vectorstore._collection.count()
+    if lexical_index.count() == total:
+        return
+    
+    print(f"[Research] Reconstruyendo índice léxico ({total} chunks)...")
+    
+    def batches():
+        for offset in range(0, total, page_size):
+            page = vectorstore._collection.get(
+                include=["documents", "metadatas"], limit=page_size, offset=offset
+            )
+            yield page["ids"], page["documents"], [m or {} for m in page["metadatas"]]
+    
+    rebuild_from(lexical_index, batches())
+
+
+VECTOR_BACKENDS = ("chroma", "numpy")
+
+
+def _create_empty_vectorstore(embeddings) -> VectorStore:
+    """Abre (o crea vacía) la colección persistida del backend configurado."""
+    config = get_config()
+    
+    if config.vector_backend == "numpy":
+        from agents.support.nodes.research.numpy_store import NumpyVectorStore
+        
+        index_dir = get_vector_index_dir()
+        print(f"[Research] Índice NumPy ({config.vector_dtype}): {index_dir}")
+        return NumpyVectorStore(embeddings, index_dir, dtype=config.vector_dtype)
+    
+    if config.vector_backend != "chroma":
+        raise ValueError(
+            f"Backend vectorial desconocido: {config.vector_backend!r} (opciones: {VECTOR_BACKENDS})"
+        )
+    
+    from langchain_chroma import Chroma
+    
+    chroma_dir = get_chroma_db_dir()
+    print(f"[Research] Directorio ChromaDB: {chroma_dir}")
     return Chroma(
         embedding_function=embeddings,
         persist_directory=str(chroma_dir),
-        collection_name="base_conocimientos"
+        collection_name=COLLECTION_NAME
     )
 
 
@@ -138,6 +535,9 @@ def get_retriever():
     """
     Obtiene el retriever, inicializando si es necesario.
     
+    Se mantiene por compatibilidad (p. ej. para usarlo en cadenas LCEL);
+    `search_documents` no lo usa porque sus `search_kwargs` son compartidos.
+    
     Returns:
         Retriever configurado para búsqueda MMR
     """
@@ -147,26 +547,229 @@ def get_retriever():
     return _retriever
 
 
-def search_documents(query: str, k: int = 4) -> List[Document]:
+# ====================================
+# Búsqueda
+# ====================================
+DEFAULT_FETCH_K = 10
+DEFAULT_LAMBDA_MULT = 0.5
+
+_search_semaphore: Optional[threading.BoundedSemaphore] = None
+_async_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _get_search_semaphore() -> threading.BoundedSemaphore:
+    """Limita las llamadas concurrentes de embeddings/búsqueda desde hilos."""
+    global _search_semaphore
+    if _search_semaphore is None:
+        _search_semaphore = threading.BoundedSemaphore(get_config().search_concurrency)
+    return _search_semaphore
+
+
+def _get_async_semaphore() -> asyncio.Semaphore:
+    """Limita las llamadas concurrentes en el event loop actual."""
+    loop = asyncio.get_running_loop()
+    semaphore = _async_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(get_config().search_concurrency)
+        _async_semaphores[loop] = semaphore
+    return semaphore
+
+
+SEARCH_MODES = ("hybrid", "vector", "lexical")
+
+
+def _search_params(
+    k: int,
+    fetch_k: Optional[int],
+    lambda_mult: float,
+    mode: Optional[str],
+) -> Dict:
+    """Parámetros efectivos de la búsqueda (también forman la clave de caché)."""
+    mode = mode or get_config().search_mode
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"Modo de búsqueda desconocido: {mode!r} (opciones: {SEARCH_MODES})")
+    return {
+        "mode": mode,
+        "search_type": "mmr",
+        "fetch_k": max(fetch_k or DEFAULT_FETCH_K, k),
+        "lambda_mult": lambda_mult,
+    }
+
+
+def _mmr_by_vector(vectorstore: VectorStore, embedding: List[float], k: int, params: Dict) -> List[Document]:
+    return vectorstore.max_marginal_relevance_search_by_vector(
+        embedding,
+        k=k,
+        fetch_k=params["fetch_k"],
+        lambda_mult=params["lambda_mult"],
+    )
+
+
+def _lexical_search(query: str, k: int, params: Dict) -> Tuple[List[Document], bool]:
+    """
+    Etapa léxica (BM25) de la búsqueda.
+    
+    Returns:
+        Tupla con (documentos en orden BM25, si el resultado es concluyente
+        por sí solo y se puede responder sin embeddings)
+    """
+    if params["mode"] == "vector":
+        return [], False
+    
+    config = get_config()
+    results = get_lexical_index().search(query, k=params["fetch_k"])
+    docs = [doc for doc, _ in results]
+    if params["mode"] == "lexical":
+        return docs[:k], True
+    
+    decisive = config.lexical_fast_path and is_decisive(
+        [score for _, score in results],
+        min_score=config.lexical_min_score,
+        ratio=config.lexical_decisive_ratio,
+    )
+    return (docs[:k] if decisive else docs), decisive
+
+
+def _fuse(vector_docs: List[Document], lexical_docs: List[Document], k: int, params: Dict) -> List[Document]:
+    """Combina resultados vectoriales y léxicos (RRF) en modo híbrido."""
+    if params["mode"] != "hybrid" or not lexical_docs:
+        return vector_docs
+    return reciprocal_rank_fusion([vector_docs, lexical_docs], k=k)
+
+
+def search_documents(
+    query: str,
+    k: int = 4,
+    fetch_k: Optional[int] = None,
+    lambda_mult: float = DEFAULT_LAMBDA_MULT,
+    mode: Optional[str] = None,
+) -> List[Document]:
     """
     Busca documentos relevantes para una consulta.
     
+    Modos (`mode`, por defecto `RESEARCH_SEARCH_MODE`):
+    - "hybrid": fusiona (RRF) los resultados MMR por embeddings con los de
+      BM25. Si BM25 es concluyente (p. ej. un código exacto), responde solo
+      con BM25 sin llamar al modelo de embeddings.
+    - "vector": solo MMR por embeddings
+    - "lexical": solo BM25 (nunca llama al modelo de embeddings)
+    
+    Los parámetros son por llamada: no se modifica ningún estado compartido,
+    así que es segura con varios turnos concurrentes. Las llamadas de
+    embeddings y búsqueda se limitan con `RESEARCH_SEARCH_CONCURRENCY`.
+    
+    Los resultados se cachean por consulta normalizada, `k` y parámetros de
+    búsqueda, y se invalidan cuando cambia el corpus. En modo semántico
+    también se reutilizan resultados de consultas casi idénticas.
+    
     Args:
         query: Consulta de búsqueda
         k: Número de documentos a retornar
+        fetch_k: Candidatos a considerar para MMR y BM25 (por defecto 10)
+        lambda_mult: Balance relevancia/diversidad de MMR (1 = solo relevancia)
+        mode: "hybrid", "vector" o "lexical"
         
     Returns:
         Lista de documentos relevantes
     """
-    retriever = get_retriever()
-    retriever.search_kwargs["k"] = k
-    return retriever.invoke(query)
+    vectorstore = initialize_vectorstore()
+    cache = get_query_cache()
+    params = _search_params(k, fetch_k, lambda_mult, mode)
+    version = _corpus_version
+    
+    docs = cache.get(query, k, params, version)
+    if docs is not None:
+        return docs
+    
+    semaphore = _get_search_semaphore()
+    lexical_docs, decisive = _lexical_search(query, k, params)
+    if decisive:
+        cache.record_miss()
+        cache.put(query, k, params, version, lexical_docs)
+        return lexical_docs
+    
+    with semaphore:
+        embedding = get_embeddings().embed_query(query)
+    
+    docs = cache.get_similar(embedding, k, params, version)
+    if docs is not None:
+        return docs
+    
+    cache.record_miss()
+    with semaphore:
+        vector_docs = _mmr_by_vector(vectorstore, embedding, k, params)
+    docs = _fuse(vector_docs, lexical_docs, k, params)
+    cache.put(query, k, params, version, docs, embedding=embedding)
+    return docs
+
+
+async def asearch_documents(
+    query: str,
+    k: int = 4,
+    fetch_k: Optional[int] = None,
+    lambda_mult: float = DEFAULT_LAMBDA_MULT,
+    mode: Optional[str] = None,
+) -> List[Document]:
+    """
+    Versión asíncrona de `search_documents`.
+    
+    El embedding de la consulta usa la API asíncrona del modelo y las
+    búsquedas bloqueantes (Chroma, BM25) se ejecutan en un hilo, así que no
+    se bloquea el event loop. La concurrencia se limita por event loop.
+    
+    Args:
+        query: Consulta de búsqueda
+        k: Número de documentos a retornar
+        fetch_k: Candidatos a considerar para MMR y BM25 (por defecto 10)
+        lambda_mult: Balance relevancia/diversidad de MMR (1 = solo relevancia)
+        mode: "hybrid", "vector" o "lexical"
+        
+    Returns:
+        Lista de documentos relevantes
+    """
+    vectorstore = _vectorstore
+    if vectorstore is None:
+        vectorstore = await asyncio.to_thread(initialize_vectorstore)
+    cache = get_query_cache()
+    params = _search_params(k, fetch_k, lambda_mult, mode)
+    version = _corpus_version
+    
+    docs = cache.get(query, k, params, version)
+    if docs is not None:
+        return docs
+    
+    semaphore = _get_async_semaphore()
+    lexical_docs, decisive = await asyncio.to_thread(_lexical_search, query, k, params)
+    if decisive:
+        cache.record_miss()
+        cache.put(query, k, params, version, lexical_docs)
+        return lexical_docs
+    
+    async with semaphore:
+        embedding = await get_embeddings().aembed_query(query)
+    
+    docs = cache.get_similar(embedding, k, params, version)
+    if docs is not None:
+        return docs
+    
+    cache.record_miss()
+    async with semaphore:
+        vector_docs = await asyncio.to_thread(_mmr_by_vector, vectorstore, embedding, k, params)
+    docs = _fuse(vector_docs, lexical_docs, k, params)
+    cache.put(query, k, params, version, docs, embedding=embedding)
+    return docs
 
 
 def add_documents(documents: List[Document]) -> None:
     """
     Añade nuevos documentos al vector store.
     
+    Los documentos pasan por el mismo pipeline de ingesta en streaming y sus
+    chunks reciben IDs deterministas, así que añadir el mismo documento dos
+    veces no genera duplicados.
+    
     Args:
         documents: Lista de documentos a añadir
     """
@@ -174,18 +777,109 @@ def add_documents(documents: List[Document]) -> None:
     if _vectorstore is None:
         initialize_vectorstore()
     
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=200
+    sources = (
+        SourceDocument(
+            source=doc.metadata.get("source", ""),
+            metadata=doc.metadata,
+            text=doc.page_content,
+        )
+        for doc in documents
     )
-    chunks = text_splitter.split_documents(documents)
-    _vectorstore.add_documents(chunks)
-    print(f"[Research] Añadidos {len(chunks)} chunks al vector store")
+    try:
+        stats = _build_pipeline(_vectorstore).run(sources, total=len(documents))
+    finally:
+        _bump_corpus_version()
+    print(f"[Research] Añadidos {stats.chunks} chunks al vector store ({stats.summary()})")
 
 
 def reset_vectorstore() -> None:
     """Reinicia el vector store (útil para testing o reindexación)."""
     global _vectorstore, _retriever
-    _vectorstore = None
-    _retriever = None
-    print("[Research] Vector store reiniciado")
\ No newline at end of file
+    with _init_lock:
+        _vectorstore = None
+        _retriever = None
+        _ready.clear()
+        _bump_corpus_version()
+    print("[Research] Vector store reiniciado")
+
+# ====================================
+# Reindexación en caliente
+# ====================================
+_watcher: Optional[DirectoryWatcher] = None
+
+
+def refresh_documents() -> int:
+    """
+    Aplica de forma incremental los cambios de `documentos/`.
+    
+    A diferencia de `initialize_vectorstore(force_reload=True)`, solo se
+    procesan los archivos añadidos, modificados o eliminados, y las
+    búsquedas se siguen sirviendo mientras tanto.
+    
+    Returns:
+        Número de archivos añadidos, modificados o eliminados
+    """
+    vectorstore = initialize_vectorstore()
+    with _init_lock:
+        manifest = IngestManifest.load(get_manifest_file(), _splitter_signature())
+        return _sync_documents(vectorstore, manifest, get_documentos_dir())
+
+
+def _snapshot_documents() -> Dict[str, Tuple[int, int]]:
+    """Tamaño y mtime de los documentos indexables (para el sondeo)."""
+    snapshot = {}
+    for source, path in _list_source_files(get_documentos_dir()).items():
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        snapshot[source] = (stat.st_size, stat.st_mtime_ns)
+    return snapshot
+
+
+def start_watcher() -> DirectoryWatcher:
+    """
+    Arranca la vigilancia de `documentos/` (idempotente).
+    
+    Los cambios se detectan por sondeo cada `RESEARCH_WATCH_INTERVAL`
+    segundos, se agrupan durante `RESEARCH_WATCH_DEBOUNCE` segundos y se
+    aplican con `refresh_documents` en un hilo de trabajo.
+    
+    Returns:
+        El watcher en ejecución
+    """
+    global _watcher
+    with _init_lock:
+        if _watcher is not None and _watcher.is_running():
+            return _watcher
+        
+        config = get_config()
+        
+        def on_change(changed: List[str]) -> None:
+            print(f"[Research] Cambios en documentos: {', '.join(changed)}")
+            refresh_documents()
+        
+        _watcher = DirectoryWatcher(
+            snapshot=_snapshot_documents,
+            on_change=on_change,
+            interval=config.watch_interval,
+            debounce=config.watch_debounce,
+        )
+        _watcher.start()
+        print(f"[Research] Vigilando {get_documentos_dir()} cada {config.watch_interval:g}s")
+        return _watcher
+
+
+def stop_watcher() -> None:
+    """Detiene la vigilancia de `documentos/`."""
+    global _watcher
+    if _watcher is not None:
+        _watcher.stop()
+        _watcher = None
+
+
+def get_watcher_metrics() -> Dict:
+    """Métricas del watcher (retraso de reindexación, profundidad de la cola...)."""
+    if _watcher is None:
+        return {"running": False}
+    return _watcher.metrics()
@@ -0,0 +1,229 @@
+"""
+Vigilancia de `documentos/` por sondeo (polling) para reindexar en caliente.
+
+El sondeo compara tamaño y mtime de los archivos cada `interval` segundos,
+así que funciona igual en cualquier sistema de archivos (incluidos
+volúmenes montados en contenedores, donde inotify no siempre llega).
+
+Los cambios se agrupan: solo se reindexa cuando no hubo cambios nuevos
+durante `debounce` segundos, y la reindexación corre en un hilo propio
+para que el sondeo no se detenga mientras tanto.
+"""
+
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+Snapshot = Dict[str, Tuple[int, int]]
+
+
+@dataclass
+class _Batch:
+    files: Set[str]
+    detected_at: float
+
+
+@dataclass
+class WatcherMetrics:
+    """Contadores del watcher."""
+    polls: int = 0
+    changes_detected: int = 0
+    reindexes: int = 0
+    errors: int = 0
+    last_error: Optional[str] = None
+    last_reindex_seconds: Optional[float] = None
+    last_lag_seconds: Optional[float] = None
+    max_lag_seconds: float = 0.0
+    lags: List[float] = field(default_factory=list)
+
+
+class DirectoryWatcher:
+    """
+    Detecta archivos añadidos, modificados o eliminados y llama a `on_change`.
+
+    Args:
+        snapshot: Retorna {nombre: (tamaño, mtime_ns)} de los archivos vigilados
+        on_change: Aplica los cambios (recibe los nombres cambiados)
+        interval: Segundos entre sondeos
+        debounce: Segundos sin cambios antes de reindexar
+    """
+
+    def __init__(
+        self,
+        snapshot: Callable[[], Snapshot],
+        on_change: Callable[[List[str]], None],
+        interval: float = 2.0,
+        debounce: float = 1.0,
+    ):
+        self.snapshot = snapshot
+        self.on_change = on_change
+        self.interval = interval
+        self.debounce = debounce
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._queue: "queue.Queue[Optional[_Batch]]" = queue.Queue()
+        self._previous: Optional[Snapshot] = None
+        self._pending: Set[str] = set()
+        self._pending_since: Optional[float] = None
+        self._last_change: Optional[float] = None
+        self._queued_files = 0
+        self._metrics = WatcherMetrics()
+        self._threads: List[threading.Thread] = []
+
+    # ------------------------------------
+    # Ciclo de vida
+    # ------------------------------------
+    def start(self) -> None:
+        """Arranca los hilos de sondeo y de reindexación."""
+        if self.is_running():
+            return
+        self._stop.clear()
+        self._previous = self.snapshot()
+        self._threads = [
+            threading.Thread(target=self._poll_loop, name="research-watcher-poll", daemon=True),
+            threading.Thread(target=self._work_loop, name="research-watcher-reindex", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Detiene el watcher (espera a que termine la reindexación en curso)."""
+        self._stop.set()
+        self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def is_running(self) -> bool:
+        return any(thread.is_alive() for thread in self._threads)
+
+    # ------------------------------------
+    # Sondeo
+    # ------------------------------------
+    def _poll_loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                with self._lock:
+                    self._metrics.errors += 1
+                    self._metrics.last_error = f"sondeo: {e}"
+
+    def poll(self) -> List[str]:
+        """
+        Compara el estado actual con el anterior y encola los cambios
+        cuando el periodo de debounce terminó.
+
+        Returns:
+            Nombres de archivos cambiados en este sondeo
+        """
+        current = self.snapshot()
+        now = time.monotonic()
+        previous = self._previous or {}
+        changed = [
+            name
+            for name in previous.keys() | current.keys()
+            if previous.get(name) != current.get(name)
+        ]
+        self._previous = current
+
+        with self._lock:
+            self._metrics.polls += 1
+            if changed:
+                self._metrics.changes_detected += len(changed)
+                self._pending.update(changed)
+                self._last_change = now
+                if self._pending_since is None:
+                    self._pending_since = now
+
+            ready = self._pending and now - self._last_change >= self.debounce
+            if ready:
+                batch = _Batch(files=self._pending, detected_at=self._pending_since)
+                self._queued_files += len(batch.files)
+                self._pending = set()
+                self._pending_since = None
+        if ready:
+            self._queue.put(batch)
+        return changed
+
+    # ------------------------------------
+    # Reindexación
+    # ------------------------------------
+    def _work_loop(self) -> None:
+        while True:
+            batch = self._queue.get()
+            if batch is None:
+                return
+
+            # Unir los lotes que se acumularon mientras se reindexaba
+            # (`queued` suma lo que se contó al encolar cada lote: la unión
+            # puede tener menos archivos si se repiten entre lotes)
+            queued = len(batch.files)
+            while True:
+                try:
+                    extra = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if extra is None:
+                    self._queue.put(None)
+                    break
+                queued += len(extra.files)
+                batch.files |= extra.files
+                batch.detected_at = min(batch.detected_at, extra.detected_at)
+
+            start = time.monotonic()
+            try:
+                self.on_change(sorted(batch.files))
+                error = None
+            except Exception as e:
+                error = str(e)
+            end = time.monotonic()
+
+            with self._lock:
+                self._queued_files -= queued
+                metrics = self._metrics
+                metrics.last_reindex_seconds = end - start
+                if error is not None:
+                    metrics.errors += 1
+                    metrics.last_error = error
+                    continue
+                lag = end - batch.detected_at
+                metrics.reindexes += 1
+                metrics.last_lag_seconds = lag
+                metrics.max_lag_seconds = max(metrics.max_lag_seconds, lag)
+                metrics.lags = (metrics.lags + [lag])[-100:]
+
+    # ------------------------------------
+    # Métricas
+    # ------------------------------------
+    def metrics(self) -> Dict:
+        """
+        Métricas actuales.
+
+        - queue_depth: archivos cambiados aún no aplicados al índice
+          (en debounce, encolados o reindexándose)
+        - last_lag_seconds / max_lag_seconds: desde que se detectó el primer
+          cambio de un lote hasta que quedó indexado (el sondeo añade hasta
+          `interval` segundos de detección)
+        """
+        with self._lock:
+            metrics = self._metrics
+            lags = sorted(metrics.lags)
+            return {
+                "running": self.is_running(),
+                "interval_seconds": self.interval,
+                "debounce_seconds": self.debounce,
+                "queue_depth": len(self._pending) + self._queued_files,
+                "polls": metrics.polls,
+                "changes_detected": metrics.changes_detected,
+                "reindexes": metrics.reindexes,
+                "errors": metrics.errors,
+                "last_error": metrics.last_error,
+                "last_reindex_seconds": metrics.last_reindex_seconds,
+                "last_lag_seconds": metrics.last_lag_seconds,
+                "p50_lag_seconds": lags[len(lags) // 2] if lags else None,
+                "max_lag_seconds": metrics.max_lag_seconds,
+            }
@@ -0,0 +1,305 @@
+"""
+Caché de resultados de `buscar_web` con coalescencia y refresco anticipado.
+
+Envuelve el backend de búsqueda web (Tavily, o un stub en los benchmarks):
+- La clave es la consulta normalizada (Unicode, espacios, mayúsculas y
+  signos de puntuación de los extremos) más el resto de parámetros de la
+  búsqueda (dominios, rango de fechas, ...).
+- Las entradas caducan a los `ttl_seconds` y, por encima de `max_entries`,
+  se desaloja la usada hace más tiempo.
+- Consultas idénticas concurrentes (de distintas sesiones o hilos) esperan
+  a una única llamada al backend.
+- Refresco anticipado (opcional): una entrada consultada al menos
+  `hot_hits` veces que ha consumido la fracción `refresh_ahead` de su TTL
+  se vuelve a pedir en segundo plano, mientras se sigue sirviendo la actual.
+
+Los errores del backend no se cachean y se propagan a los que esperaban la
+misma llamada. Si la llamada se interrumpe sin error propio (la corrutina
+que la hacía se cancela), los que esperaban no heredan la cancelación: el
+primero vuelve a hacer la llamada y el resto espera a esa. `stats()` reporta la tasa de
+aciertos y la latencia del backend ahorrada (lo que habrían tardado las
+llamadas evitadas).
+"""
+
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from agents.support.nodes.research.embeddings import normalize_text
+
+# Signos que no cambian la consulta ("¿horario de la clínica?" == "horario de la clínica")
+_EDGE_PUNCTUATION = " ¿?¡!.,;:\"'«»"
+
+
+def normalize_query(query: str) -> str:
+    return normalize_text(query).lower().strip(_EDGE_PUNCTUATION)
+
+
+def _cache_key(query: str, params: Dict[str, Any]) -> Tuple[str, str]:
+    # Parámetros vacíos (p. ej. include_domains=[]) equivalen a no pasarlos
+    relevant = {name: value for name, value in params.items() if value not in (None, "", [], {})}
+    return normalize_query(query), json.dumps(relevant, sort_keys=True, default=str)
+
+
+class _Abandoned(Exception):
+    """La llamada en curso se interrumpió (no falló): los que esperaban reintentan."""
+
+
+def _cacheable(result: Any) -> bool:
+    """Tavily retorna un dict con "error" (o el texto del error) en lugar de lanzar."""
+    return isinstance(result, dict) and "error" not in result
+
+
+@dataclass
+class _Entry:
+    result: Any
+    created_at: float
+    upstream_seconds: float  # Lo que tardó el backend en calcularla
+    hits: int = 0
+    refreshing: bool = False
+
+
+class WebSearchCache:
+    """
+    Caché LRU con TTL delante de un backend de búsqueda web.
+
+    Args:
+        backend: Herramienta de búsqueda (`invoke`/`ainvoke` con
+            {"query": ..., **parámetros})
+        ttl_seconds: Vida máxima de una entrada
+        max_entries: Número máximo de consultas cacheadas
+        refresh_ahead: Fracción del TTL a partir de la que una entrada
+            caliente se refresca en segundo plano (0 = desactivado)
+        hot_hits: Aciertos para considerar caliente una entrada
+    """
+
+    def __init__(
+        self,
+        backend: Any,
+        ttl_seconds: float = 900.0,
+        max_entries: int = 1024,
+        refresh_ahead: float = 0.0,
+        hot_hits: int = 3,
+    ):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.refresh_ahead = refresh_ahead
+        self.hot_hits = hot_hits
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], Future] = {}
+        self._lock = threading.Lock()
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "expired": 0,
+            "evictions": 0,
+            "refreshes": 0,
+            "upstream_calls": 0,
+            "upstream_errors": 0,
+            "abandoned": 0,
+        }
+        self._upstream_seconds = 0.0
+        self._saved_seconds = 0.0
+
+    # ====================================
+    # Consulta
+    # ====================================
+    def _lookup(self, key: Tuple[str, str], retry: bool = False) -> Tuple[Optional[_Entry], Optional[Future], bool]:
+        """
+        Busca la clave (con el lock tomado). `retry`: la llamada que se esperaba
+        se abandonó y la consulta ya está contada.
+
+        Returns:
+            (entrada vigente, llamada en curso a la que esperar, si esta
+            llamada debe ir al backend) — solo uno de los tres aplica
+        """
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and now - entry.created_at > self.ttl_seconds:
+            del self._entries[key]
+            self._counters["expired"] += 1
+            entry = None
+        if entry is not None:
+            self._entries.move_to_end(key)
+            entry.hits += 1
+            self._counters["hits"] += 1
+            self._saved_seconds += entry.upstream_seconds
+            return entry, None, False
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self._counters["coalesced"] += not retry
+            return None, future, False
+
+        self._counters["misses"] += not retry
+        self._inflight[key] = Future()
+        return None, self._inflight[key], True
+
+    def _should_refresh(self, entry: _Entry) -> bool:
+        """Marca la entrada para refresco si está caliente y avanzada (con el lock tomado)."""
+        if not self.refresh_ahead or entry.refreshing or entry.hits < self.hot_hits:
+            return False
+        if time.monotonic() - entry.created_at < self.refresh_ahead * self.ttl_seconds:
+            return False
+        entry.refreshing = True
+        return True
+
+    def _store(self, key: Tuple[str, str], result: Any, elapsed: float) -> None:
+        """Guarda el resultado del backend y despierta a los que esperaban."""
+        with self._lock:
+            self._counters["upstream_calls"] += 1
+            self._upstream_seconds += elapsed
+            if _cacheable(result):
+                self._entries[key] = _Entry(result, time.monotonic(), elapsed)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self._counters["evictions"] += 1
+            else:
+                self._counters["upstream_errors"] += 1
+            future = self._inflight.pop(key, None)
+        if future is not None:
+            future.set_result(result)
+
+    def _fail(self, key: Tuple[str, str], error: BaseException) -> None:
+        with self._lock:
+            self._counters["upstream_calls"] += 1
+            self._counters["upstream_errors"] += 1
+            future = self._inflight.pop(key, None)
+        if future is not None:
+            future.set_exception(error)
+
+    def _abandon(self, key: Tuple[str, str]) -> None:
+        """La llamada se interrumpió (cancelación, KeyboardInterrupt): no es un error del backend."""
+        with self._lock:
+            self._counters["abandoned"] += 1
+            future = self._inflight.pop(key, None)
+        if future is not None:
+            future.set_exception(_Abandoned())
+
+    def _call_backend(self, key: Tuple[str, str], args: Dict[str, Any]) -> Any:
+        start = time.perf_counter()
+        try:
+            result = self.backend.invoke(args)
+        except Exception as error:
+            self._fail(key, error)
+            raise
+        except BaseException:
+            self._abandon(key)
+            raise
+        self._store(key, result, time.perf_counter() - start)
+        return result
+
+    def _begin(self, key: Tuple[str, str], args: Dict[str, Any], retry: bool):
+        """Consulta la caché; retorna (entrada, llamada a la que esperar, si llamar al backend)."""
+        with self._lock:
+            entry, future, owner = self._lookup(key, retry)
+            refresh = entry is not None and self._should_refresh(entry)
+        if refresh:
+            self._start_refresh(key, args)
+        return entry, future, owner
+
+    def get(self, query: str, **params: Any) -> Any:
+        """Resultado de la búsqueda, desde la caché o del backend."""
+        key, args = _cache_key(query, params), {"query": query, **params}
+        retry = False
+        while True:
+            entry, future, owner = self._begin(key, args, retry)
+            if entry is not None:
+                return entry.result
+            if owner:
+                return self._call_backend(key, args)
+            try:
+                return future.result()
+            except _Abandoned:
+                retry = True
+
+    async def aget(self, query: str, **params: Any) -> Any:
+        """Versión asíncrona de `get` (coalesce también con llamadas síncronas)."""
+        key, args = _cache_key(query, params), {"query": query, **params}
+        retry = False
+        while True:
+            entry, future, owner = self._begin(key, args, retry)
+            if entry is not None:
+                return entry.result
+            if owner:
+                break
+            try:
+                # shield: si se cancela este waiter, la llamada compartida sigue para los demás
+                return await asyncio.shield(asyncio.wrap_future(future))
+            except _Abandoned:
+                retry = True
+
+        start = time.perf_counter()
+        try:
+            result = await self.backend.ainvoke(args)
+        except Exception as error:
+            self._fail(key, error)
+            raise
+        except BaseException:
+            # Cancelada: el siguiente que esperaba hace la llamada
+            self._abandon(key)
+            raise
+        self._store(key, result, time.perf_counter() - start)
+        return result
+
+    # ====================================
+    # Refresco anticipado
+    # ====================================
+    def _start_refresh(self, key: Tuple[str, str], args: Dict[str, Any]) -> None:
+        threading.Thread(target=self._refresh, args=(key, args), name="web-cache-refresh", daemon=True).start()
+
+    def _refresh(self, key: Tuple[str, str], args: Dict[str, Any]) -> None:
+        """Vuelve a pedir una entrada caliente; si falla, se conserva la actual."""
+        start = time.perf_counter()
+        try:
+            result = self.backend.invoke(args)
+        except Exception:
+            result = None
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._counters["upstream_calls"] += 1
+            self._upstream_seconds += elapsed
+            entry = self._entries.get(key)
+            if not _cacheable(result):
+                self._counters["upstream_errors"] += 1
+                if entry is not None:
+                    entry.refreshing = False
+                return
+            self._counters["refreshes"] += 1
+            # La entrada nueva hereda los aciertos: sigue caliente
+            self._entries[key] = _Entry(result, time.monotonic(), elapsed, hits=entry.hits if entry else 0)
+
+    # ====================================
+    # Métricas
+    # ====================================
+    def stats(self) -> Dict:
+        """Aciertos, llamadas al backend y latencia ahorrada."""
+        with self._lock:
+            counters = dict(self._counters)
+            entries = len(self._entries)
+            upstream_seconds = self._upstream_seconds
+            saved_seconds = self._saved_seconds
+        served = counters["hits"] + counters["coalesced"]
+        lookups = served + counters["misses"]
+        calls = counters["upstream_calls"]
+        counters.update({
+            "hit_rate": served / lookups if lookups else 0.0,
+            "entries": entries,
+            "upstream_seconds": upstream_seconds,
+            "upstream_mean_ms": upstream_seconds / calls * 1000 if calls else None,
+            # Las coalescidas esperan a la llamada en curso: ahorran llamadas, no latencia
+            "saved_seconds": saved_seconds,
+        })
+        return counters
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,347 @@
+"""
+Clasificador local de intención (ruta rápida delante del router LLM).
+
+Etapas, de más barata a más cara:
+1. Reglas por palabras clave (sin red, microsegundos)
+2. Centroide más cercano: el mensaje se compara con el embedding medio de
+   los ejemplos de cada intención de `prompt.py`. Los embeddings de los
+   ejemplos se calculan una vez y quedan en la caché de embeddings.
+3. Si ninguna etapa alcanza la confianza mínima, `intent_route` llama al
+   LLM con `RouteIntent` como hasta ahora.
+
+Calibración: al preparar los centroides se valida con "leave-one-out" sobre
+los propios ejemplos (cada ejemplo contra centroides calculados sin él, sin
+llamadas extra al modelo de embeddings). Con esas predicciones se elige la
+temperatura del softmax que minimiza la log-loss y el umbral de confianza
+más bajo con el que las decisiones aceptadas alcanzan la precisión objetivo.
+
+Solo se clasifica el último mensaje del usuario, sin contexto. Por eso, si
+responde a un mensaje del asistente, solo deciden las reglas de tareas
+(booking/research): "el martes a las 10 con el doctor Pérez" o
+"Perfecto, confírmala" a mitad de una reserva se dejan al LLM, que ve la
+conversación; nunca pasan por los centroides ni por la regla de saludos.
+"""
+
+import asyncio
+import math
+import re
+import threading
+import unicodedata
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+INTENTS = ("conversation", "booking", "research")
+
+# Confianza asignada a una coincidencia de reglas inequívoca
+RULE_CONFIDENCE = 0.95
+
+# Mensajes con menos palabras que esto, tras una respuesta del asistente,
+# se consideran continuaciones que necesitan el contexto completo
+MIN_STANDALONE_WORDS = 3
+
+# Temperaturas que se prueban al calibrar (log-loss leave-one-out)
+CALIBRATION_TEMPERATURES = np.geomspace(0.005, 0.5, 41)
+
+_RULES = {
+    "booking": re.compile(
+        r"\b(reserv\w*|agend\w*|citas?|turnos?|disponibilidad|hueco|pedir hora|"
+        r"cancelar (mi |la )?(cita|reserva)|cambiar (la hora|mi cita))\b"
+    ),
+    "research": re.compile(
+        r"\b(busca\w*|investig\w*|documentacion|documentos?|manual\w*|notas?|guarda\w*|"
+        r"consulta en|informacion (sobre|actualizada)|noticias)\b"
+    ),
+    # Mensajes hechos solo de saludos, agradecimientos y coletillas de cortesía
+    # ("buenos dias necesito ver a un doctor" no cuenta)
+    "conversation": re.compile(
+        r"^(?:hola|buen[oa]s(?: dias| tardes| noches)?|muchas gracias|gracias|adios|hasta luego|ok|vale|perfecto)"
+        r"(?: (?:hola|buen[oa]s(?: dias| tardes| noches)?|muchas gracias|gracias|adios|hasta luego|ok|vale|"
+        r"perfecto|que tal|como estas?|por (?:todo|la ayuda|tu ayuda|su ayuda)|a todos|muy amable|igualmente|"
+        r"entonces|de nuevo))*$"
+    ),
+}
+
+
+def normalize(text: str) -> str:
+    """Minúsculas, sin tildes ni signos de puntuación."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    plain = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(re.sub(r"[^\w\s]", " ", plain).split())
+
+
+def last_user_text(messages: Sequence[BaseMessage]) -> Optional[str]:
+    """Texto del último mensaje del usuario."""
+    for message in reversed(messages):
+        if isinstance(message, HumanMessage):
+            content = message.content
+            if isinstance(content, list):
+                content = " ".join(
+                    block.get("text", "") if isinstance(block, dict) else str(block)
+                    for block in content
+                )
+            return content
+    return None
+
+
+def follows_assistant(messages: Sequence[BaseMessage]) -> bool:
+    """Si el último mensaje del usuario responde directamente a uno del asistente."""
+    for index in range(len(messages) - 1, -1, -1):
+        if isinstance(messages[index], HumanMessage):
+            return index > 0 and isinstance(messages[index - 1], AIMessage)
+    return False
+
+
+@dataclass
+class IntentDecision:
+    """Resultado del clasificador local."""
+    intent: str
+    confidence: float
+    stage: str  # "rules" o "centroid"
+
+
+class IntentClassifier:
+    """
+    Reglas + centroide más cercano sobre embeddings de ejemplos.
+
+    Args:
+        examples: Ejemplos por intención
+        embeddings: Función que retorna el modelo de embeddings
+        temperature: Temperatura del softmax sobre similitudes coseno (más
+            baja = confianzas más extremas); None = calibrada
+        min_confidence: Umbral mínimo de la etapa de centroides
+        target_precision: Precisión leave-one-out que deben alcanzar las
+            decisiones de centroides aceptadas (fija el umbral calibrado)
+    """
+
+    def __init__(
+        self,
+        examples: Dict[str, List[str]],
+        embeddings: Callable[[], Embeddings],
+        temperature: Optional[float] = None,
+        min_confidence: float = 0.75,
+        target_precision: float = 0.95,
+    ):
+        self.examples = examples
+        self.embeddings = embeddings
+        self.temperature = temperature
+        self.min_confidence = min_confidence
+        self.target_precision = target_precision
+        # Confianza mínima de la etapa de centroides (se calibra en prepare)
+        self.centroid_threshold = min_confidence
+        self.calibration: Dict = {}
+        self._centroids: Optional[np.ndarray] = None
+        self._labels: List[str] = []
+        self._lock = threading.Lock()
+
+    def prepare(self) -> None:
+        """Calcula los centroides (embebe los ejemplos la primera vez)."""
+        if self._centroids is not None:
+            return
+        with self._lock:
+            if self._centroids is not None:
+                return
+            labels = list(self.examples)
+            texts = [example for label in labels for example in self.examples[label]]
+            vectors = np.asarray(self.embeddings().embed_documents(texts), dtype=np.float32)
+
+            centroids = []
+            start = 0
+            for label in labels:
+                count = len(self.examples[label])
+                centroid = vectors[start:start + count].mean(axis=0)
+                centroids.append(centroid / np.linalg.norm(centroid))
+                start += count
+            self._calibrate(vectors, labels)
+            self._labels = labels
+            self._centroids = np.stack(centroids)
+
+    def _calibrate(self, vectors: np.ndarray, labels: List[str]) -> None:
+        """Temperatura y umbral a partir de predicciones leave-one-out sobre los ejemplos."""
+        targets = np.array([index for index, label in enumerate(labels) for _ in self.examples[label]])
+        counts = np.bincount(targets, minlength=len(labels))
+        if counts.min() < 2:
+            return  # Sin ejemplos suficientes: valores configurados
+        sums = np.stack([vectors[targets == index].sum(axis=0) for index in range(len(labels))])
+        queries = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+        similarities = np.empty((len(vectors), len(labels)), dtype=np.float64)
+        for row, (vector, target) in enumerate(zip(vectors, targets)):
+            centroids = sums / counts[:, None]
+            # El centroide de su intención, calculado sin el propio ejemplo
+            centroids[target] = (sums[target] - vector) / (counts[target] - 1)
+            centroids /= np.linalg.norm(centroids, axis=1, keepdims=True)
+            similarities[row] = centroids @ queries[row]
+
+        def probabilities(temperature: float) -> np.ndarray:
+            scores = similarities / temperature
+            exp = np.exp(scores - scores.max(axis=1, keepdims=True))
+            return exp / exp.sum(axis=1, keepdims=True)
+
+        if self.temperature is None:
+            losses = [
+                -np.log(probabilities(t)[np.arange(len(targets)), targets] + 1e-12).mean()
+                for t in CALIBRATION_TEMPERATURES
+            ]
+            self.temperature = float(CALIBRATION_TEMPERATURES[int(np.argmin(losses))])
+
+        probs = probabilities(self.temperature)
+        confidence = probs.max(axis=1)
+        correct = probs.argmax(axis=1) == targets
+        order = np.argsort(-confidence)
+        precision = np.cumsum(correct[order]) / np.arange(1, len(order) + 1)
+        accepted = np.nonzero(precision >= self.target_precision)[0]
+        # Umbral: la confianza más baja del prefijo más largo que cumple la precisión
+        # (ninguno la cumple: la etapa de centroides nunca decide)
+        threshold = float(confidence[order][accepted[-1]]) if len(accepted) else math.inf
+        self.centroid_threshold = max(self.min_confidence, threshold)
+        self.calibration = {
+            "temperature": self.temperature,
+            "centroid_threshold": self.centroid_threshold if math.isfinite(self.centroid_threshold) else None,
+            "loo_accuracy": float(correct.mean()),
+            "loo_coverage": float((confidence >= self.centroid_threshold).mean()),
+        }
+
+    def classify_rules(self, text: str, pending_reply: bool = False) -> Optional[IntentDecision]:
+        """
+        Etapa de reglas: decide solo si exactamente una intención de tarea
+        (booking o research) coincide; los saludos solo cuentan si no hay
+        ninguna ("hola, quiero una cita" es booking) ni el mensaje responde
+        al asistente (`pending_reply`).
+        """
+        normalized = normalize(text)
+        matches = [
+            intent
+            for intent in ("booking", "research")
+            if _RULES[intent].search(normalized)
+        ]
+        if len(matches) == 1:
+            return IntentDecision(matches[0], RULE_CONFIDENCE, "rules")
+        if not matches and not pending_reply and _RULES["conversation"].search(normalized):
+            return IntentDecision("conversation", RULE_CONFIDENCE, "rules")
+        return None
+
+    def classify_centroid(self, text: str) -> IntentDecision:
+        """Etapa de centroides: softmax de la similitud con cada intención."""
+        self.prepare()
+        return self._nearest(self.embeddings().embed_query(text))
+
+    async def aclassify_centroid(self, text: str) -> IntentDecision:
+        """Versión asíncrona de `classify_centroid` (embedding con la API asíncrona)."""
+        if self._centroids is None:
+            await asyncio.to_thread(self.prepare)
+        return self._nearest(await self.embeddings().aembed_query(text))
+
+    def _nearest(self, vector: Sequence[float]) -> IntentDecision:
+        query = np.asarray(vector, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+        scores = self._centroids @ query / self.temperature
+        probabilities = np.exp(scores - scores.max())
+        probabilities /= probabilities.sum()
+        best = int(np.argmax(probabilities))
+        return IntentDecision(self._labels[best], float(probabilities[best]), "centroid")
+
+    def classify(self, messages: Sequence[BaseMessage]) -> Optional[IntentDecision]:
+        """
+        Clasifica la intención del último mensaje del usuario.
+
+        Returns:
+            La decisión local (con su confianza), o None si el mensaje
+            necesita el contexto completo y debe decidirlo el LLM
+        """
+        text = self._centroid_text(messages)
+        if isinstance(text, IntentDecision) or text is None:
+            return text
+        return self.classify_centroid(text)
+
+    async def aclassify(self, messages: Sequence[BaseMessage]) -> Optional[IntentDecision]:
+        """Versión asíncrona de `classify`."""
+        text = self._centroid_text(messages)
+        if isinstance(text, IntentDecision) or text is None:
+            return text
+        return await self.aclassify_centroid(text)
+
+    def _centroid_text(self, messages: Sequence[BaseMessage]):
+        """
+        Etapas sin red: retorna la decisión de las reglas, None si decide el
+        LLM, o el texto que debe pasar a la etapa de centroides.
+        """
+        text = last_user_text(messages)
+        if not text or not text.strip():
+            return None
+
+        # Respuestas cortas a una pregunta del asistente dependen del contexto
+        pending_reply = follows_assistant(messages)
+        if pending_reply and len(normalize(text).split()) < MIN_STANDALONE_WORDS:
+            return None
+
+        decision = self.classify_rules(text, pending_reply)
+        if decision is not None:
+            return decision
+        # Respuesta al asistente sin regla de tarea: los centroides no ven el
+        # contexto (el flujo en curso), así que decide el LLM
+        if pending_reply:
+            return None
+        return text
+
+
+# ====================================
+# Métricas
+# ====================================
+class RouterMetrics:
+    """
+    Contadores del router por etapa.
+
+    La precisión se estima con verificaciones en sombra: una fracción de las
+    decisiones locales se compara, fuera del camino crítico, con el LLM.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._decisions = {stage: 0 for stage in ("rules", "centroid", "llm")}
+        self._seconds = {stage: 0.0 for stage in self._decisions}
+        self._intents = {intent: 0 for intent in INTENTS}
+        self._shadow_checked = {stage: 0 for stage in ("rules", "centroid")}
+        self._shadow_agreed = {stage: 0 for stage in ("rules", "centroid")}
+        self._errors = 0
+
+    def record(self, stage: str, intent: str, seconds: float) -> None:
+        with self._lock:
+            self._decisions[stage] += 1
+            self._seconds[stage] += seconds
+            self._intents[intent] = self._intents.get(intent, 0) + 1
+
+    def record_shadow(self, stage: str, agreed: bool) -> None:
+        with self._lock:
+            self._shadow_checked[stage] += 1
+            self._shadow_agreed[stage] += int(agreed)
+
+    def record_error(self) -> None:
+        with self._lock:
+            self._errors += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            total = sum(self._decisions.values())
+            checked = sum(self._shadow_checked.values())
+            agreed = sum(self._shadow_agreed.values())
+            return {
+                "decisions": total,
+                "by_stage": dict(self._decisions),
+                "by_intent": dict(self._intents),
+                "llm_fallback_rate": self._decisions["llm"] / total if total else 0.0,
+                "avg_ms_by_stage": {
+                    stage: self._seconds[stage] / count * 1000 if count else None
+                    for stage, count in self._decisions.items()
+                },
+                "shadow_checked": checked,
+                "accuracy": agreed / checked if checked else None,
+                "accuracy_by_stage": {
+                    stage: self._shadow_agreed[stage] / count if count else None
+                    for stage, count in self._shadow_checked.items()
+                },
+                "errors": self._errors,
+            }
@@ -1,37 +1,61 @@
-SYSTEM_PROMPT = """
+# Ejemplos por intención: se usan en el prompt del LLM y como prototipos
+# del clasificador local (ver classifier.py)
+EXAMPLES = {
+    "conversation": [
+        "Hola, ¿cómo estás?",
+        "¿Qué servicios ofrecen?",
+        "Gracias por la información",
+        "¿Cuál es tu horario?",
+        "Buenos días",
+        "¿Dónde están ubicados?",
+        "Perfecto, muchas gracias, eso es todo",
+        "¿Con quién estoy hablando?",
+    ],
+    "booking": [
+        "Quiero hacer una reserva",
+        "¿Tienen disponibilidad para mañana?",
+        "Necesito agendar una cita",
+        "¿Puedo reservar para 3 personas?",
+        "Quiero pedir turno con el doctor",
+        "Necesito cambiar la hora de mi cita",
+        "Quiero cancelar mi reserva",
+        "¿Hay hueco el viernes por la tarde?",
+    ],
+    "research": [
+        "Busca información sobre machine learning",
+        "¿Qué dice la documentación sobre autenticación?",
+        "Investiga las últimas noticias sobre IA",
+        "Necesito información actualizada sobre Python 3.12",
+        "Guarda esta información importante",
+        "Muéstrame mis notas anteriores",
+        "¿Qué encontramos sobre el tema X en la sesión anterior?",
+        "Consulta en los documentos qué dice el manual sobre la garantía",
+    ],
+}
+
+
+def _examples_block() -> str:
+    return "\n\n".join(
+        f"{intent.upper()}:\n" + "\n".join(f'- "{example}"' for example in examples)
+        for intent, examples in EXAMPLES.items()
+    )
+
+
+SYSTEM_PROMPT = f"""
 Analiza la intención del usuario y decide el siguiente paso en el flujo de conversación.
 
 Opciones disponibles:
 - "conversation": Conversación general, saludos, preguntas simples sobre el servicio
 - "booking": El usuario quiere hacer una reserva, agendar una cita o consultar disponibilidad
-- "research": El usuario solicita investigación, búsqueda de información, consulta de documentos, 
+- "research": El usuario solicita investigación, búsqueda de información, consulta de documentos,
   o quiere guardar/recuperar notas de investigación
 
 Ejemplos de cada intención:
 
-CONVERSATION:
-- "Hola, ¿cómo estás?"
-- "¿Qué servicios ofrecen?"
-- "Gracias por la información"
-- "¿Cuál es tu horario?"
-
-BOOKING:
-- "Quiero hacer una reserva"
-- "¿Tienen disponibilidad para mañana?"
-- "Necesito agendar una cita"
-- "¿Puedo reservar para 3 personas?"
-
-RESEARCH:
-- "Busca información sobre machine learning"
-- "¿Qué dice la documentación sobre autenticación?"
-- "Investiga las últimas noticias sobre IA"
-- "Necesito información actualizada sobre Python 3.12"
-- "Guarda esta información importante"
-- "Muéstrame mis notas anteriores"
-- "¿Qué encontramos sobre el tema X en la sesión anterior?"
+{_examples_block()}
 
 Contexto adicional:
 - Si el usuario hace preguntas que requieren consultar documentos o bases de conocimiento → research
 - Si el usuario solicita información que podría requerir búsqueda web → research
 - Si el usuario menciona "buscar", "investigar", "guardar nota", "consultar documentos" → research
-"""
\ No newline at end of file
+"""
@@ -1,8 +1,15 @@
+import os
+import random
+import threading
+import time
 from pydantic import BaseModel, Field
-from typing import Literal
-from langchain.chat_models import init_chat_model
+from typing import Dict, Literal, Optional
 from agents.support.state import State
-from agents.support.routes.intent.prompt import SYSTEM_PROMPT
+from agents.support import telemetry
+from agents.support.history import window_for
+from agents.support.llm import get_chat_model
+from agents.support.routes.intent.classifier import IntentClassifier, RouterMetrics
+from agents.support.routes.intent.prompt import EXAMPLES, SYSTEM_PROMPT
 
 class RouteIntent(BaseModel):
     step: Literal["conversation", "booking", "research"] = Field(  # ← AÑADIR "research"
@@ -10,15 +17,148 @@ class RouteIntent(BaseModel):
         description="The next step in the routing process: conversation, booking, or research"
     )
 
-llm = init_chat_model("openai:gpt-4o", temperature=0)
-llm = llm.with_structured_output(schema=RouteIntent)
+# Ruta rápida local: reglas + centroides antes del LLM
+FAST_PATH_ENABLED = os.getenv("INTENT_FAST_PATH", "1") not in ("0", "false", "no")
+# Confianza mínima de la ruta rápida para no llamar al LLM (los centroides
+# usan el umbral calibrado si es mayor)
+CONFIDENCE_THRESHOLD = float(os.getenv("INTENT_CONFIDENCE_THRESHOLD", "0.75"))
+# Temperatura del softmax sobre similitudes con los centroides (vacío = calibrada)
+CENTROID_TEMPERATURE = float(os.getenv("INTENT_CENTROID_TEMPERATURE") or 0) or None
+# Precisión leave-one-out que fija el umbral calibrado de los centroides
+CENTROID_PRECISION = float(os.getenv("INTENT_CENTROID_PRECISION", "0.95"))
+# Fracción de decisiones locales que se verifican con el LLM en segundo plano
+SHADOW_RATE = float(os.getenv("INTENT_SHADOW_RATE", "0.02"))
 
-def intent_route(state: State) -> Literal["conversation", "booking", "research"]:  # ← AÑADIR "research"
-    history = state["messages"]
-    print('*'*100)
-    print(history)
-    print('*'*100)
-    schema = llm.invoke([("system", SYSTEM_PROMPT)] + history)
+_llm = None
+_classifier: Optional[IntentClassifier] = None
+_metrics = RouterMetrics()
+
+def get_llm():
+    global _llm
+    if _llm is None:
+        _llm = get_chat_model("openai:gpt-4o", temperature=0).with_structured_output(schema=RouteIntent)
+    return _llm
+
+def get_classifier() -> IntentClassifier:
+    """Clasificador local; reutiliza los embeddings (y su caché en disco) de research."""
+    global _classifier
+    if _classifier is None:
+        from agents.support.nodes.research.vectorstore import get_embeddings
+
+        _classifier = IntentClassifier(
+            EXAMPLES,
+            embeddings=get_embeddings,
+            temperature=CENTROID_TEMPERATURE,
+            min_confidence=CONFIDENCE_THRESHOLD,
+            target_precision=CENTROID_PRECISION,
+        )
+    return _classifier
+
+def get_router_metrics() -> Dict:
+    """Decisiones por etapa, tasa de fallback al LLM, precisión estimada y calibración."""
+    snapshot = _metrics.snapshot()
+    snapshot["calibration"] = dict(_classifier.calibration) if _classifier is not None else {}
+    return snapshot
+
+def _collect_router_metrics():
+    snapshot = _metrics.snapshot()
+    for stage, count in snapshot["by_stage"].items():
+        yield "support_intent_decisions_total", {"stage": stage}, count, "counter"
+    yield "support_intent_llm_fallback_rate", {}, snapshot["llm_fallback_rate"], "gauge"
+
+telemetry.register_collector(_collect_router_metrics)
+
+def _llm_route(history) -> str:
+    schema = get_llm().invoke([("system", SYSTEM_PROMPT)] + history)
     if schema.step is not None:
         return schema.step
-    return 'conversation'
\ No newline at end of file
+    return 'conversation'
+
+def _shadow_check(history, stage: str, intent: str) -> None:
+    """Compara una decisión local con la del LLM sin bloquear el turno."""
+    def run():
+        try:
+            _metrics.record_shadow(stage, _llm_route(history) == intent)
+        except Exception:
+            _metrics.record_error()
+    threading.Thread(target=run, name="intent-shadow", daemon=True).start()
+
+def _accept_local(state: State, decision, start: float) -> Optional[str]:
+    """Retorna la intención local si supera el umbral (y la registra)."""
+    if decision is None or decision.confidence < CONFIDENCE_THRESHOLD:
+        return None
+    if decision.stage == "centroid" and decision.confidence < get_classifier().centroid_threshold:
+        return None
+    _metrics.record(decision.stage, decision.intent, time.perf_counter() - start)
+    telemetry.event("intent", intent=decision.intent, stage=decision.stage, confidence=decision.confidence)
+    if SHADOW_RATE and random.random() < SHADOW_RATE:
+        _shadow_check(window_for("intent", state), decision.stage, decision.intent)
+    return decision.intent
+
+def _fast_path_error(e: Exception) -> None:
+    # Sin embeddings (p. ej. error de red) se decide con el LLM
+    telemetry.event("intent_fast_path_error", error=f"{type(e).__name__}: {e}")
+    _metrics.record_error()
+
+def local_route(state: State, start: float) -> Optional[str]:
+    """Etapas locales del router (reglas + centroides); None si debe decidir el LLM."""
+    if not FAST_PATH_ENABLED:
+        return None
+    try:
+        decision = get_classifier().classify(state["messages"])
+    except Exception as e:
+        _fast_path_error(e)
+        decision = None
+    return _accept_local(state, decision, start)
+
+async def alocal_route(state: State, start: float) -> Optional[str]:
+    """Versión asíncrona de `local_route`."""
+    if not FAST_PATH_ENABLED:
+        return None
+    try:
+        decision = await get_classifier().aclassify(state["messages"])
+    except Exception as e:
+        _fast_path_error(e)
+        decision = None
+    return _accept_local(state, decision, start)
+
+def record_llm_route(step: str, start: float, stage: str = "llm") -> None:
+    """Registra una decisión tomada por un modelo (`stage` distingue la llamada combinada)."""
+    _metrics.record("llm", step, time.perf_counter() - start)
+    telemetry.event("intent", intent=step, stage=stage)
+
+def intent_route(state: State) -> Literal["conversation", "booking", "research"]:  # ← AÑADIR "research"
+    start = time.perf_counter()
+    intent = local_route(state, start)
+    if intent is not None:
+        return intent
+    
+    step = _llm_route(window_for("intent", state))
+    record_llm_route(step, start)
+    return step
+
+async def aintent_route(state: State) -> Literal["conversation", "booking", "research"]:
+    """Versión asíncrona de `intent_route`."""
+    start = time.perf_counter()
+    intent = await alocal_route(state, start)
+    if intent is not None:
+        return intent
+    
+    schema = await get_llm().ainvoke([("system", SYSTEM_PROMPT)] + window_for("intent", state))
+    step = schema.step or 'conversation'
+    record_llm_route(step, start)
+    return step
+
+def intent_node(state: State) -> State:
+    """Nodo del router para el modo paralelo: guarda el destino en el estado."""
+    return {"next_step": intent_route(state)}
+
+async def aintent_node(state: State) -> State:
+    return {"next_step": await aintent_route(state)}
+
+def next_step_route(state: State) -> Literal["conversation", "booking", "research"]:
+    """Lee el destino que dejó `intent_node` (tras unirse con el extractor)."""
+    return state.get("next_step") or 'conversation'
+
+async def anext_step_route(state: State) -> Literal["conversation", "booking", "research"]:
+    return next_step_route(state)
@@ -5,6 +5,11 @@ class State(MessagesState):
     customer_name: Optional[str]
     phone: Optional[str]
     my_age: Optional[str]
+    email: Optional[str]
+    extracted_until: Optional[int]  # Mensajes ya procesados por el extractor (marca incremental)
+    history_summary: Optional[str]   # Resumen acumulado de los mensajes antiguos (ver history.py)
+    summarized_until: Optional[int]  # Mensajes ya incluidos en el resumen
+    next_step: Optional[str]  # Destino decidido por el router (modo paralelo)
      # ====================================
     # NUEVO: Campos para investigación
     # ====================================
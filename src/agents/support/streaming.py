@@ -0,0 +1,137 @@
+"""
+Streaming de respuestas: eventos de progreso y tiempo hasta el primer token.
+
+Los tokens llegan al cliente con `stream_mode="messages"` (los de research,
+que vienen de un subagente, con `subgraphs=True`). El progreso de research
+("buscando en los documentos", ...) se emite como eventos personalizados
+(`stream_mode="custom"`):
+
+    {"type": "progress", "node": "research", "step": "buscar_documentos",
+     "label": "Buscando en los documentos", "args": {...}}
+
+`TokenClock` mide el tiempo hasta el primer token (TTFT) y el total de cada
+respuesta; `get_streaming_metrics()` resume ambos por nodo y, con la
+telemetría activada, se exportan como histogramas (`support_ttft_seconds`).
+"""
+
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from langchain_core.messages import BaseMessage
+
+from agents.support import telemetry
+
+# Historial de mediciones por nodo (para percentiles)
+_MAX_SAMPLES = 1000
+
+PROGRESS_LABELS = {
+    "buscar_documentos": "Buscando en los documentos",
+    "buscar_web": "Buscando en la web",
+    "guardar_nota": "Guardando la nota",
+    "listar_notas": "Consultando tus notas",
+    "buscar_notas": "Buscando en tus notas",
+}
+
+
+def emit(event: Dict[str, Any]) -> None:
+    """Emite un evento personalizado (no hace nada fuera de una ejecución del grafo)."""
+    try:
+        from langgraph.config import get_stream_writer
+
+        writer = get_stream_writer()
+    except RuntimeError:
+        return
+    writer(event)
+
+
+def emit_progress(node: str, step: str, args: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Evento de progreso de un paso intermedio (p. ej. una herramienta).
+
+    `args` va como un único diccionario: los argumentos de una herramienta
+    pueden llamarse como cualquier campo del evento ("node", "step").
+    """
+    emit({
+        "type": "progress",
+        "node": node,
+        "step": step,
+        "label": PROGRESS_LABELS.get(step, step),
+        "args": dict(args or {}),
+    })
+
+
+def has_text(message: BaseMessage) -> bool:
+    """El fragmento trae texto para el usuario (no solo llamadas a herramientas)."""
+    return bool(message.text)
+
+
+# ====================================
+# Métricas
+# ====================================
+class StreamingMetrics:
+    """TTFT y duración total de las respuestas, por nodo."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ttft: Dict[str, List[float]] = {}
+        self._total: Dict[str, List[float]] = {}
+
+    def record(self, node: str, ttft: Optional[float], total: float) -> None:
+        with self._lock:
+            if ttft is not None:
+                self._ttft[node] = (self._ttft.get(node, []) + [ttft])[-_MAX_SAMPLES:]
+            self._total[node] = (self._total.get(node, []) + [total])[-_MAX_SAMPLES:]
+
+    def snapshot(self) -> Dict:
+        def percentiles(values: List[float]) -> Dict:
+            values = sorted(values)
+            if not values:
+                return {"count": 0, "p50_ms": None, "p95_ms": None}
+            return {
+                "count": len(values),
+                "p50_ms": values[len(values) // 2] * 1000,
+                "p95_ms": values[min(len(values) - 1, int(len(values) * 0.95))] * 1000,
+            }
+
+        with self._lock:
+            return {
+                node: {"ttft": percentiles(self._ttft.get(node, [])), "total": percentiles(total)}
+                for node, total in self._total.items()
+            }
+
+
+_metrics = StreamingMetrics()
+
+
+def get_streaming_metrics() -> Dict:
+    """TTFT y duración total (p50/p95) por nodo."""
+    return _metrics.snapshot()
+
+
+class TokenClock:
+    """
+    Mide una respuesta en streaming.
+
+    Uso:
+        clock = TokenClock("conversation")
+        for chunk in llm.stream(...):
+            clock.chunk(chunk)
+        clock.done()
+    """
+
+    def __init__(self, node: str):
+        self.node = node
+        self.start = time.perf_counter()
+        self.first_token: Optional[float] = None
+
+    def chunk(self, message: BaseMessage) -> None:
+        if self.first_token is None and has_text(message):
+            self.first_token = time.perf_counter() - self.start
+
+    def done(self) -> None:
+        total = time.perf_counter() - self.start
+        _metrics.record(self.node, self.first_token, total)
+        if self.first_token is not None:
+            telemetry.observe("support_ttft_seconds", self.first_token, node=self.node)
+        telemetry.observe("support_response_seconds", total, node=self.node)
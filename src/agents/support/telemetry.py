@@ -0,0 +1,379 @@
+"""
+Instrumentación del grafo de soporte: spans, histogramas y exportación.
+
+Con `SUPPORT_TELEMETRY=1` se registra un span por cada nodo del grafo
+(incluidos los de los subagentes), cada llamada a herramienta y cada
+llamada a un modelo, con duración, modelo, tokens de entrada y salida y si
+vino de caché. Los spans se agregan en histogramas en memoria y, si
+`SUPPORT_TELEMETRY_JSONL` indica un archivo, se escriben como JSONL.
+
+Desactivada (por defecto), el callback no se instala en el grafo y
+`event()` / `observe()` retornan tras comprobar un booleano.
+
+Exportación:
+- `render_prometheus()`: formato de texto de Prometheus (p. ej. para el
+  textfile collector de node_exporter con `write_prometheus(path)`)
+- `snapshot()`: histogramas con p50/p95/p99 como dict (JSON)
+"""
+
+import atexit
+import bisect
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+ENABLED = os.getenv("SUPPORT_TELEMETRY", "0") not in ("0", "false", "no", "")
+JSONL_PATH = os.getenv("SUPPORT_TELEMETRY_JSONL", "")
+
+# Límites superiores de los buckets (Prometheus: acumulados, más +Inf)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (16, 64, 256, 1024, 2048, 4096, 8192, 16384, 65536)
+
+Labels = Tuple[Tuple[str, str], ...]
+# Un colector retorna (nombre, etiquetas, valor, tipo) en el momento de exportar
+Collector = Callable[[], Iterable[Tuple[str, Dict[str, str], float, str]]]
+
+
+def is_enabled() -> bool:
+    return ENABLED
+
+
+# ====================================
+# Histogramas y contadores
+# ====================================
+class Histogram:
+    """Histograma de buckets fijos (no thread-safe: lo protege el registro)."""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimación por interpolación lineal dentro del bucket (como histogram_quantile)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for i, bucket_count in enumerate(self.counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                if i == len(self.buckets):
+                    return lower  # bucket +Inf: no hay límite superior
+                upper = self.buckets[i]
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.buckets[-1]
+
+
+class Registry:
+    """Histogramas y contadores por (métrica, etiquetas)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._collectors: List[Collector] = []
+
+    def observe(self, name: str, value: float, buckets: Tuple[float, ...] = LATENCY_BUCKETS, /, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def inc(self, name: str, value: float = 1.0, /, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def register_collector(self, collector: Collector) -> None:
+        with self._lock:
+            self._collectors.append(collector)
+
+    def _collected(self) -> List[Tuple[str, Dict[str, str], float, str]]:
+        samples = []
+        for collector in list(self._collectors):
+            try:
+                samples.extend(collector())
+            except Exception:
+                continue  # un colector roto no impide exportar el resto
+        return samples
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            histograms = [
+                {
+                    "name": name,
+                    "labels": dict(labels),
+                    "count": histogram.count,
+                    "sum": histogram.sum,
+                    "p50": histogram.quantile(0.50),
+                    "p95": histogram.quantile(0.95),
+                    "p99": histogram.quantile(0.99),
+                }
+                for (name, labels), histogram in sorted(self._histograms.items())
+            ]
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+        gauges = [
+            {"name": name, "labels": labels, "value": value, "type": kind}
+            for name, labels, value, kind in self._collected()
+        ]
+        return {"histograms": histograms, "counters": counters, "collected": gauges}
+
+    def render_prometheus(self) -> str:
+        lines: List[str] = []
+        typed = set()
+
+        def header(name: str, kind: str) -> None:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                header(name, "histogram")
+                cumulative = 0
+                for bound, count in zip(list(histogram.buckets) + ["+Inf"], histogram.counts):
+                    cumulative += count
+                    le = bound if bound == "+Inf" else f"{bound:g}"
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {histogram.sum:.6f}")
+                lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+            for (name, labels), value in sorted(self._counters.items()):
+                header(name, "counter")
+                lines.append(f"{name}{_labels(labels)} {value:g}")
+        for name, labels, value, kind in self._collected():
+            header(name, kind)
+            lines.append(f"{name}{_labels(tuple(sorted(labels.items())))} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+# ====================================
+# Spans en JSONL
+# ====================================
+class JsonlSink:
+    """Escribe spans y eventos en JSONL con un búfer (vaciado cada 100 líneas o 1 s)."""
+
+    def __init__(self, path: Path, flush_lines: int = 100, flush_seconds: float = 1.0):
+        self.path = path
+        self.flush_lines = flush_lines
+        self.flush_seconds = flush_seconds
+        self._lock = threading.Lock()
+        self._buffer: List[str] = []
+        self._last_flush = time.monotonic()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        atexit.register(self.flush)
+
+    def write(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            self._buffer.append(line)
+            due = (
+                len(self._buffer) >= self.flush_lines
+                or time.monotonic() - self._last_flush >= self.flush_seconds
+            )
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            lines, self._buffer = self._buffer, []
+            self._last_flush = time.monotonic()
+        if lines:
+            with open(self.path, "a", encoding="utf-8") as fh:
+                fh.write("\n".join(lines) + "\n")
+
+
+_registry = Registry()
+_sink: Optional[JsonlSink] = JsonlSink(Path(JSONL_PATH)) if ENABLED and JSONL_PATH else None
+
+
+def get_registry() -> Registry:
+    return _registry
+
+
+def register_collector(collector: Collector) -> None:
+    """Registra métricas que se leen al exportar (p. ej. estadísticas de cachés)."""
+    _registry.register_collector(collector)
+
+
+def observe(name: str, value: float, buckets: Tuple[float, ...] = LATENCY_BUCKETS, /, **labels: str) -> None:
+    """Añade una observación a un histograma (no hace nada si está desactivada)."""
+    if ENABLED:
+        _registry.observe(name, value, buckets, **labels)
+
+
+def event(name: str, /, **attrs: Any) -> None:
+    """Registra un evento puntual (contador + línea JSONL con sus atributos)."""
+    if not ENABLED:
+        return
+    _registry.inc("support_events_total", event=name)
+    if _sink is not None:
+        _sink.write({"type": "event", "ts": time.time(), "name": name, **attrs})
+
+
+def _record_span(span: Dict[str, Any]) -> None:
+    kind, name = span["kind"], span["name"]
+    _registry.observe("support_span_duration_seconds", span["duration"], LATENCY_BUCKETS, kind=kind, name=name)
+    if span.get("error"):
+        _registry.inc("support_span_errors_total", 1.0, kind=kind, name=name)
+    if kind == "llm":
+        model = span.get("model") or "desconocido"
+        if span.get("cache_hit"):
+            _registry.inc("support_llm_cache_hits_total", model=model)
+        for direction in ("input", "output"):
+            tokens = span.get(f"{direction}_tokens")
+            if tokens is not None:
+                _registry.inc("support_llm_tokens_total", tokens, model=model, direction=direction)
+                _registry.observe(f"support_llm_{direction}_tokens", tokens, TOKEN_BUCKETS, model=model)
+    if _sink is not None:
+        _sink.write({"type": "span", **span})
+
+
+def snapshot() -> Dict:
+    """Histogramas (con p50/p95/p99), contadores y métricas de los colectores."""
+    return _registry.snapshot()
+
+
+def render_prometheus() -> str:
+    return _registry.render_prometheus()
+
+
+def write_prometheus(path: Path) -> None:
+    """Escribe las métricas de forma atómica (textfile collector de node_exporter)."""
+    tmp = Path(f"{path}.tmp")
+    tmp.write_text(render_prometheus(), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+# ====================================
+# Callback: spans de nodos, herramientas y modelos
+# ====================================
+class TelemetryCallbackHandler(BaseCallbackHandler):
+    """
+    Convierte los callbacks de LangChain/LangGraph en spans.
+
+    - Nodos: la ejecución cuyo nombre coincide con `langgraph_node`. Los
+      nodos de subagentes se nombran con su ruta ("research/model").
+    - Herramientas y modelos: todos.
+    """
+
+    run_inline = True  # Operaciones O(1): mejor en el hilo del evento que en el pool
+
+    def __init__(self):
+        self._runs: Dict[UUID, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id: UUID, kind: str, name: str, metadata: Optional[Dict], **attrs: Any) -> None:
+        metadata = metadata or {}
+        span = {
+            "kind": kind,
+            "name": name,
+            "thread_id": metadata.get("thread_id"),
+            "start": time.perf_counter(),
+            "ts": time.time(),
+            **attrs,
+        }
+        with self._lock:
+            self._runs[run_id] = span
+
+    def _end(self, run_id: UUID, error: Optional[BaseException] = None, **attrs: Any) -> None:
+        with self._lock:
+            span = self._runs.pop(run_id, None)
+        if span is None:
+            return
+        span["duration"] = time.perf_counter() - span.pop("start")
+        if error is not None:
+            span["error"] = f"{type(error).__name__}: {error}"
+        span.update(attrs)
+        _record_span(span)
+
+    # Nodos
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        if node is None or kwargs.get("name") != node:
+            return
+        with self._lock:
+            parent = self._runs.get(parent_run_id)
+        if parent is not None and parent["kind"] == "node" and parent["name"].endswith(node):
+            return  # el runnable interno del nodo se llama igual que el nodo
+        path = [part.split(":")[0] for part in (metadata.get("langgraph_checkpoint_ns") or "").split("|") if part]
+        self._start(run_id, "node", "/".join(path) or node, metadata)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    # Herramientas
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name") or "tool"
+        self._start(run_id, "tool", name, metadata)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    # Modelos
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        metadata = metadata or {}
+        model = metadata.get("ls_model_name") or (serialized or {}).get("kwargs", {}).get("model_name")
+        node = metadata.get("langgraph_node") or "llm"
+        self._start(run_id, "llm", node, metadata, model=model)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        metadata = metadata or {}
+        self._start(run_id, "llm", metadata.get("langgraph_node") or "llm", metadata, model=metadata.get("ls_model_name"))
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        attrs: Dict[str, Any] = {}
+        generation = response.generations[0][0] if response.generations and response.generations[0] else None
+        message = getattr(generation, "message", None)
+        usage = getattr(message, "usage_metadata", None)
+        if usage:
+            attrs["input_tokens"] = usage.get("input_tokens")
+            attrs["output_tokens"] = usage.get("output_tokens")
+        if message is not None:
+            attrs["cache_hit"] = bool(message.response_metadata.get("cache_hit"))
+        self._end(run_id, **attrs)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+
+def instrument(graph):
+    """Instala el callback de telemetría en un grafo compilado (si está activada)."""
+    if not ENABLED:
+        return graph
+    return graph.with_config(callbacks=[TelemetryCallbackHandler()])
+
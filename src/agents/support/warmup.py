@@ -0,0 +1,120 @@
+"""
+Inicialización perezosa y warm-up en segundo plano del grafo de soporte.
+
+Importar `agents.support.agent` no crea clientes de modelos ni abre el
+vector store. Según `SUPPORT_INIT_MODE`:
+- "lazy": todo se construye en el primer uso
+- "background" (por defecto): se construye en un hilo en segundo plano
+  justo después de compilar el grafo
+- "eager": se construye de forma síncrona al importar (comportamiento antiguo)
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+INIT_MODES = ("lazy", "background", "eager")
+ROUTING_MODES = ("parallel", "sequential", "combined")
+
+_warmup_thread: Optional[threading.Thread] = None
+_warmup_seconds: Optional[float] = None
+_warmup_error: Optional[BaseException] = None
+
+
+def get_init_mode() -> str:
+    """Modo de inicialización configurado en `SUPPORT_INIT_MODE`."""
+    mode = os.getenv("SUPPORT_INIT_MODE", "background").strip().lower()
+    return mode if mode in INIT_MODES else "background"
+
+
+def get_routing_mode() -> str:
+    """
+    Modo de extracción y enrutado configurado en `SUPPORT_ROUTING_MODE`.
+
+    - "parallel" (por defecto): extractor y router en ramas paralelas
+    - "sequential": el router espera a que termine el extractor
+    - "combined": una sola llamada devuelve contacto y siguiente paso
+    """
+    mode = os.getenv("SUPPORT_ROUTING_MODE", "parallel").strip().lower()
+    return mode if mode in ROUTING_MODES else "parallel"
+
+
+def warm_up() -> float:
+    """
+    Construye todos los recursos pesados del grafo.
+
+    Returns:
+        Segundos empleados
+    """
+    from agents.support.nodes.conversation.node import get_llm as get_conversation_llm
+    from agents.support.nodes.extractor.combined import get_llm as get_combined_llm
+    from agents.support.nodes.extractor.node import get_llm as get_extractor_llm
+    from agents.support.nodes.booking.node import get_booking_agent
+    from agents.support.nodes.research.node import get_research_agent
+    from agents.support.nodes.research.vectorstore import start_background_warmup
+    from agents.support.routes.intent.route import get_classifier, get_llm as get_intent_llm
+
+    start = time.perf_counter()
+    # El vector store (E/S y embeddings) avanza en paralelo con los modelos
+    vectorstore_thread = start_background_warmup()
+    get_intent_llm()
+    try:
+        # Embeddings de los ejemplos del router (quedan en la caché en disco)
+        get_classifier().prepare()
+    except Exception as e:
+        print(f"[Support] Clasificador de intención no disponible: {e}")
+    if get_routing_mode() == "combined":
+        get_combined_llm()
+    else:
+        get_extractor_llm()
+    get_conversation_llm()
+    get_booking_agent()
+    get_research_agent()
+    vectorstore_thread.join()
+    return time.perf_counter() - start
+
+
+def _run_warmup() -> None:
+    global _warmup_seconds, _warmup_error
+    try:
+        _warmup_seconds = warm_up()
+        print(f"[Support] Warm-up completado en {_warmup_seconds:.2f}s")
+    except BaseException as e:
+        _warmup_error = e
+        print(f"[Support] Error en el warm-up: {e}")
+
+
+def start_warmup(mode: Optional[str] = None) -> Optional[threading.Thread]:
+    """
+    Aplica el modo de inicialización.
+
+    Args:
+        mode: Modo a usar (por defecto el de `SUPPORT_INIT_MODE`)
+
+    Returns:
+        El hilo del warm-up en modo "background", None en los demás modos
+    """
+    global _warmup_thread
+    mode = mode or get_init_mode()
+
+    if mode == "eager":
+        _run_warmup()
+    elif mode == "background" and _warmup_thread is None:
+        _warmup_thread = threading.Thread(target=_run_warmup, name="support-warmup", daemon=True)
+        _warmup_thread.start()
+    return _warmup_thread
+
+
+def get_warmup_status() -> Dict:
+    """Estado del warm-up (útil para health checks)."""
+    from agents.support.nodes.research.vectorstore import get_watcher_metrics, is_vectorstore_ready
+
+    return {
+        "mode": get_init_mode(),
+        "running": _warmup_thread is not None and _warmup_thread.is_alive(),
+        "seconds": _warmup_seconds,
+        "error": str(_warmup_error) if _warmup_error else None,
+        "vectorstore_ready": is_vectorstore_ready(),
+        "watcher": get_watcher_metrics(),
+    }